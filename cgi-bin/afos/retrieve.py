@@ -1,9 +1,15 @@
-"""give me some AFOS data please."""
+"""give me some AFOS data please.
+
+Products are streamed back as the database rows arrive, so large ``limit``
+requests do not need to be held in memory.  ``fmt`` can be text, html, zip
+or ndjson (one JSON object per product).
+"""
+import json
 import re
-import zipfile
 from datetime import datetime, timezone
-from io import BytesIO, StringIO
+from io import StringIO
 
+from iemweb.zipstream import stream_zip
 from paste.request import parse_formvars
 from pyiem.util import get_dbconn, html_escape
 
@@ -58,12 +64,61 @@ def get_date(raw):
 
 def zip_handler(cursor):
     """Stream back a zipfile!"""
-    bio = BytesIO()
-    with zipfile.ZipFile(bio, "w") as zfp:
-        for row in cursor:
-            zfp.writestr(f"{row[1]}_{row[2]}.txt", row[0])
-    bio.seek(0)
-    return [bio.getvalue()]
+    return stream_zip((f"{row[1]}_{row[2]}.txt", row[0]) for row in cursor)
+
+
+def ndjson_handler(cursor):
+    """Stream back one JSON object per product."""
+    for row in cursor:
+        res = {"pil": row[1].strip(), "entered": row[2], "data": row[0]}
+        yield f"{json.dumps(res)}\n".encode("utf-8")
+
+
+def text_handler(cursor, fmt, pils):
+    """Stream back the products as text or html."""
+    found = False
+    for row in cursor:
+        found = True
+        sio = StringIO()
+        if fmt == "html":
+            sio.write(
+                f'<a href="/wx/afos/p.php?pil={row[1]}&e={row[2]}">'
+                "Permalink</a> for following product: "
+            )
+            sio.write("<br /><pre>\n")
+        else:
+            sio.write("\001\n")
+        # Remove control characters from the product as we are including
+        # them manually here...
+        if fmt == "html":
+            sio.write(
+                html_escape(row[0])
+                .replace("\003", "")
+                .replace("\001\r\r\n", "")
+                .replace("\r\r\n", "\n")
+            )
+        else:
+            sio.write(
+                (row[0])
+                .replace("\003", "")
+                .replace("\001\r\r\n", "")
+                .replace("\r\r\n", "\n")
+            )
+        if fmt == "html":
+            sio.write("</pre><hr>\n")
+        else:
+            sio.write("\n\003\n")
+        yield sio.getvalue().encode("ascii", "ignore")
+    if not found:
+        yield f"ERROR: Could not Find: {','.join(pils)}".encode("ascii")
+
+
+def stream_products(pgconn, handler, *args):
+    """Run the handler, closing the database connection when done."""
+    try:
+        yield from handler(*args)
+    finally:
+        pgconn.close()
 
 
 def application(environ, start_response):
@@ -88,7 +143,7 @@ def application(environ, start_response):
     fmt = form.get("fmt", "text")
     headers = [("X-Content-Type-Options", "nosniff")]
     if form.get("dl") == "1" or fmt == "zip":
-        suffix = "zip" if fmt == "zip" else "txt"
+        suffix = fmt if fmt in ["zip", "ndjson"] else "txt"
         headers.append(("Content-type", "application/octet-stream"))
         headers.append(
             ("Content-disposition", f"attachment; filename=afos.{suffix}")
@@ -98,6 +153,8 @@ def application(environ, start_response):
             headers.append(("Content-type", "text/plain"))
         elif fmt == "html":
             headers.append(("Content-type", "text/html"))
+        elif fmt == "ndjson":
+            headers.append(("Content-type", "application/x-ndjson"))
     start_response("200 OK", headers)
     if not pils:
         return [b"ERROR: No pil specified..."]
@@ -152,59 +209,30 @@ def application(environ, start_response):
     if len(ttaaii) == 6:
         ttlimit = f" and wmo = '{ttaaii}' "
 
-    # Do optimized query first, see if we can get our limit right away
+    # See if the last 31 days can get our limit right away, the probe only
+    # touches the index and not the product text
+    recentlimit = "and entered > now() - '31 days'::interval"
+    cursor.execute(
+        "SELECT count(*) from (SELECT entered from products WHERE "
+        f"{pillimit} {recentlimit} {centerlimit} {timelimit} {ttlimit} "
+        f"ORDER by entered DESC LIMIT {limit}) as foo"
+    )
+    if cursor.fetchone()[0] != limit:
+        recentlimit = ""
     sql = (
         "SELECT data, pil, "
         "to_char(entered at time zone 'UTC', 'YYYYMMDDHH24MI') as ts "
-        f"from products WHERE {pillimit} "
-        f"and entered > now() - '31 days'::interval {centerlimit} "
+        f"from products WHERE {pillimit} {recentlimit} {centerlimit} "
         f"{timelimit} {ttlimit} ORDER by entered DESC LIMIT {limit}"
     )
+    # Server side cursor, so rows arrive as we stream them back
+    cursor = mydb.cursor("afos_streamer")
     cursor.execute(sql)
-    if cursor.rowcount != limit:
-        sql = (
-            "SELECT data, pil, "
-            "to_char(entered at time zone 'UTC', 'YYYYMMDDHH24MI') as ts "
-            f"from products WHERE {pillimit} {centerlimit} {timelimit} "
-            f"{ttlimit} ORDER by entered DESC LIMIT {limit}"
-        )
-        cursor.execute(sql)
     if fmt == "zip":
-        return zip_handler(cursor)
-
-    for row in cursor:
-        if fmt == "html":
-            sio.write(
-                f'<a href="/wx/afos/p.php?pil={row[1]}&e={row[2]}">'
-                "Permalink</a> for following product: "
-            )
-            sio.write("<br /><pre>\n")
-        else:
-            sio.write("\001\n")
-        # Remove control characters from the product as we are including
-        # them manually here...
-        if fmt == "html":
-            sio.write(
-                html_escape(row[0])
-                .replace("\003", "")
-                .replace("\001\r\r\n", "")
-                .replace("\r\r\n", "\n")
-            )
-        else:
-            sio.write(
-                (row[0])
-                .replace("\003", "")
-                .replace("\001\r\r\n", "")
-                .replace("\r\r\n", "\n")
-            )
-        if fmt == "html":
-            sio.write("</pre><hr>\n")
-        else:
-            sio.write("\n\003\n")
-
-    if cursor.rowcount == 0:
-        sio.write(f"ERROR: Could not Find: {','.join(pils)}")
-    return [sio.getvalue().encode("ascii", "ignore")]
+        return stream_products(mydb, zip_handler, cursor)
+    if fmt == "ndjson":
+        return stream_products(mydb, ndjson_handler, cursor)
+    return stream_products(mydb, text_handler, cursor, fmt, pils)
 
 
 def test_pil_logic():
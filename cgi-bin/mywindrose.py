@@ -3,17 +3,59 @@ Generate a PNG windrose based on the CGI parameters, called from
 
     htdocs/sites/dyn_windrose.phtml
     htdocs/sites/windrose.phtml
+
+Requests for ASOS data that align to month boundaries are served from the
+precomputed counts in iemweb.windrosecounts
 """
 import datetime
 from io import BytesIO
 from zoneinfo import ZoneInfo
 
+from iemweb import windrosecounts
+from iemweb.stations import get_network_table
 from paste.request import parse_formvars
-from pyiem.network import Table as NetworkTable
 from pyiem.plot.use_agg import plt
 from pyiem.util import get_dbconn
 from pyiem.windrose_utils import windrose
 
+DEFAULT_ETS = datetime.datetime(2050, 1, 1)
+
+
+def counts_windrose(form, dbname, network, station, sts, ets, **kwargs):
+    """Attempt to generate the windrose from precomputed counts.
+
+    Returns:
+      windrose result or None if this request can not be served so
+    """
+    if (
+        dbname != "asos"
+        or form.get("level") is not None
+        or form.get("limit_by_doy") == "1"
+    ):
+        return None
+    # Only whole months are stored
+    for ts in [sts, ets]:
+        if ts.day != 1 or ts.hour != 0 or ts.minute != 0:
+            return None
+    df, last_valid = windrosecounts.load_counts(network, station)
+    if df is None:
+        return None
+    # Requests for periods not yet counted need the raw observations, the
+    # default period of record needs counts that are being kept up to date
+    if ets.replace(tzinfo=None) == DEFAULT_ETS:
+        if not windrosecounts.counts_current(network, station):
+            return None
+    elif ets > last_valid:
+        return None
+    df = windrosecounts.filter_counts(
+        df,
+        months=kwargs.pop("months"),
+        hours=kwargs.pop("hours"),
+        sts=sts,
+        ets=ets,
+    )
+    return windrosecounts.counts_windrose(station, df, **kwargs)
+
 
 def send_error(form, msg, start_response):
     """Abort, abort"""
@@ -153,7 +195,7 @@ def application(environ, start_response):
     if "staticrange" in form and form["staticrange"] == "1":
         rmax = 100
 
-    nt = NetworkTable(network, only_online=False)
+    nt = get_network_table(network)
     if station not in nt.sts:
         return [send_error(form, "Unknown station identifier", start_response)]
     tzname = nt.sts[station]["tzname"]
@@ -168,24 +210,31 @@ def application(environ, start_response):
         bins = [
             float(v) for v in form.get("bins").split(",") if v.strip() != ""
         ]
-    res = windrose(
-        station,
-        database=dbname,
-        sts=sts,
-        ets=ets,
-        months=months,
-        hours=hours,
-        units=units,
-        nsector=nsector,
-        justdata=("justdata" in form),
-        rmax=rmax,
-        sname=nt.sts[station]["name"],
-        tzname=tzname,
-        level=form.get("level", None),
-        limit_by_doy=(form.get("limit_by_doy") == "1"),
-        bins=bins,
-        plot_convention=form.get("conv", "from"),
+    kwargs = {
+        "months": months,
+        "hours": hours,
+        "units": units,
+        "nsector": nsector,
+        "justdata": ("justdata" in form),
+        "rmax": rmax,
+        "sname": nt.sts[station]["name"],
+        "tzname": tzname,
+        "bins": bins,
+        "plot_convention": form.get("conv", "from"),
+    }
+    res = counts_windrose(
+        form, dbname, network, station, sts, ets, **kwargs.copy()
     )
+    if res is None:
+        res = windrose(
+            station,
+            database=dbname,
+            sts=sts,
+            ets=ets,
+            level=form.get("level", None),
+            limit_by_doy=(form.get("limit_by_doy") == "1"),
+            **kwargs,
+        )
     if "justdata" in form:
         # We want text
         start_response("200 OK", [("Content-type", "text/plain")])
@@ -7,8 +7,8 @@ from io import StringIO
 from zoneinfo import ZoneInfo
 from zoneinfo._common import ZoneInfoNotFoundError
 
+from iemweb.stations import get_network_table
 from paste.request import parse_formvars
-from pyiem.network import Table as NetworkTable
 from pyiem.util import get_dbconn, utc
 
 NULLS = {"M": "M", "null": "null", "empty": ""}
@@ -120,7 +120,7 @@ def get_stations(form):
     """Figure out the requested station"""
     if "station" not in form:
         if "network" in form:
-            nt = NetworkTable(form.get("network"), only_online=False)
+            nt = get_network_table(form.get("network"))
             return list(nt.sts.keys())
         return []
     stations = form.getall("station")
@@ -1,5 +1,13 @@
-"""Generate a shapefile of warnings based on the CGI request"""
+"""Generate a shapefile of warnings based on the CGI request
+
+Besides the zipped shapefile and Excel, ``accept=geojsonseq`` streams
+newline delimited GeoJSON features and ``accept=flatgeobuf`` a FlatGeobuf
+file as the database rows arrive.  Whole year national shapefile requests
+are served from the yearly bundles that scripts/cache/warn_cache.py builds.
+"""
 import datetime
+import json
+import os
 import tempfile
 import zipfile
 from io import BytesIO
@@ -8,11 +16,69 @@ import fiona
 import pandas as pd
 from pandas.io.sql import read_sql
 from paste.request import parse_formvars
-from pyiem.util import get_dbconnc, utc
+from pyiem.util import get_dbconn, get_dbconnc, utc
 from shapely.geometry import mapping
 from shapely.wkb import loads
 
 EXL = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+BUNDLE_DIR = "/mesonet/share/pickup/wwa"
+CHUNKSIZE = 1024 * 1024
+# Output property name -> query column
+PROPS = {
+    "WFO": "wfo",
+    "ISSUED": "utc_issue",
+    "EXPIRED": "utc_expire",
+    "INIT_ISS": "utc_prodissue",
+    "INIT_EXP": "utc_init_expire",
+    "PHENOM": "phenomena",
+    "GTYPE": "gtype",
+    "SIG": "significance",
+    "ETN": "eventid",
+    "STATUS": "status",
+    "NWS_UGC": "ugc",
+    "AREA_KM2": "area2d",
+    "UPDATED": "utc_updated",
+    "HV_NWSLI": "hvtec_nwsli",
+    "HV_SEV": "hvtec_severity",
+    "HV_CAUSE": "hvtec_cause",
+    "HV_REC": "hvtec_record",
+    "EMERGENC": "is_emergency",
+    "POLY_BEG": "utc_polygon_begin",
+    "POLY_END": "utc_polygon_end",
+    "WINDTAG": "windtag",
+    "HAILTAG": "hailtag",
+    "TORNTAG": "tornadotag",
+    "DAMAGTAG": "damagetag",
+}
+SCHEMA = {
+    "geometry": "MultiPolygon",
+    "properties": {
+        "WFO": "str:3",
+        "ISSUED": "str:12",
+        "EXPIRED": "str:12",
+        "INIT_ISS": "str:12",
+        "INIT_EXP": "str:12",
+        "PHENOM": "str:2",
+        "GTYPE": "str:1",
+        "SIG": "str:1",
+        "ETN": "str:4",
+        "STATUS": "str:3",
+        "NWS_UGC": "str:6",
+        "AREA_KM2": "float",
+        "UPDATED": "str:12",
+        "HV_NWSLI": "str:5",
+        "HV_SEV": "str:1",
+        "HV_CAUSE": "str:2",
+        "HV_REC": "str:2",
+        "EMERGENC": "bool",
+        "POLY_BEG": "str:12",
+        "POLY_END": "str:12",
+        "WINDTAG": "float",
+        "HAILTAG": "float",
+        "TORNTAG": "str:16",
+        "DAMAGTAG": "str:16",
+    },
+}
 
 
 def dfmt(text):
@@ -216,6 +282,110 @@ def build_sql(form):
     )
 
 
+def get_bundle_fn(form):
+    """Return the prebuilt yearly bundle matching this request, if any.
+
+    Only completed years are served, so the bundle can not be stale.
+    """
+    if (
+        form.get("accept", "shapefile") != "shapefile"
+        or form.get("simple", "no") != "yes"
+        or form.get("cache", "yes") == "no"
+        or int(form.get("timeopt", [1])[0]) != 1
+        or form.get("addsvs", "no") == "yes"
+        or form.get("limitps", "no") == "yes"
+        or "limit2" in form
+        or form.get("location_group", "wfo") != "wfo"
+        or parse_wfo_location_group(form) != ""
+    ):
+        return None
+    try:
+        sts, ets = get_time_extent(form)
+    except Exception:
+        return None
+    if (
+        sts != utc(sts.year, 1, 1)
+        or ets != utc(sts.year, 12, 31, 23, 59)
+        or sts.year >= utc().year
+    ):
+        return None
+    if "limit0" in form:
+        variant = "tsmf_sbw" if "limit1" in form else "tsmf"
+    elif "limit1" in form:
+        return None
+    else:
+        variant = "all"
+    fn = f"{BUNDLE_DIR}/{sts.year}_{variant}.zip"
+    # The bundle needs to have been built after the year was complete
+    if not os.path.isfile(fn) or os.stat(fn).st_mtime < ets.timestamp():
+        return None
+    return fn
+
+
+def stream_file(fn, delete=False):
+    """Yield the file contents in chunks."""
+    try:
+        with open(fn, "rb") as fh:
+            while True:
+                chunk = fh.read(CHUNKSIZE)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        if delete:
+            os.unlink(fn)
+
+
+def stream_geojsonseq(sql):
+    """Yield RFC 8142 GeoJSON text sequence features as rows arrive."""
+    pgconn = get_dbconn("postgis")
+    cursor = pgconn.cursor("watchwarn_streamer")
+    cursor.execute(
+        f"SELECT ST_AsGeoJSON(geo, 5), {', '.join(PROPS.values())} "
+        f"from ({sql}) as foo WHERE geo is not null"
+    )
+    try:
+        for row in cursor:
+            feature = {
+                "type": "Feature",
+                "properties": dict(zip(PROPS, row[1:])),
+                "geometry": json.loads(row[0]),
+            }
+            yield f"\x1e{json.dumps(feature)}\n".encode("utf-8")
+    finally:
+        pgconn.close()
+
+
+def write_flatgeobuf(sql):
+    """Write the rows sequentially into a FlatGeobuf temporary file."""
+    pgconn = get_dbconn("postgis")
+    cursor = pgconn.cursor("watchwarn_streamer")
+    cursor.execute(
+        f"SELECT geo, {', '.join(PROPS.values())} from ({sql}) as foo "
+        "WHERE geo is not null"
+    )
+    with tempfile.NamedTemporaryFile(suffix=".fgb", delete=False) as tmpfd:
+        tmpfn = tmpfd.name
+    # Without the spatial index, features are written as they arrive
+    with fiona.open(
+        tmpfn,
+        "w",
+        crs="EPSG:4326",
+        driver="FlatGeobuf",
+        schema=SCHEMA,
+        SPATIAL_INDEX="NO",
+    ) as output:
+        for row in cursor:
+            output.write(
+                {
+                    "properties": dict(zip(PROPS, row[1:])),
+                    "geometry": mapping(loads(row[0], hex=True)),
+                }
+            )
+    pgconn.close()
+    return tmpfn
+
+
 def do_excel(pgconn, sql):
     """Generate an Excel format response."""
     df = read_sql(sql, pgconn, index_col=None)
@@ -254,6 +424,29 @@ def application(environ, start_response):
         return [str(exp).encode("ascii")]
 
     accept = form.get("accept", "shapefile")
+    bundlefn = get_bundle_fn(form)
+    if bundlefn is not None:
+        headers = [
+            ("Content-type", "application/octet-stream"),
+            ("Content-Disposition", f"attachment; filename={fn}.zip"),
+        ]
+        start_response("200 OK", headers)
+        return stream_file(bundlefn)
+    if accept == "geojsonseq":
+        headers = [
+            ("Content-type", "application/geo+json-seq"),
+            ("Content-Disposition", f"attachment; filename={fn}.geojsons"),
+        ]
+        start_response("200 OK", headers)
+        return stream_geojsonseq(sql)
+    if accept == "flatgeobuf":
+        tmpfn = write_flatgeobuf(sql)
+        headers = [
+            ("Content-type", "application/octet-stream"),
+            ("Content-Disposition", f"attachment; filename={fn}.fgb"),
+        ]
+        start_response("200 OK", headers)
+        return stream_file(tmpfn, delete=True)
     pgconn, cursor = get_dbconnc("postgis")
     if accept == "excel":
         headers = [
@@ -282,35 +475,7 @@ def application(environ, start_response):
                 "w",
                 crs="EPSG:4326",
                 driver="ESRI Shapefile",
-                schema={
-                    "geometry": "MultiPolygon",
-                    "properties": {
-                        "WFO": "str:3",
-                        "ISSUED": "str:12",
-                        "EXPIRED": "str:12",
-                        "INIT_ISS": "str:12",
-                        "INIT_EXP": "str:12",
-                        "PHENOM": "str:2",
-                        "GTYPE": "str:1",
-                        "SIG": "str:1",
-                        "ETN": "str:4",
-                        "STATUS": "str:3",
-                        "NWS_UGC": "str:6",
-                        "AREA_KM2": "float",
-                        "UPDATED": "str:12",
-                        "HV_NWSLI": "str:5",
-                        "HV_SEV": "str:1",
-                        "HV_CAUSE": "str:2",
-                        "HV_REC": "str:2",
-                        "EMERGENC": "bool",
-                        "POLY_BEG": "str:12",
-                        "POLY_END": "str:12",
-                        "WINDTAG": "float",
-                        "HAILTAG": "float",
-                        "TORNTAG": "str:16",
-                        "DAMAGTAG": "str:16",
-                    },
-                },
+                schema=SCHEMA,
             ) as output:
                 for row in cursor:
                     if row["geo"] is None:
@@ -337,30 +502,7 @@ def application(environ, start_response):
                     output.write(
                         {
                             "properties": {
-                                "WFO": row["wfo"],
-                                "ISSUED": row["utc_issue"],
-                                "EXPIRED": row["utc_expire"],
-                                "INIT_ISS": row["utc_prodissue"],
-                                "INIT_EXP": row["utc_init_expire"],
-                                "PHENOM": row["phenomena"],
-                                "GTYPE": row["gtype"],
-                                "SIG": row["significance"],
-                                "ETN": row["eventid"],
-                                "STATUS": row["status"],
-                                "NWS_UGC": row["ugc"],
-                                "AREA_KM2": row["area2d"],
-                                "UPDATED": row["utc_updated"],
-                                "HV_NWSLI": row["hvtec_nwsli"],
-                                "HV_SEV": row["hvtec_severity"],
-                                "HV_CAUSE": row["hvtec_cause"],
-                                "HV_REC": row["hvtec_record"],
-                                "EMERGENC": row["is_emergency"],
-                                "POLY_BEG": row["utc_polygon_begin"],
-                                "POLY_END": row["utc_polygon_end"],
-                                "WINDTAG": row["windtag"],
-                                "HAILTAG": row["hailtag"],
-                                "TORNTAG": row["tornadotag"],
-                                "DAMAGTAG": row["damagetag"],
+                                key: row[col] for key, col in PROPS.items()
                             },
                             "geometry": mapping(mp),
                         }
@@ -6,6 +6,11 @@ import sys
 import traceback
 import warnings
 
+# Make our shared web helpers importable as `iemweb`
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "../pylib")
+)
+
 # These need set before importing matplotlib
 envpath = "/opt/miniconda3/envs/prod"
 # Since we are not sourcing the conda env, we need to set some things
@@ -0,0 +1,270 @@
+"""Native XYZ tile renderer for archived IEM raster products.
+
+Serves the same layer names as TileCache, but without a round trip through
+mapserv, ie
+
+    /c/rtile.py/1.0.0/ridge::USCOMP-N0Q-201201230815/7/33/50.png
+    /c/rtile.py/1.0.0/mrms::P24H-0/7/33/50.png
+
+The source products are paletted EPSG:4326 PNGs with world files.  Those
+are decoded once into memory-mapped arrays, so a tile only touches the rows
+it needs.  Decoded arrays not used within CACHE_MAXAGE are culled, as are
+the least recently used beyond CACHE_MAXBYTES.  Since the source grid is
+regular in lat/lon, the reprojection to web mercator is separable and the
+per-zoom row and column index lookups are cached.
+
+Cache policy differs by layer timestamp.  Timestamped tiles rendered from
+the archive never change, so they are written to a persistent disk tile
+store and sent with a long lived Cache-Control.  Realtime (``-0``) tiles,
+and timestamped tiles served from the realtime file before the product
+reaches the archive, are rendered on demand with a short Cache-Control.
+scripts/cache/seed_tiles.py pre-seeds the low zoom tiles of each new
+composite into the store.
+"""
+import datetime
+import hashlib
+import json
+import math
+import os
+from functools import lru_cache
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+TILESIZE = 256
+CACHE_DIR = "/mesonet/tmp/rtile"
+# Decoded rasters are large (ie ~66 MB for n0q), so bound the disk used
+CACHE_MAXAGE = datetime.timedelta(hours=6)
+CACHE_MAXBYTES = 20 * 1024**3
+TILE_DIR = "/mesonet/share/rtile"
+ARCHIVE = "/mesonet/ARCHIVE/data/%Y/%m/%d/GIS"
+LDMDATA = "/mesonet/ldmdata/gis/images/4326"
+# layer name -> archive template, realtime file, transparent indices
+PRODUCTS = {
+    "ridge::USCOMP-N0Q": (
+        f"{ARCHIVE}/uscomp/n0q_%Y%m%d%H%M.png",
+        f"{LDMDATA}/USCOMP/n0q_0.png",
+        [0],
+    ),
+    "ridge::USCOMP-N0R": (
+        f"{ARCHIVE}/uscomp/n0r_%Y%m%d%H%M.png",
+        f"{LDMDATA}/USCOMP/n0r_0.png",
+        [0],
+    ),
+}
+for _hr in [1, 24, 48, 72]:
+    PRODUCTS[f"mrms::P{_hr}H"] = (
+        f"{ARCHIVE}/mrms/p{_hr}h_%Y%m%d%H%M.png",
+        f"{LDMDATA}/mrms/p{_hr}h.png",
+        [0, 255],
+    )
+
+
+def get_realtime_valid(realtime_fn):
+    """Return the valid timestamp of the realtime product, if known."""
+    fn = realtime_fn[:-4] + ".json"
+    if not os.path.isfile(fn) or not os.path.isfile(realtime_fn):
+        return None
+    with open(fn, encoding="utf-8") as fh:
+        meta = json.load(fh)["meta"]
+    valid = meta.get("valid", meta.get("end_valid"))
+    if valid is None:
+        return None
+    return datetime.datetime.strptime(valid, "%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_path(path):
+    """Convert the PATH_INFO into (layer, tstamp, z, x, y).
+
+    Raises:
+      ValueError for anything we do not understand
+    """
+    tokens = path.strip("/").split("/")
+    if len(tokens) != 5 or not tokens[4].endswith(".png"):
+        raise ValueError("Path should be /1.0.0/layer/z/x/y.png")
+    layer, _, tstamp = tokens[1].rpartition("-")
+    if layer not in PRODUCTS:
+        raise ValueError(f"Unknown layer {layer}")
+    if tstamp != "0":
+        datetime.datetime.strptime(tstamp, "%Y%m%d%H%M")
+    z, x, y = int(tokens[2]), int(tokens[3]), int(tokens[4][:-4])
+    if z < 0 or z > 20 or not 0 <= x < 2**z or not 0 <= y < 2**z:
+        raise ValueError("Invalid tile address")
+    return layer, tstamp, z, x, y
+
+
+def get_source(layer, tstamp):
+    """Figure out the source raster for this layer and timestamp.
+
+    Returns:
+      (filename, immutable) with filename being None when not found and
+      immutable only True for the archive file
+    """
+    template, realtime_fn, _ = PRODUCTS[layer]
+    if tstamp == "0":
+        return realtime_fn if os.path.isfile(realtime_fn) else None, False
+    valid = datetime.datetime.strptime(tstamp, "%Y%m%d%H%M")
+    fn = valid.strftime(template)
+    if os.path.isfile(fn):
+        return fn, True
+    # A freshly landed product may not have reached the archive yet, the
+    # realtime file can be replaced at any time so is not immutable
+    if get_realtime_valid(realtime_fn) == valid:
+        return realtime_fn, False
+    return None, True
+
+
+def get_tilefn(layer, tstamp, z, x, y):
+    """Where this tile lives within the persistent tile store."""
+    return f"{TILE_DIR}/{layer.replace('::', '_')}/{tstamp}/{z}/{x}/{y}.png"
+
+
+def read_worldfile(fn):
+    """Return (dx, dy, west, north) edges from the world file."""
+    with open(fn, encoding="ascii") as fh:
+        vals = [float(x) for x in fh.read().split()]
+    dx, dy = vals[0], vals[3]
+    # world files reference the center of the upper left pixel
+    return dx, dy, vals[4] - dx / 2.0, vals[5] - dy / 2.0
+
+
+def cull_cache():
+    """Remove decoded rasters that are stale or beyond the size limit."""
+    entries = []
+    for entry in os.scandir(CACHE_DIR):
+        # Skip files being written by another process
+        if ".npy." in entry.name:
+            continue
+        try:
+            st = entry.stat()
+        except FileNotFoundError:
+            # Culled by another process
+            continue
+        entries.append((st.st_mtime, st.st_size, entry.path))
+    cutoff = datetime.datetime.now().timestamp() - CACHE_MAXAGE.total_seconds()
+    total = 0
+    # Most recently used first, readers holding a memory map are unaffected
+    for mtime, size, path in sorted(entries, reverse=True):
+        total += size
+        if mtime >= cutoff and total <= CACHE_MAXBYTES:
+            continue
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+@lru_cache(maxsize=16)
+def load_raster(fn, mtime_ns):
+    """Load the decoded raster as a memory map, decoding it when needed.
+
+    The mtime is part of the cache key, so updated realtime files get
+    picked up.
+    """
+    key = hashlib.md5(f"{fn}:{mtime_ns}".encode("utf-8")).hexdigest()
+    cachefn = f"{CACHE_DIR}/{key}.npy"
+    palfn = f"{CACHE_DIR}/{key}_pal.npy"
+    try:
+        # Mark as recently used for the cull
+        os.utime(cachefn)
+        data = np.load(cachefn, mmap_mode="r")
+        palette = np.load(palfn).tolist()
+    except FileNotFoundError:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with Image.open(fn) as img:
+            palette = img.getpalette()
+            np.save(f"{palfn}.{os.getpid()}.npy", np.array(palette))
+            np.save(f"{cachefn}.{os.getpid()}.npy", np.asarray(img))
+        os.rename(f"{palfn}.{os.getpid()}.npy", palfn)
+        os.rename(f"{cachefn}.{os.getpid()}.npy", cachefn)
+        data = np.load(cachefn, mmap_mode="r")
+        cull_cache()
+    wld = read_worldfile(fn[:-4] + ".wld")
+    return data, palette, wld
+
+
+@lru_cache(maxsize=4096)
+def col_index(z, x, west, dx, ncols):
+    """Source columns for the tile column, -1 when outside of the grid."""
+    px = (x * TILESIZE + np.arange(TILESIZE) + 0.5) / (TILESIZE * 2**z)
+    lon = px * 360.0 - 180.0
+    cols = np.floor((lon - west) / dx).astype(int)
+    cols[(cols < 0) | (cols >= ncols)] = -1
+    return cols
+
+
+@lru_cache(maxsize=4096)
+def row_index(z, y, north, dy, nrows):
+    """Source rows for the tile row, -1 when outside of the grid."""
+    py = (y * TILESIZE + np.arange(TILESIZE) + 0.5) / (TILESIZE * 2**z)
+    lat = np.degrees(np.arctan(np.sinh(math.pi * (1 - 2 * py))))
+    rows = np.floor((lat - north) / dy).astype(int)
+    rows[(rows < 0) | (rows >= nrows)] = -1
+    return rows
+
+
+def render_tile(data, palette, wld, transparent, z, x, y):
+    """Render the tile into PNG bytes."""
+    dx, dy, west, north = wld
+    rows = row_index(z, y, north, dy, data.shape[0])
+    cols = col_index(z, x, west, dx, data.shape[1])
+    tile = np.full((TILESIZE, TILESIZE), transparent[0], dtype=np.uint8)
+    rgood = rows >= 0
+    cgood = cols >= 0
+    if rgood.any() and cgood.any():
+        tile[np.ix_(rgood, cgood)] = data[np.ix_(rows[rgood], cols[cgood])]
+    png = Image.fromarray(tile)
+    png.putpalette(palette)
+    trns = bytearray([255] * 256)
+    for idx in transparent:
+        trns[idx] = 0
+    bio = BytesIO()
+    png.save(bio, format="png", transparency=bytes(trns))
+    return bio.getvalue()
+
+
+def get_tile(layer, tstamp, z, x, y):
+    """Get the tile, from the tile store when immutable.
+
+    Returns:
+      (PNG bytes or None when no source exists, immutable)
+    """
+    fn, immutable = get_source(layer, tstamp)
+    tilefn = get_tilefn(layer, tstamp, z, x, y)
+    if immutable and os.path.isfile(tilefn):
+        with open(tilefn, "rb") as fh:
+            return fh.read(), immutable
+    if fn is None:
+        return None, immutable
+    data, palette, wld = load_raster(fn, os.stat(fn).st_mtime_ns)
+    res = render_tile(data, palette, wld, PRODUCTS[layer][2], z, x, y)
+    if immutable:
+        os.makedirs(os.path.dirname(tilefn), exist_ok=True)
+        tmpfn = f"{tilefn}.{os.getpid()}"
+        with open(tmpfn, "wb") as fh:
+            fh.write(res)
+        os.rename(tmpfn, tilefn)
+    return res, immutable
+
+
+def application(environ, start_response):
+    """Go service."""
+    try:
+        layer, tstamp, z, x, y = parse_path(environ.get("PATH_INFO", ""))
+    except ValueError as exp:
+        start_response("400 Bad Request", [("Content-type", "text/plain")])
+        return [str(exp).encode("ascii")]
+    res, immutable = get_tile(layer, tstamp, z, x, y)
+    if res is None:
+        start_response("404 Not Found", [("Content-type", "text/plain")])
+        return [b"Source raster not found"]
+    if immutable:
+        cache_control = "public, max-age=31536000, immutable"
+    else:
+        cache_control = "public, max-age=300"
+    start_response(
+        "200 OK",
+        [("Content-type", "image/png"), ("Cache-Control", cache_control)],
+    )
+    return [res]
@@ -1,9 +1,9 @@
 """GeoJSON of a given IEM network code"""
 import datetime
-import json
 
+from iemweb.geojson import feature, feature_collection, respond
 from paste.request import parse_formvars
-from pyiem.util import get_dbconnc, html_escape
+from pyiem.util import get_dbconnc
 from pymemcache.client import Client
 
 
@@ -41,14 +41,7 @@ def run(network, only_online):
             (network,),
         )
 
-    res = {
-        "type": "FeatureCollection",
-        "features": [],
-        "generation_time": datetime.datetime.utcnow().strftime(
-            "%Y-%m-%dT%H:%M:%SZ"
-        ),
-        "count": cursor.rowcount,
-    }
+    features = []
     for row in cursor:
         ab = row["archive_begin"]
         ae = row["archive_end"]
@@ -56,11 +49,10 @@ def run(network, only_online):
             f"({'????' if ab is None else ab.year}-"
             f"{'Now' if ae is None else ae.year})"
         )
-        res["features"].append(
-            dict(
-                type="Feature",
-                id=row["id"],
-                properties=dict(
+        features.append(
+            feature(
+                row["id"],
+                dict(
                     elevation=row["elevation"],
                     sname=row["name"],
                     time_domain=time_domain,
@@ -79,33 +71,37 @@ def run(network, only_online):
                     sid=row["id"],
                     network=row["network"],
                 ),
-                geometry=json.loads(row["geojson"]),
+                row["geojson"],
             )
         )
     pgconn.close()
-    return json.dumps(res)
+    return feature_collection(
+        features,
+        generation_time=datetime.datetime.utcnow().strftime(
+            "%Y-%m-%dT%H:%M:%SZ"
+        ),
+        count=len(features),
+    )
 
 
 def application(environ, start_response):
     """Main Workflow"""
-    headers = [("Content-type", "application/vnd.geo+json")]
-
     form = parse_formvars(environ)
     cb = form.get("callback", None)
     network = form.get("network", "KCCI").replace(" ", "_")[:30]
     only_online = form.get("only_online", "0") == "1"
 
-    mckey = f"/geojson/network/{network}.geojson|{only_online}"
+    mckey = f"/geojson/network/{network}.geojson|{only_online}|gz"
     mc = Client("iem-memcached:11211")
-    res = mc.get(mckey)
-    if not res:
-        res = run(network, only_online)
-        mc.set(mckey, res, 86400 if network == "FPS" else 3600)
-    else:
-        res = res.decode("utf-8")
-    mc.close()
-    if cb is not None:
-        res = f"{html_escape(cb)}({res})"
-
-    start_response("200 OK", headers)
-    return [res.encode("ascii")]
+    try:
+        return respond(
+            environ,
+            start_response,
+            mc,
+            mckey,
+            lambda: run(network, only_online),
+            86400 if network == "FPS" else 3600,
+            cb=cb,
+        )
+    finally:
+        mc.close()
@@ -1,10 +1,10 @@
 """ Generate a GeoJSON of current storm based warnings """
 import datetime
-import json
 from zoneinfo import ZoneInfo
 
+from iemweb.geojson import feature, feature_collection, respond
 from paste.request import parse_formvars
-from pyiem.util import get_dbconnc, html_escape
+from pyiem.util import get_dbconnc
 from pymemcache.client import Client
 
 
@@ -37,12 +37,7 @@ def run(ts):
         (t0, utcnow),
     )
 
-    res = {
-        "type": "FeatureCollection",
-        "features": [],
-        "generation_time": utcnow.strftime("%Y-%m-%dT%H:%M:%SZ"),
-        "count": cursor.rowcount,
-    }
+    features = []
     for row in cursor:
         sid = (
             f"{row['wfo']}.{row['phenomena']}.{row['significance']}."
@@ -51,11 +46,10 @@ def run(ts):
         ets = row["utc_polygon_end"].strftime("%Y-%m-%dT%H:%M:%SZ")
         sts = row["utc_polygon_begin"].strftime("%Y-%m-%dT%H:%M:%SZ")
         sid += "." + sts
-        res["features"].append(
-            dict(
-                type="Feature",
-                id=sid,
-                properties=dict(
+        features.append(
+            feature(
+                sid,
+                dict(
                     status=row["status"],
                     phenomena=row["phenomena"],
                     significance=row["significance"],
@@ -65,32 +59,34 @@ def run(ts):
                     expire=ets,
                     hvtec_nwsli=row["hvtec_nwsli"],
                 ),
-                geometry=json.loads(row["geojson"]),
+                row["geojson"],
             )
         )
     pgconn.close()
-    return json.dumps(res)
+    return feature_collection(
+        features,
+        generation_time=utcnow.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        count=len(features),
+    )
 
 
 def application(environ, start_response):
     """Main Workflow"""
-    headers = [("Content-type", "application/vnd.geo+json")]
-
     form = parse_formvars(environ)
     cb = form.get("callback", None)
     ts = form.get("ts", "")[:24]
 
-    mckey = f"/geojson/sbw.geojson|{ts}"
+    mckey = f"/geojson/sbw.geojson|{ts}|gz"
     mc = Client("iem-memcached:11211")
-    res = mc.get(mckey)
-    if not res:
-        res = run(ts)
-        mc.set(mckey, res, 15 if ts == "" else 3600)
-    else:
-        res = res.decode("utf-8")
-    mc.close()
-    if cb is not None:
-        res = f"{html_escape(cb)}({res})"
-
-    start_response("200 OK", headers)
-    return [res.encode("ascii")]
+    try:
+        return respond(
+            environ,
+            start_response,
+            mc,
+            mckey,
+            lambda: run(ts),
+            15 if ts == "" else 3600,
+            cb=cb,
+        )
+    finally:
+        mc.close()
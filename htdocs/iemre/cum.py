@@ -6,6 +6,7 @@ import zipfile
 
 import numpy as np
 import shapefile
+from iemweb.iemrecum import GDD_BASES, GDD_CEILING, get_total
 from paste.request import parse_formvars
 from pyiem import iemre
 from pyiem.util import convert_value, get_dbconn, ncopen
@@ -29,22 +30,29 @@ def application(environ, start_response):
     offset1 = iemre.daily_offset(ts1)
 
     with ncopen(iemre.get_daily_ncname(ts0.year)) as nc:
-        # 2-D precipitation, inches
-        precip = np.sum(
-            nc.variables["p01d"][offset0:offset1, :, :] / 25.4, axis=0
-        )
+        # 2-D precipitation, inches, from the running total when available
+        precip = get_total(nc, "p01d_cum", offset0, offset1)
+        if precip is None:
+            precip = np.sum(
+                nc.variables["p01d"][offset0:offset1, :, :], axis=0
+            )
+        precip = precip / 25.4
 
         # GDD
-        H = convert_value(
-            nc.variables["high_tmpk"][offset0:offset1], "degK", "degF"
-        )
-        H = np.where(H < base, base, H)
-        H = np.where(H > ceil, ceil, H)
-        L = convert_value(
-            nc.variables["low_tmpk"][offset0:offset1], "degK", "degF"
-        )
-        L = np.where(L < base, base, L)
-        gdd = np.sum((H + L) / 2.0 - base, axis=0)
+        gdd = None
+        if ceil == GDD_CEILING and base in GDD_BASES:
+            gdd = get_total(nc, f"gdd{base}_cum", offset0, offset1)
+        if gdd is None:
+            H = convert_value(
+                nc.variables["high_tmpk"][offset0:offset1], "degK", "degF"
+            )
+            H = np.where(H < base, base, H)
+            H = np.where(H > ceil, ceil, H)
+            L = convert_value(
+                nc.variables["low_tmpk"][offset0:offset1], "degK", "degF"
+            )
+            L = np.where(L < base, base, L)
+            gdd = np.sum((H + L) / 2.0 - base, axis=0)
 
     if fmt == "json":
         # For example: 19013
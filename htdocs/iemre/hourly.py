@@ -11,6 +11,18 @@ from pyiem.util import convert_value, ncopen, utc
 from pymemcache.client import Client
 
 ISO = "%Y-%m-%dT%H:%MZ"
+# Longest period served by a request
+MAX_DAYS = 366
+# netCDF variable name -> (output label, rounding precision)
+VARS = {
+    "skyc": ("skyc_%", 1),
+    "tmpk": ("air_temp_f", 1),
+    "dwpk": ("dew_point_f", 1),
+    "soil4t": ("soil4t_f", 1),
+    "uwnd": ("uwnd_mps", 2),
+    "vwnd": ("vwnd_mps", 2),
+    "p01m": ("hourly_precip_in", 2),
+}
 
 
 def myrounder(val, precision):
@@ -21,73 +33,87 @@ def myrounder(val, precision):
 
 
 def get_timerange(form):
-    """Figure out what period to get data for."""
+    """Figure out what period to get data for.
+
+    The period runs from local midnight on ``date`` through 11 PM on
+    ``edate`` (default ``date``), limited to MAX_DAYS.
+    """
     ts = datetime.datetime.strptime(form.get("date", "2019-03-01"), "%Y-%m-%d")
-    # Construct a CDT/CST Midnight to 11 PM period
-    # This logic does not properly handle spring/fall time changes as it always
-    # returns a 24 hour period.
-    ts = utc(ts.year, ts.month, ts.day, 12).astimezone(
-        ZoneInfo("America/Chicago")
+    ts2 = datetime.datetime.strptime(
+        form.get("edate", ts.strftime("%Y-%m-%d")), "%Y-%m-%d"
+    )
+    if ts2 < ts:
+        ts2 = ts
+    ts2 = min(ts2, ts + datetime.timedelta(days=MAX_DAYS - 1))
+    tzinfo = ZoneInfo("America/Chicago")
+    return (
+        datetime.datetime(ts.year, ts.month, ts.day, tzinfo=tzinfo),
+        datetime.datetime(ts2.year, ts2.month, ts2.day, 23, tzinfo=tzinfo),
     )
-    return ts.replace(hour=0), ts.replace(hour=23)
+
+
+def read_slabs(times, i, j):
+    """Read each variable for the grid cell and UTC times in one go per year.
+
+    Returns:
+      dict of variable name to array of values (NaN when missing) or None
+      when none of the yearly files exist
+    """
+    data = {vname: np.full(len(times), np.nan) for vname in VARS}
+    found = False
+    # The local period can span the UTC new year and so two files
+    years = sorted({now.year for now in times})
+    for year in years:
+        idx = [pos for pos, now in enumerate(times) if now.year == year]
+        fn = iemre.get_hourly_ncname(year)
+        if not os.path.isfile(fn):
+            continue
+        found = True
+        offset0 = iemre.hourly_offset(times[idx[0]])
+        offset1 = iemre.hourly_offset(times[idx[-1]]) + 1
+        with ncopen(fn) as nc:
+            for vname in VARS:
+                vals = nc.variables[vname][offset0:offset1, j, i]
+                data[vname][idx[0] : idx[-1] + 1] = np.ma.filled(
+                    np.ma.asarray(vals, dtype=float), np.nan
+                )
+    return data if found else None
 
 
 def workflow(sts, ets, i, j):
     """Return a dict of our data."""
     res = {"data": [], "generated_at": utc().strftime(ISO)}
 
-    # BUG here for Dec 31.
-    fn = iemre.get_hourly_ncname(sts.year)
-
-    if not os.path.isfile(fn):
-        return res
-
     if i is None or j is None:
         return {"error": "Coordinates outside of domain"}
 
+    # Work in UTC so that the hours of time change days are right
+    sts = sts.astimezone(ZoneInfo("UTC"))
+    ets = ets.astimezone(ZoneInfo("UTC"))
+    hours = int((ets - sts).total_seconds() // 3600) + 1
+    times = [sts + datetime.timedelta(hours=hr) for hr in range(hours)]
+    data = read_slabs(times, i, j)
+    if data is None:
+        return res
+
     res["grid_i"] = int(i)
     res["grid_j"] = int(j)
-    with ncopen(fn) as nc:
-        now = sts
-        while now <= ets:
-            offset = iemre.hourly_offset(now)
-            res["data"].append(
-                {
-                    "valid_utc": now.astimezone(ZoneInfo("UTC")).strftime(ISO),
-                    "valid_local": now.strftime(ISO[:-1]),
-                    "skyc_%": myrounder(nc.variables["skyc"][offset, j, i], 1),
-                    "air_temp_f": myrounder(
-                        convert_value(
-                            nc.variables["tmpk"][offset, j, i], "degK", "degF"
-                        ),
-                        1,
-                    ),
-                    "dew_point_f": myrounder(
-                        convert_value(
-                            nc.variables["dwpk"][offset, j, i], "degK", "degF"
-                        ),
-                        1,
-                    ),
-                    "soil4t_f": myrounder(
-                        convert_value(
-                            nc.variables["soil4t"][offset, j, i],
-                            "degK",
-                            "degF",
-                        ),
-                        1,
-                    ),
-                    "uwnd_mps": myrounder(
-                        nc.variables["uwnd"][offset, j, i], 2
-                    ),
-                    "vwnd_mps": myrounder(
-                        nc.variables["vwnd"][offset, j, i], 2
-                    ),
-                    "hourly_precip_in": myrounder(
-                        nc.variables["p01m"][offset, j, i] / 25.4, 2
-                    ),
-                }
-            )
-            now += datetime.timedelta(hours=1)
+    for vname in ["tmpk", "dwpk", "soil4t"]:
+        data[vname] = convert_value(data[vname], "degK", "degF")
+    data["p01m"] = data["p01m"] / 25.4
+    columns = [
+        [myrounder(val, precision) for val in data[vname]]
+        for vname, (_, precision) in VARS.items()
+    ]
+    localtz = ZoneInfo("America/Chicago")
+    for pos, now in enumerate(times):
+        row = {
+            "valid_utc": now.strftime(ISO),
+            "valid_local": now.astimezone(localtz).strftime(ISO[:-1]),
+        }
+        for (label, _), column in zip(VARS.values(), columns):
+            row[label] = column[pos]
+        res["data"].append(row)
     return res
 
 
@@ -103,7 +129,7 @@ def application(environ, start_response):
     start_response("200 OK", headers)
 
     i, j = iemre.find_ij(lon, lat)
-    mckey = f"iemre/hourly/{sts:%Y%m%d}/{i}/{j}"
+    mckey = f"iemre/hourly/{sts:%Y%m%d}/{ets:%Y%m%d}/{i}/{j}"
 
     mc = Client("iem-memcached:11211")
     res = mc.get(mckey)
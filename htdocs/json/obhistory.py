@@ -4,6 +4,7 @@ import json
 import os
 
 from dateutil.parser import parse
+from iemweb.localday import get_station_tzname, local_day_bounds
 from pandas.io.sql import read_sql
 from paste.request import parse_formvars
 from pyiem.reference import IEMVARS
@@ -11,7 +12,7 @@ from pyiem.util import get_sqlalchemy_conn, html_escape
 from pymemcache.client import Client
 
 
-def do_today(table, station, network, date):
+def do_today(table, station, network, tzname, date):
     """Our backend is current_log"""
     cols = ["local_valid", "utc_valid", "tmpf", "sknt", "gust", "drct"]
     table["fields"] = [IEMVARS[col] for col in cols]
@@ -19,22 +20,22 @@ def do_today(table, station, network, date):
         df = read_sql(
             """
             select
-            to_char(valid at time zone tzname,
+            to_char(valid at time zone %s,
                     'YYYY-MM-DDThh24:MI:SS') as local_valid,
             to_char(valid at time zone 'UTC',
                     'YYYY-MM-DDThh24:MI:SSZ') as utc_valid,
             tmpf, sknt, gust, drct from current_log c JOIN stations t
-            on (c.iemid = t.iemid) WHERE date(valid at time zone tzname) = %s
+            on (c.iemid = t.iemid) WHERE valid >= %s and valid < %s
             and t.id = %s and t.network = %s ORDER by local_valid
         """,
             conn,
-            params=(date, station, network),
+            params=(tzname, *local_day_bounds(tzname, date), station, network),
             index_col=None,
         )
     table["rows"] = [row for row in df.itertuples(index=False)]
 
 
-def do_asos(table, station, _network, date):
+def do_asos(table, station, _network, tzname, date):
     """Our backend is ASOS"""
     cols = ["local_valid", "utc_valid", "tmpf", "sknt", "gust", "drct"]
     table["fields"] = [IEMVARS[col] for col in cols]
@@ -42,16 +43,15 @@ def do_asos(table, station, _network, date):
         df = read_sql(
             """
             select
-            to_char(valid at time zone tzname,
+            to_char(valid at time zone %s,
                     'YYYY-MM-DDThh24:MI:SS') as local_valid,
             to_char(valid at time zone 'UTC',
                     'YYYY-MM-DDThh24:MI:SSZ') as utc_valid,
-            tmpf, sknt, gust, drct from alldata a JOIN stations t
-            on (a.station = t.id) WHERE date(valid at time zone tzname) = %s
-            and station = %s ORDER by local_valid
+            tmpf, sknt, gust, drct from alldata WHERE
+            valid >= %s and valid < %s and station = %s ORDER by local_valid
         """,
             conn,
-            params=(date, station),
+            params=(tzname, *local_day_bounds(tzname, date), station),
             index_col=None,
         )
     table["rows"] = [row for row in df.itertuples(index=False)]
@@ -61,10 +61,13 @@ def workflow(station, network, date):
     """Go get the dictionary of data we need and deserve"""
     date = parse(date).date()
     table = {"fields": [], "rows": []}
+    tzname = get_station_tzname(station, network)
+    if tzname is None:
+        return json.dumps(table)
     if date == datetime.date.today():
-        do_today(table, station, network, date)
+        do_today(table, station, network, tzname, date)
     elif network.find("ASOS") > -1:
-        do_asos(table, station, network, date)
+        do_asos(table, station, network, tzname, date)
 
     return json.dumps(table)
 
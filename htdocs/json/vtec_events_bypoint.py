@@ -4,6 +4,7 @@ import json
 from io import BytesIO, StringIO
 
 import pandas as pd
+from iemweb.ugclookup import get_ugc_gids
 from paste.request import parse_formvars
 from pyiem.nws.vtec import VTEC_PHENOMENA, VTEC_SIGNIFICANCE, get_ps_string
 from pyiem.util import get_sqlalchemy_conn, html_escape
@@ -26,14 +27,11 @@ def get_df(lon, lat, sdate, edate):
       wfo (str): 3 character WFO identifier
       year (int): year to run for
     """
-    giswkt = f"POINT({lon} {lat})"
+    # The spatial step is answered by the in-process UGC lookup
+    gids = get_ugc_gids(lon, lat)
     with get_sqlalchemy_conn("postgis") as conn:
         df = pd.read_sql(
             """
-        WITH myugcs as (
-            select gid from ugcs where
-            ST_Contains(geom, ST_SetSRID(ST_GeomFromEWKT(%s),4326))
-        )
         SELECT
         to_char(issue at time zone 'UTC', 'YYYY-MM-DDThh24:MI:SSZ')
             as iso_issued,
@@ -42,11 +40,11 @@ def get_df(lon, lat, sdate, edate):
         to_char(issue at time zone 'UTC', 'YYYY-MM-DD hh24:MI') as issued,
         to_char(expire at time zone 'UTC', 'YYYY-MM-DD hh24:MI') as expired,
         eventid, phenomena, significance, wfo, hvtec_nwsli, w.ugc
-        from warnings w JOIN myugcs u on (w.gid = u.gid) WHERE
+        from warnings w WHERE gid = ANY(%s) and
         issue > %s and issue < %s ORDER by issue ASC
         """,
             conn,
-            params=(giswkt, sdate, edate),
+            params=(gids, sdate, edate),
         )
     if df.empty:
         return df
@@ -1,13 +1,16 @@
 """Our mod_wsgi frontend to autoplot generation"""
 # pylint: disable=abstract-class-instantiated
+import hashlib
 import importlib.machinery
 import importlib.util
 import json
 import os
+import pickle
 import sys
 import syslog
 import tempfile
 import traceback
+import zlib
 from datetime import timezone
 from io import BytesIO
 from zoneinfo import ZoneInfo
@@ -31,6 +34,12 @@ HTTP200 = "200 OK"
 HTTP400 = "400 Bad Request"
 HTTP500 = "500 Internal Server Error"
 BASEDIR, WSGI_FILENAME = os.path.split(__file__)
+# Formats that only need the dataframe or report returned by plotter
+DATA_FORMATS = ["csv", "xlsx", "txt"]
+# Parameters that only change how the plot looks, not its data
+PRESENTATION_KEYS = ["dpi", "cmap", "_r"]
+# memcache's object size limit is 10 MB
+MAX_CACHE_SIZE = 9.5 * 1024 * 1024
 
 
 def format_geojson_response(gdf, defaultcol):
@@ -122,8 +131,8 @@ def handle_error(exp, fmt, uri):
     return str(exp)
 
 
-def get_res_by_fmt(p, fmt, fdict):
-    """Do the work of actually calling things"""
+def load_module(p):
+    """Load the autoplot script module."""
     suffix = ""
     if p >= 200:
         suffix = "200"
@@ -134,8 +143,70 @@ def get_res_by_fmt(p, fmt, fdict):
     spec = importlib.util.spec_from_loader(loader.name, loader)
     mod = importlib.util.module_from_spec(spec)
     loader.exec_module(mod)
+    return mod
+
+
+def get_data_mckey(scriptnum, fdict):
+    """Figure out the memcache key for the plotter's data result.
+
+    The key ignores the format and presentation only parameters, so that
+    renders in different formats of the same request share it.
+    """
+    vals = []
+    for key in sorted(fdict):
+        if key in PRESENTATION_KEYS:
+            continue
+        if not key.startswith("_") or key == "_":
+            vals.append(f"{key}:{fdict[key]}")
+    digest = hashlib.sha1("::".join(vals).encode("utf-8")).hexdigest()
+    return f"/plotting/auto/data/{scriptnum}/{digest}"
+
+
+def get_cached_data(mc, mckey):
+    """Return the cached (dataframe, report) or None."""
+    try:
+        raw = mc.get(mckey)
+        if raw is None:
+            return None
+        return pickle.loads(zlib.decompress(raw))
+    except Exception as exp:
+        sys.stderr.write(f"Exception while reading key: {mckey}\n{exp}\n")
+        return None
+
+
+def set_cached_data(mc, mckey, df, report, dur):
+    """Store the dataframe and report for renders in other formats."""
+    if df is None and report is None:
+        return
+    try:
+        raw = zlib.compress(
+            pickle.dumps((df, report), protocol=pickle.HIGHEST_PROTOCOL)
+        )
+        if len(raw) < MAX_CACHE_SIZE:
+            mc.set(mckey, raw, dur)
+    except Exception as exp:
+        sys.stderr.write(f"Exception while writting key: {mckey}\n{exp}\n")
+
+
+def get_res_by_fmt(p, fmt, fdict, mod=None, mc=None):
+    """Do the work of actually calling things.
+
+    Args:
+      mod (module, optional): already loaded script module to reuse
+      mc (pymemcache.Client, optional): when provided, the plotter's
+        dataframe and report are cached for and reused by data formats
+    """
+    if mod is None:
+        mod = load_module(p)
 
     meta = mod.get_description()
+    datakey = None
+    if mc is not None and fmt not in ["js", "geojson"]:
+        datakey = get_data_mckey(p, fdict)
+        if fmt in DATA_FORMATS and fdict.get("_cb") is None:
+            cached = get_cached_data(mc, datakey)
+            if cached is not None:
+                return [None, cached[0], cached[1]], meta
     # Allow returning of javascript as a string
     if fmt == "js":
         res = mod.highcharts(fdict)
@@ -148,6 +219,10 @@ def get_res_by_fmt(p, fmt, fdict):
         res = [res, None, None]
     if len(res) == 2:
         res = [res[0], res[1], None]
+    if datakey is not None:
+        set_cached_data(
+            mc, datakey, res[1], res[2], int(meta.get("cache", 43200))
+        )
 
     return res, meta
 
@@ -207,7 +282,7 @@ def workflow(mc, environ, form, fmt):
     start_time = utc()
     # res should be a 3 length tuple
     try:
-        res, meta = get_res_by_fmt(scriptnum, fmt, fdict)
+        res, meta = get_res_by_fmt(scriptnum, fmt, fdict, mc=mc)
     except NoDataFound as exp:
         return HTTP400, handle_error(exp, fmt, environ.get("REQUEST_URI"))
     except Exception as exp:
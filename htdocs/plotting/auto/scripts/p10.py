@@ -9,9 +9,10 @@ import datetime
 
 import numpy as np
 import pandas as pd
+from iemweb.climodat import load
 from pyiem.exceptions import NoDataFound
 from pyiem.plot import figure_axes
-from pyiem.util import get_autoplot_context, get_dbconnc
+from pyiem.util import get_autoplot_context
 from scipy import stats
 
 PDICT = {
@@ -67,7 +68,6 @@ def get_description():
 
 def plotter(fdict):
     """Go"""
-    pgconn, ccursor = get_dbconnc("coop")
     ctx = get_autoplot_context(fdict, get_description())
     station = ctx["station"]
     threshold = ctx["threshold"]
@@ -75,66 +75,44 @@ def plotter(fdict):
     varname = ctx["varname"]
     startyear = ctx["year"]
 
-    if direction == "below":
-        sql = f"""select year,
-        max(case when {varname}::numeric < %s and month < 7
-            then extract(doy from day) else 0 end) as spring,
-        max(case when {varname}::numeric < %s and month < 7
-            then day else null end) as spring_date,
-        min(case when {varname}::numeric < %s and month > 6
-            then extract(doy from day) else 388 end) as fall,
-        min(case when {varname}::numeric < %s and month > 6
-            then day else null end) as fall_date
-        from alldata where station = %s
-        GROUP by year ORDER by year ASC"""
-    elif direction == "above":
-        sql = f"""select year,
-             min(case when {varname}::numeric >= %s and month < 7
-                 then extract(doy from day) else 183 end) as spring,
-             min(case when {varname}::numeric >= %s and month < 7
-                 then day else null end) as spring_date,
-             max(case when {varname}::numeric >= %s and month > 6
-                 then extract(doy from day) else 183 end) as fall,
-             max(case when {varname}::numeric >= %s and month > 6
-                 then day else null end) as fall_date
-            from alldata where station = %s
-            GROUP by year ORDER by year ASC"""
-    else:  # above2
-        sql = f"""select year,
-             max(case when {varname}::numeric >= %s and month < 7
-                 then extract(doy from day) else 0 end) as spring,
-             max(case when {varname}::numeric >= %s and month < 7
-                 then day else null end) as spring_date,
-             min(case when {varname}::numeric >= %s and month > 6
-                 then extract(doy from day) else 388 end) as fall,
-             min(case when {varname}::numeric >= %s and month > 6
-                 then day else null end) as fall_date
-            from alldata where station = %s
-            GROUP by year ORDER by year ASC"""
-
-    ccursor.execute(sql, (threshold, threshold, threshold, threshold, station))
-    if ccursor.rowcount == 0:
-        pgconn.close()
+    df = load(station, [varname])
+    if df.empty:
         raise NoDataFound("No Data Found.")
-    rows = []
-    for row in ccursor:
-        if row["year"] < startyear:
-            continue
-        if row["fall"] > 366:
-            continue
-        if row["fall"] == 183 and row["spring"] == 183:
-            continue
-        rows.append(
-            dict(
-                year=row["year"],
-                spring=row["spring"],
-                fall=row["fall"],
-                spring_date=row["spring_date"],
-                fall_date=row["fall_date"],
-            )
+    if direction == "below":
+        hit = df[varname] < threshold
+    else:
+        hit = df[varname] >= threshold
+    spring = hit & (df["month"] < 7)
+    fall = hit & (df["month"] > 6)
+    gb = df.assign(
+        spring=df["doy"].where(spring),
+        spring_date=df["day"].where(spring),
+        fall=df["doy"].where(fall),
+        fall_date=df["day"].where(fall),
+    ).groupby("year")
+    if direction == "above":
+        df = pd.DataFrame(
+            {
+                "spring": gb["spring"].min().fillna(183),
+                "spring_date": gb["spring_date"].min(),
+                "fall": gb["fall"].max().fillna(183),
+                "fall_date": gb["fall_date"].max(),
+            }
+        )
+    else:
+        df = pd.DataFrame(
+            {
+                "spring": gb["spring"].max().fillna(0),
+                "spring_date": gb["spring_date"].max(),
+                "fall": gb["fall"].min().fillna(388),
+                "fall_date": gb["fall_date"].min(),
+            }
         )
-    pgconn.close()
-    df = pd.DataFrame(rows)
+    df = df[
+        (df.index >= startyear)
+        & (df["fall"] <= 366)
+        & ~((df["fall"] == 183) & (df["spring"] == 183))
+    ].reset_index()
     if df.empty:
         raise NoDataFound("No data found for query.")
     df["season"] = df["fall"] - df["spring"]
@@ -153,7 +131,7 @@ def plotter(fdict):
         "   YEAR MONTH DAY DOY         MONTH DAY DOY   LENGTH OF SEASON\n"
     )
     for _, row in df.iterrows():
-        if row["spring_date"] is None or row["fall_date"] is None:
+        if pd.isna(row["spring_date"]) or pd.isna(row["fall_date"]):
             continue
         res += (
             f"{row['year']:7.0f}{row['spring_date'].month:4.0f}"
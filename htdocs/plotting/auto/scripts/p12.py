@@ -11,9 +11,10 @@ import datetime
 
 import numpy as np
 import pandas as pd
+from iemweb.climodat import load
 from pyiem.exceptions import NoDataFound
 from pyiem.plot import figure_axes
-from pyiem.util import get_autoplot_context, get_sqlalchemy_conn
+from pyiem.util import get_autoplot_context
 
 PDICT = {
     "last_high_above": "Last Date At or Above (High Temperature)",
@@ -107,38 +108,29 @@ def plotter(fdict):
     (extrenum, varname, direction) = ctx["which"].split("_")
     year = ctx["year"]
 
-    op = "%s %s" % (varname, ">=" if direction == "above" else "<")
-    with get_sqlalchemy_conn("coop") as conn:
-        df = pd.read_sql(
-            f"""
-            with data as (
-                SELECT extract(year from day + '%s months'::interval)
-                    as season,
-                high, low, day from alldata WHERE station = %s
-                and day >= '1893-01-01'),
-            agg1 as (
-                SELECT season - %s as season,
-                count(*) as obs,
-                min(case when {op} %s then day else null end) as nday,
-                max(case when {op} %s then day else null end) as xday,
-                sum(case when {op} %s then 1 else 0 end) as count
-                from data GROUP by season)
-        SELECT season::int, count, obs, nday,
-        extract(doy from nday) as nday_doy,
-        xday, extract(doy from xday) as xday_doy from agg1
-        ORDER by season ASC
-        """,
-            conn,
-            params=(
-                6 if season == "winter" else 0,
-                station,
-                1 if season == "winter" else 0,
-                threshold,
-                threshold,
-                threshold,
-            ),
-            index_col="season",
-        )
+    df = load(station, [varname])
+    df = df[df["day"] >= pd.Timestamp("1893-01-01")]
+    if season == "winter":
+        df = df.assign(season=df["year"] - (df["month"] < 7).astype(int))
+    else:
+        df = df.assign(season=df["year"])
+    if direction == "above":
+        hit = df[varname] >= threshold
+    else:
+        hit = df[varname] < threshold
+    gb = df.assign(hit=hit.astype(int), hday=df["day"].where(hit)).groupby(
+        "season"
+    )
+    df = pd.DataFrame(
+        {
+            "count": gb["hit"].sum(),
+            "obs": gb["day"].count(),
+            "nday": gb["hday"].min(),
+            "xday": gb["hday"].max(),
+        }
+    )
+    df["nday_doy"] = df["nday"].dt.dayofyear
+    df["xday_doy"] = df["xday"].dt.dayofyear
     # We need to do some magic to julian dates straight
     if season == "winter":
         # drop the first row
@@ -8,9 +8,10 @@ import datetime
 import matplotlib.patheffects as PathEffects
 import numpy as np
 import pandas as pd
+from iemweb.climodat import load
 from pyiem.exceptions import NoDataFound
 from pyiem.plot import figure_axes
-from pyiem.util import get_autoplot_context, get_sqlalchemy_conn
+from pyiem.util import get_autoplot_context
 
 PDICT = {"high": "High Temperature", "low": "Low Temperature"}
 
@@ -51,27 +52,20 @@ def plotter(fdict):
     varname = ctx["varname"]
     year = ctx["year"]
 
-    with get_sqlalchemy_conn("coop") as conn:
-        df = pd.read_sql(
-            """
-        with obs as
-        (select month, year, high, lag(high) OVER (ORDER by day ASC) as lhigh,
-        low, lag(low) OVER (ORDER by day ASC) as llow
-        from alldata where station = %s)
-
-        SELECT year, month,
-        sum(case when high > lhigh then 1 else 0 end)::numeric as high_greater,
-        sum(case when high = lhigh then 1 else 0 end)::numeric as high_unch,
-        sum(case when high < lhigh then 1 else 0 end)::numeric as high_lower,
-        sum(case when low > llow then 1 else 0 end)::numeric as low_greater,
-        sum(case when low = llow then 1 else 0 end)::numeric as low_unch,
-        sum(case when low < llow then 1 else 0 end)::numeric as low_lower
-        from obs GROUP by year, month ORDER by year, month
-        """,
-            conn,
-            params=(station,),
-            index_col=None,
-        )
+    obs = load(station, ["high", "low"])
+    data = {"year": obs["year"], "month": obs["month"]}
+    for col in ["high", "low"]:
+        change = obs[col] - obs[col].shift(1)
+        data[f"{col}_greater"] = change > 0
+        data[f"{col}_unch"] = change == 0
+        data[f"{col}_lower"] = change < 0
+    df = (
+        pd.DataFrame(data)
+        .groupby(["year", "month"])
+        .sum()
+        .astype(float)
+        .reset_index()
+    )
     gdf = df.groupby("month").sum()
     gyear = df[df["year"] == year].groupby("month").sum()
     if gyear.empty or gdf.empty:
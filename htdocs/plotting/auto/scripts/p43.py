@@ -8,12 +8,13 @@ from zoneinfo import ZoneInfo
 
 import matplotlib.dates as mdates
 import pandas as pd
+from iemweb.localday import local_day_bounds
 from matplotlib import ticker
 from metpy.units import units
 from pyiem.exceptions import NoDataFound
 from pyiem.plot import figure
 from pyiem.plot.use_agg import plt
-from pyiem.util import get_autoplot_context, get_sqlalchemy_conn, utc
+from pyiem.util import get_autoplot_context, get_sqlalchemy_conn
 
 PDICT = {
     "default": "Temperatures | Winds | Clouds + Vis",
@@ -97,12 +98,10 @@ def get_data(network, station, tzname, sdate):
             )
         return df
 
-    sts = utc(2018)
-    sts = sts.astimezone(ZoneInfo(tzname))
-    sts = sts.replace(
-        year=sdate.year, month=sdate.month, day=sdate.day, hour=0, minute=0
+    # Three local days, which are not always 72 hours
+    sts, ets = local_day_bounds(
+        tzname, sdate, sdate + datetime.timedelta(days=2)
     )
-    ets = sts + datetime.timedelta(hours=72)
     if network.endswith("ASOS"):
         with get_sqlalchemy_conn("asos") as conn:
             df = pd.read_sql(
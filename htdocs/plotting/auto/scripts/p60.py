@@ -15,6 +15,7 @@ import datetime
 import matplotlib.colors as mpcolors
 import numpy as np
 import pandas as pd
+from iemweb.localday import local_day_bounds
 from pyiem.exceptions import NoDataFound
 from pyiem.plot import figure_axes, get_cmap, pretty_bins
 from pyiem.util import get_autoplot_context, get_sqlalchemy_conn
@@ -116,12 +117,14 @@ def get_df(ctx):
     if station not in ctx["_nt"].sts:
         raise NoDataFound("Unknown station metadata.")
     tzname = ctx["_nt"].sts[station]["tzname"]
+    params = {"tzname": tzname, "station": station, "thres": threshold}
+    # Compare against UTC bounds so that the valid index gets used
     if ctx.get("sdate"):
-        timelimiter += (
-            f" and valid at time zone '{tzname}' >= '{ctx['sdate']}'"
-        )
+        params["sts"] = local_day_bounds(tzname, ctx["sdate"])[0]
+        timelimiter += " and valid >= :sts"
     if ctx.get("edate"):
-        timelimiter += f" and valid at time zone '{tzname}' < '{ctx['edate']}'"
+        params["ets"] = local_day_bounds(tzname, ctx["edate"])[0]
+        timelimiter += " and valid < :ets"
     with get_sqlalchemy_conn("asos") as conn:
         df = pd.read_sql(
             text(
@@ -145,7 +148,7 @@ def get_df(ctx):
             """
             ),
             conn,
-            params={"tzname": tzname, "station": station, "thres": threshold},
+            params=params,
             index_col=None,
         )
     if df.empty:
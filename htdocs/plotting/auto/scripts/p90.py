@@ -87,8 +87,17 @@ from zoneinfo import ZoneInfo
 
 import numpy as np
 import pandas as pd
-from affine import Affine
-from geopandas import read_postgis
+from iemweb.sbwraster import (
+    accumulate_counts,
+    accumulate_latest,
+    build_store,
+    footprint_event,
+    is_complete,
+    load_years,
+    select_runs,
+    window_centers,
+    window_for_bounds,
+)
 from pyiem.exceptions import NoDataFound
 from pyiem.nws import vtec
 from pyiem.plot import get_cmap
@@ -100,7 +109,6 @@ from pyiem.util import (
     get_sqlalchemy_conn,
     utc,
 )
-from rasterstats import zonal_stats
 
 PDICT = {"cwa": "Plot by NWS Forecast Office", "state": "Plot by State"}
 PDICT2 = {
@@ -244,9 +252,38 @@ def get_description():
     return desc
 
 
+def load_footprints(phenomena, significance, wfo, sts, ets, bounds):
+    """Get the footprints from the store, or the database when incomplete."""
+    years = range(sts.year, ets.year + 1)
+    if all(is_complete(year) for year in years):
+        return load_years(years, phenomena, significance)
+    wfolimiter = ""
+    params = [phenomena, significance, *bounds, sts, ets]
+    if wfo is not None:
+        wfolimiter = " and wfo = %s "
+        params.append(wfo)
+    pgconn = get_dbconn("postgis")
+    cursor = pgconn.cursor()
+    cursor.execute(
+        f"""
+        SELECT wfo, eventid, extract(epoch from issue)::bigint,
+        ST_AsBinary(ST_ForceRHR(ST_Buffer(geom, 0.0005))) from sbw
+        WHERE phenomena = %s and significance = %s and status = 'NEW'
+        and ST_Within(geom, ST_MakeEnvelope(%s, %s, %s, %s, 4326))
+        and ST_IsValid(geom) and issue >= %s and issue <= %s {wfolimiter}
+        ORDER by issue ASC
+        """,
+        params,
+    )
+    events = [footprint_event(*row) for row in cursor]
+    pgconn.close()
+    if not events:
+        return None
+    return build_store(events)
+
+
 def do_polygon(ctx):
     """polygon workflow"""
-    pgconn = get_dbconn("postgis")
     varname = ctx["v"]
     station = ctx["station"][:4]
     state = ctx["state"]
@@ -272,107 +309,54 @@ def do_polygon(ctx):
     else:
         sts = utc(year, 1, 1)
         ets = utc(year2, 12, 31, 23, 59)
-    daylimiter = ""
-    if varname.startswith("period"):
-        if sdate.strftime("%m%d") > edate.strftime("%m%d"):
-            daylimiter = (
-                f"(to_char(issue, 'mmdd') >= '{sdate:%m%d}' or "
-                f"to_char(issue, 'mmdd') < '{edate:%m%d}') and "
-            )
-            (sdate, edate) = (edate, sdate)
-        else:
-            daylimiter = (
-                f"to_char(issue, 'mmdd') >= '{sdate:%m%d}' and "
-                f"to_char(issue, 'mmdd') < '{edate:%m%d}' and "
-            )
     # We need to figure out how to get the warnings either by state or by wfo
     if t == "cwa":
         (west, south, east, north) = wfo_bounds[station]
     else:
         (west, south, east, north) = state_bounds[state]
-    # buffer by 5 degrees so to hopefully get all polys
+    # buffer by 2 degrees so to hopefully get all polys
     (west, south) = [x - 2 for x in (west, south)]
     (east, north) = [x + 2 for x in (east, north)]
-    # create grids
-    griddelta = 0.01
-    lons = np.arange(west, east, griddelta)
-    lats = np.arange(south, north, griddelta)
-    YSZ = len(lats)
-    XSZ = len(lons)
-    lons, lats = np.meshgrid(lons, lats)
-    affine = Affine(griddelta, 0.0, west, 0.0, 0 - griddelta, north)
-    ones = np.ones((int(YSZ), int(XSZ)))
-    counts = np.zeros((int(YSZ), int(XSZ)))
-    wfolimiter = ""
-    if ctx["t"] == "cwa":
-        wfolimiter = f" wfo = '{station}' and "
-    # do arbitrary buffer to prevent segfaults?
-    giswkt = "SRID=4326;POLYGON((%s %s, %s %s, %s %s, %s %s, %s %s))" % (
-        west,
-        south,
-        west,
-        north,
-        east,
-        north,
-        east,
-        south,
-        west,
-        south,
-    )
-    df = read_postgis(
-        f"""
-    SELECT ST_Forcerhr(ST_Buffer(geom, 0.0005)) as geom, issue, expire,
-    extract(epoch from %s::timestamptz - issue) / 86400. as days
-    from sbw where {wfolimiter} {daylimiter}
-    phenomena = %s and status = 'NEW' and significance = %s
-    and ST_Within(geom, ST_GeomFromEWKT(%s)) and ST_IsValid(geom)
-    and issue >= %s and issue <= %s ORDER by issue ASC
-    """,
-        pgconn,
-        params=(
-            ets,
-            phenomena,
-            significance,
-            giswkt,
-            sts,
-            ets,
-        ),
-        geom_col="geom",
-        index_col=None,
+    window = window_for_bounds(west, south, east, north)
+    # Footprints are pre-rasterized onto a fixed 0.01 degree grid
+    store = load_footprints(
+        phenomena,
+        significance,
+        station if t == "cwa" else None,
+        sts,
+        ets,
+        (west, south, east, north),
     )
-    if df.empty:
+    if store is None:
         raise NoDataFound("No data found for query.")
-    zs = zonal_stats(
-        df["geom"],
-        ones,
-        affine=affine,
-        nodata=-1,
-        all_touched=True,
-        raster_out=True,
-    )
-    for i, z in enumerate(zs):
-        aff = z["mini_raster_affine"]
-        mywest = aff.c
-        mynorth = aff.f
-        raster = np.flipud(z["mini_raster_array"])
-        x0 = int((mywest - west) / griddelta)
-        y1 = int((mynorth - south) / griddelta)
-        dy, dx = np.shape(raster)
-        x1 = x0 + dx
-        y0 = y1 - dy
-        if x0 < 0 or x1 >= XSZ or y0 < 0 or y1 >= YSZ:
-            # print raster.mask.shape, west, x0, x1, XSZ, north, y0, y1, YSZ
-            continue
-        if varname == "lastyear":
-            counts[y0:y1, x0:x1] = np.where(
-                raster.mask, counts[y0:y1, x0:x1], df.iloc[i]["issue"].year
-            )
-        elif varname == "days":
-            counts[y0:y1, x0:x1] = np.where(
-                raster.mask, counts[y0:y1, x0:x1], df.iloc[i]["days"]
-            )
+    issue = pd.to_datetime(store["issue"], unit="s", utc=True)
+    mask = (issue >= sts) & (issue <= ets)
+    if ctx["t"] == "cwa":
+        mask &= store["wfo"] == station
+    if varname.startswith("period"):
+        mmdd = issue.strftime("%m%d")
+        if sdate.strftime("%m%d") > edate.strftime("%m%d"):
+            mask &= (mmdd >= f"{sdate:%m%d}") | (mmdd < f"{edate:%m%d}")
+            (sdate, edate) = (edate, sdate)
         else:
-            counts[y0:y1, x0:x1] += np.where(raster.mask, 0, 1)
+            mask &= (mmdd >= f"{sdate:%m%d}") & (mmdd < f"{edate:%m%d}")
+    mask = np.asarray(mask)
+    days = (ets - issue).total_seconds().to_numpy() / 86400.0
+    df = pd.DataFrame({"issue": issue[mask], "days": days[mask]})
+    if df.empty:
+        raise NoDataFound("No data found for query.")
+    runs = select_runs(store, mask, window)
+    shape = (window[1] - window[0], window[3] - window[2])
+    if varname in ["lastyear", "days"]:
+        latest = accumulate_latest(runs, shape)
+        vals = issue.year.to_numpy() if varname == "lastyear" else days
+        counts = np.where(latest >= 0, vals[latest], 0)
+    else:
+        counts = accumulate_counts(runs, shape)
+    # The grid rows go north to south, flip so that latitude increases
+    counts = np.flipud(counts).astype(float)
+    lons, lats = window_centers(window)
+    lons, lats = np.meshgrid(lons, lats[::-1])
     if np.max(counts) == 0:
         raise NoDataFound("Sorry, no data found for query!")
     # construct the df
@@ -1,5 +1,6 @@
 """Generates analysis maps of ASOS station data for a given date."""
 import datetime
+from functools import lru_cache
 
 import geopandas as gpd
 import numpy as np
@@ -106,6 +107,37 @@ def get_description():
     return desc
 
 
+@lru_cache(maxsize=8)
+def load_data(giswkt, day):
+    """Fetch all variables for the stations within the bounds.
+
+    This is memoized, so batch rendering of different variables for the
+    same day shares the query.
+    """
+    with get_sqlalchemy_conn("iem") as conn:
+        df = gpd.read_postgis(
+            """
+            WITH mystation as (
+                select id, st_x(geom) as lon, st_y(geom) as lat,
+                state, wfo, iemid, country, geom from stations
+                where network ~* 'ASOS' and
+                ST_contains(ST_geomfromtext(%s), geom)
+            )
+            SELECT s.day, s.max_tmpf, s.min_tmpf, s.max_dwpf, s.min_dwpf,
+            s.min_rh, s.max_rh, s.min_feel, s.max_feel,
+            max_sknt * 1.15 as max_sknt,
+            max_gust * 1.15 as max_gust, t.id as station, t.lat, t.lon,
+            t.wfo, t.state, t.country, t.geom from
+            summary s JOIN mystation t on (s.iemid = t.iemid)
+            WHERE s.day = %s
+        """,
+            conn,
+            params=(giswkt, day),
+            geom_col="geom",
+        )
+    return df
+
+
 def get_df(ctx, buf=2.25):
     """Figure out what data we need to fetch here"""
     if ctx["t"] == "state":
@@ -134,30 +166,7 @@ def get_df(ctx, buf=2.25):
         bnds[0] - buf,
         bnds[1] - buf,
     )
-    with get_sqlalchemy_conn("iem") as conn:
-        df = gpd.read_postgis(
-            """
-            WITH mystation as (
-                select id, st_x(geom) as lon, st_y(geom) as lat,
-                state, wfo, iemid, country, geom from stations
-                where network ~* 'ASOS' and
-                ST_contains(ST_geomfromtext(%s), geom)
-            )
-            SELECT s.day, s.max_tmpf, s.min_tmpf, s.max_dwpf, s.min_dwpf,
-            s.min_rh, s.max_rh, s.min_feel, s.max_feel,
-            max_sknt * 1.15 as max_sknt,
-            max_gust * 1.15 as max_gust, t.id as station, t.lat, t.lon,
-            t.wfo, t.state, t.country, t.geom from
-            summary s JOIN mystation t on (s.iemid = t.iemid)
-            WHERE s.day = %s
-        """,
-            conn,
-            params=(
-                giswkt,
-                ctx["day"],
-            ),
-            geom_col="geom",
-        )
+    df = load_data(giswkt, ctx["day"])
     if df.empty:
         raise NoDataFound("No Data Found.")
 
@@ -27,6 +27,7 @@ showing the bad image and <a href="/info/contacts.php">email it to us</a>!
 """
 # pylint: disable=unpacking-non-sequence
 import datetime
+from functools import lru_cache
 
 import numpy as np
 import pandas as pd
@@ -191,6 +192,13 @@ def get_description():
 
 def load_data(ctx, basets, endts):
     """Generate a dataframe with the data we want to analyze."""
+    # callers modify the frame, so do not hand out the memoized one
+    return fetch_data(ctx["v"], ctx["coop"], basets, endts).copy()
+
+
+@lru_cache(maxsize=8)
+def fetch_data(varname, coop, basets, endts):
+    """Fetch the LSR (and COOP) reports, memoized for batch rendering."""
     with get_sqlalchemy_conn("postgis") as conn:
         df = read_postgis(
             text(
@@ -205,7 +213,7 @@ def load_data(ctx, basets, endts):
             ),
             conn,
             params={
-                "typ": "S" if ctx["v"] == "snow" else "5",
+                "typ": "S" if varname == "snow" else "5",
                 "basets": basets,
                 "endts": endts,
             },
@@ -216,7 +224,7 @@ def load_data(ctx, basets, endts):
     df["nwsli"] = df.index.values
     df["plotme"] = True
     df["source"] = "LSR"
-    if ctx["coop"] == "no" or ctx["v"] == "ice":
+    if coop == "no" or varname == "ice":
         return df
     # More work to do
     days = []
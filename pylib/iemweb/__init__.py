@@ -0,0 +1,5 @@
+"""Helpers shared by the IEM web services and scheduled scripts.
+
+deployment/mod_wsgi_startup.py places this directory on ``sys.path`` and
+scripts/crontab sets ``PYTHONPATH`` for the scripts.
+"""
@@ -0,0 +1,139 @@
+"""Render a batch of autoplots without a round trip through the website.
+
+Scheduled scripts used to fetch ``/plotting/auto/plot/...::_cb:1.png`` URLs,
+which ties up web workers and pays for a cold autoplot per map.  Here the
+autoplot frontend and each script module are loaded once per process and
+called directly, so modules that memoize their data loading (ie p206) share
+queries between jobs with the same inputs.
+
+A job is a dict with keys:
+
+  - ``appid`` (int): autoplot number
+  - ``fdict`` (str or dict): autoplot CGI string (``a:b::c:d``) or dict
+  - ``output`` (str, optional): filename to write the PNG to
+  - ``pqstr`` (str, optional): LDM product identifier for pqinsert
+
+Jobs for the same app are rendered within the same worker.
+
+    python -m iemweb.batchplot <jobs.json> [workers]
+"""
+import importlib.machinery
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from functools import lru_cache
+from io import BytesIO
+from multiprocessing import Pool
+
+from pyiem.util import logger, utc
+
+LOG = logger()
+AUTOPLOT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "../../htdocs/plotting/auto/autoplot.py",
+)
+
+
+@lru_cache(maxsize=1)
+def get_frontend():
+    """Load the autoplot mod_wsgi frontend for its helpers."""
+    loader = importlib.machinery.SourceFileLoader("autoplot", AUTOPLOT)
+    spec = importlib.util.spec_from_loader(loader.name, loader)
+    mod = importlib.util.module_from_spec(spec)
+    loader.exec_module(mod)
+    return mod
+
+
+@lru_cache(maxsize=None)
+def get_module(appid):
+    """Load the autoplot script once per process."""
+    return get_frontend().load_module(appid)
+
+
+def render(appid, fdict):
+    """Render the autoplot into PNG bytes.
+
+    Raises:
+      NoDataFound or whatever else the autoplot raises
+    """
+    frontend = get_frontend()
+    if isinstance(fdict, str):
+        fdict = frontend.parser(fdict)
+    fdict["dpi"] = min([int(float(fdict.get("dpi", 100))), 500])
+    start_time = utc()
+    res, meta = frontend.get_res_by_fmt(
+        appid, "png", fdict, mod=get_module(appid)
+    )
+    mixedobj = res[0]
+    ram = BytesIO()
+    if isinstance(mixedobj, frontend.plt.Figure):
+        if meta.get("plotmetadata", True):
+            frontend.plot_metadata(mixedobj, start_time, appid)
+        mixedobj.savefig(ram, format="png", dpi=fdict["dpi"])
+        frontend.plt.close(mixedobj)
+    else:
+        mixedobj.save(ram, "png")
+    return ram.getvalue()
+
+
+def pqinsert(pqstr, content):
+    """Insert the content into LDM."""
+    with tempfile.NamedTemporaryFile(delete=False) as tmpfd:
+        tmpfd.write(content)
+    subprocess.call(["pqinsert", "-i", "-p", pqstr, tmpfd.name])
+    os.unlink(tmpfd.name)
+
+
+def run_job(job):
+    """Render and deliver a single job, returning success."""
+    try:
+        content = render(job["appid"], job["fdict"])
+    except Exception as exp:
+        LOG.warning("autoplot %s %s failed: %s", job["appid"], job, exp)
+        return False
+    if job.get("output"):
+        with open(job["output"], "wb") as fh:
+            fh.write(content)
+    if job.get("pqstr"):
+        pqinsert(job["pqstr"], content)
+    return True
+
+
+def run_group(jobs):
+    """Run jobs sequentially, returning their success."""
+    return [run_job(job) for job in jobs]
+
+
+def run_batch(jobs, workers=1):
+    """Render the jobs, returning a list of success for each job."""
+    groups = {}
+    for idx, job in enumerate(jobs):
+        groups.setdefault(job["appid"], []).append(idx)
+    order = list(groups.values())
+    grouped = [[jobs[idx] for idx in idxs] for idxs in order]
+    if workers > 1 and len(grouped) > 1:
+        with Pool(min(workers, len(grouped))) as pool:
+            results = pool.map(run_group, grouped)
+    else:
+        results = [run_group(group) for group in grouped]
+    success = [False] * len(jobs)
+    for idxs, res in zip(order, results):
+        for idx, ok in zip(idxs, res):
+            success[idx] = ok
+    return success
+
+
+def main(argv):
+    """Run the jobs found in the provided JSON file."""
+    with open(argv[1], encoding="utf-8") as fh:
+        jobs = json.load(fh)
+    workers = int(argv[2]) if len(argv) > 2 else 1
+    success = run_batch(jobs, workers)
+    LOG.info("rendered %s/%s autoplots", sum(success), len(success))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,194 @@
+"""Per-station columnar cache of the climodat daily data.
+
+Most climodat autoplots pull the full period of record for one station from
+``alldata`` and reduce it in SQL.  Here each station's record is kept under
+CACHEDIR as one uncompressed ``.npz`` file of column arrays, from which
+``load`` reads only the requested columns into a DataFrame so the apps can
+do the reductions with pandas instead.
+
+The nightly climodat jobs refresh the cache with ``update_state``, which
+rewrites the trailing LOOKBACK days of each station (picking up estimates,
+corrections and the solar radiation backfill) or the full record when asked
+or when the cache is missing or stale.  The file is replaced with a single
+rename, so a reader never sees columns from different updates.  When a
+station has no cache, ``load`` falls back to the database.
+"""
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+from pyiem.util import get_sqlalchemy_conn
+from sqlalchemy import text
+
+CACHEDIR = "/mesonet/share/climodat"
+# Days re-read from the database by an incremental update
+LOOKBACK = 35
+COLUMNS = {
+    "day": "datetime64[D]",
+    "high": np.float64,
+    "low": np.float64,
+    "precip": np.float64,
+    "snow": np.float64,
+    "snowd": np.float64,
+    "srad": np.float64,
+    "temp_estimated": bool,
+    "precip_estimated": bool,
+}
+SQL = (
+    "SELECT station, day, high, low, precip, snow, snowd, "
+    "coalesce(era5land_srad, narr_srad, merra_srad, hrrr_srad) as srad, "
+    "coalesce(temp_estimated, false) as temp_estimated, "
+    "coalesce(precip_estimated, false) as precip_estimated "
+    "from alldata_{state} WHERE {limiter} ORDER by station, day"
+)
+
+
+def _stationfn(station):
+    """Return the cache file for the station."""
+    if not station.isalnum():
+        raise ValueError(f"Invalid station {station}")
+    return f"{CACHEDIR}/{station}.npz"
+
+
+def _to_columns(df):
+    """Convert a database frame into the cache column arrays."""
+    res = {}
+    for col, dtype in COLUMNS.items():
+        if col == "day":
+            res[col] = pd.to_datetime(df[col]).values.astype(dtype)
+        elif dtype is bool:
+            res[col] = df[col].fillna(False).values.astype(bool)
+        else:
+            res[col] = pd.to_numeric(df[col]).values.astype(dtype)
+    return res
+
+
+def _write(station, data):
+    """Atomically write the column arrays."""
+    fn = _stationfn(station)
+    os.makedirs(CACHEDIR, exist_ok=True)
+    tmpfn = f"{fn}.{os.getpid()}.npz"
+    np.savez(tmpfn, **data)
+    os.rename(tmpfn, fn)
+
+
+def _read_columns(station, columns):
+    """Return the column arrays or None when the station is not cached."""
+    fn = _stationfn(station)
+    if not os.path.isfile(fn):
+        return None
+    # Only the requested members of the archive are read
+    with np.load(fn) as npz:
+        return {col: npz[col] for col in columns}
+
+
+def update_station(station, df):
+    """Replace the cached record of the station with ``df``."""
+    _write(station, _to_columns(df))
+
+
+def splice_station(station, df, sts):
+    """Replace the cached record on and after ``sts`` with ``df``.
+
+    Returns:
+      bool, False when the cache does not reach ``sts`` and a full update
+      is needed
+    """
+    old = _read_columns(station, COLUMNS)
+    if old is None or len(old["day"]) == 0:
+        return False
+    sts = np.datetime64(sts, "D")
+    if old["day"][-1] < sts - 1:
+        return False
+    keep = np.searchsorted(old["day"], sts)
+    new = _to_columns(df)
+    _write(
+        station,
+        {col: np.concatenate([old[col][:keep], new[col]]) for col in COLUMNS},
+    )
+    return True
+
+
+def _read_database(conn, state, limiter, params):
+    """Read the cache columns from the database."""
+    return pd.read_sql(
+        text(SQL.format(state=state.lower(), limiter=limiter)),
+        conn,
+        params=params,
+    )
+
+
+def update_state(conn, state, full=False, stations=None):
+    """Refresh the cache for the stations in the state.
+
+    Args:
+      conn: sqlalchemy connection to the coop database
+      state (str): two character state abbreviation
+      full (bool): rebuild the full record instead of the trailing days
+      stations (list, optional): limit to these stations
+
+    Returns:
+      int, the number of stations updated
+    """
+    if full:
+        if stations is None:
+            res = conn.execute(
+                text(f"SELECT distinct station from alldata_{state.lower()}")
+            )
+            stations = [row[0] for row in res]
+        # One station at a time to bound the memory used
+        for station in stations:
+            df = _read_database(
+                conn, state, "station = :station", {"station": station}
+            )
+            update_station(station, df)
+        return len(stations)
+    limiter = "true" if stations is None else "station = ANY(:stations)"
+    params = {"stations": stations}
+    sts = datetime.date.today() - datetime.timedelta(days=LOOKBACK)
+    params["sts"] = sts
+    df = _read_database(conn, state, f"{limiter} and day >= :sts", params)
+    rebuild = []
+    for station, gdf in df.groupby("station"):
+        if not splice_station(station, gdf, sts):
+            rebuild.append(station)
+    if rebuild:
+        update_state(conn, state, full=True, stations=rebuild)
+    return df["station"].nunique()
+
+
+def _add_derived(df):
+    """Add the commonly used calendar columns."""
+    df["year"] = df["day"].dt.year
+    df["month"] = df["day"].dt.month
+    df["doy"] = df["day"].dt.dayofyear
+    return df
+
+
+def load(station, columns=None):
+    """Return the daily data for a climodat station.
+
+    Args:
+      station (str): climodat station identifier
+      columns (list, optional): data columns to load, default all
+
+    Returns:
+      pandas.DataFrame with ``day``, the requested columns and the derived
+      ``year``, ``month`` and ``doy`` columns, sorted by day
+    """
+    columns = (
+        [c for c in COLUMNS if c != "day"] if columns is None else columns
+    )
+    data = _read_columns(station, ["day", *columns])
+    if data is None:
+        with get_sqlalchemy_conn("coop") as conn:
+            data = _to_columns(
+                _read_database(
+                    conn,
+                    station[:2],
+                    "station = :station",
+                    {"station": station},
+                )
+            )
+    return _add_derived(pd.DataFrame({c: data[c] for c in ["day", *columns]}))
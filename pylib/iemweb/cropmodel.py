@@ -0,0 +1,378 @@
+"""Crop model weather exports of the daily COOP data.
+
+Each station's daily series is fetched once from its per-state
+``alldata_XX`` table and the derived columns (day of year, Celsius, mm and
+cm, the solar radiation coalesce and the scenario splice) are computed on
+the DataFrame.  Any of the model formats is then rendered from the same
+frame.  Stations are fetched in batches of up to STATION_BATCH from one
+state at a time, so requests for hundreds of stations are streamed rather
+than held in memory.
+
+A scenario replicates the observations of ``scenario_year`` for the days
+after the requested end date through the end of that year.
+"""
+import calendar
+import datetime
+
+import numpy as np
+import pandas as pd
+from pyiem.util import get_sqlalchemy_conn, utc
+from sqlalchemy import text
+
+SRAD = "coalesce(era5land_srad, narr_srad, merra_srad, hrrr_srad)"
+CONTACT = "daryl herzmann akrherz@iastate.edu 515-294-5978"
+# Number of stations fetched at once
+STATION_BATCH = 20
+
+
+def get_period(model, sts, ets):
+    """Return the inclusive period of observations used by the model."""
+    if model == "century":
+        # Full years to make the output clean
+        sts = datetime.date(sts.year, 1, 1)
+        ets = min(
+            datetime.date(ets.year, 12, 31),
+            datetime.date.today() - datetime.timedelta(days=1),
+        )
+    return sts, ets
+
+
+def _format(fmt, *cols):
+    """Render the columns into lines with the format."""
+    return "".join(fmt % row for row in zip(*cols))
+
+
+def splice_scenario(df, ets):
+    """Replace the scenario year rows into the days after ets."""
+    scenario = df[df["scenario"]]
+    df = df[~df["scenario"]]
+    if scenario.empty:
+        return df
+    year = ets.year
+    feb29 = (scenario["day"].dt.month == 2) & (scenario["day"].dt.day == 29)
+    if not calendar.isleap(year):
+        scenario = scenario[~feb29]
+    elif not feb29.any():
+        # Fill the leap day with 28 February
+        extra = scenario[
+            (scenario["day"].dt.month == 2) & (scenario["day"].dt.day == 28)
+        ].copy()
+        extra["day"] = pd.Timestamp(year, 2, 29)
+        scenario = pd.concat([scenario, extra])
+    scenario = scenario.assign(
+        day=pd.to_datetime(
+            {
+                "year": year,
+                "month": scenario["day"].dt.month,
+                "day": scenario["day"].dt.day,
+            }
+        )
+    )
+    scenario = scenario[scenario["day"].dt.date > ets]
+    return pd.concat([df, scenario]).sort_values(["station", "day"])
+
+
+def add_derived(df):
+    """Compute the derived columns used by the model formats."""
+    df["year"] = df["day"].dt.year
+    df["month"] = df["day"].dt.month
+    df["dom"] = df["day"].dt.day
+    df["doy"] = df["day"].dt.dayofyear
+    df["highc"] = (df["high"] - 32.0) * 5.0 / 9.0
+    df["lowc"] = (df["low"] - 32.0) * 5.0 / 9.0
+    df["precipmm"] = df["precip"] * 25.4
+    df["precipcm"] = df["precip"] * 2.54
+    return df
+
+
+def fetch_state(conn, state, stations, sts, ets, scenario_year=None):
+    """Fetch the daily data for the stations within one state."""
+    params = {"sids": stations, "sts": sts, "ets": ets}
+    sql = (
+        f"SELECT station, day, high, low, precip, {SRAD} as srad, "
+        f"false as scenario from alldata_{state} WHERE station = ANY(:sids) "
+        "and day >= :sts and day <= :ets"
+    )
+    if scenario_year is not None:
+        params["ssts"] = datetime.date(scenario_year, 1, 1)
+        params["sets"] = datetime.date(scenario_year, 12, 31)
+        sql += (
+            f" UNION ALL SELECT station, day, high, low, precip, "
+            f"{SRAD} as srad, true as scenario from alldata_{state} "
+            "WHERE station = ANY(:sids) and day >= :ssts and day <= :sets"
+        )
+    sql = (
+        f"SELECT * from ({sql}) as foo WHERE high is not null and "
+        "low is not null and precip is not null ORDER by station, day"
+    )
+    df = pd.read_sql(text(sql), conn, params=params)
+    df["day"] = pd.to_datetime(df["day"])
+    return add_derived(splice_scenario(df, ets))
+
+
+def get_climate(conn, stations, nt):
+    """Compute the APSIM tav and amp [C] from the NCEI 1991-2020 climate.
+
+    Returns:
+      DataFrame indexed by station with columns tav and amp
+    """
+    ncei = {
+        nt.sts[sid]["ncei91"]: sid
+        for sid in stations
+        if nt.sts[sid].get("ncei91") is not None
+    }
+    if not ncei:
+        return pd.DataFrame(columns=["tav", "amp"])
+    df = pd.read_sql(
+        text(
+            "SELECT station, extract(month from valid) as month, "
+            "avg((high + low) / 2.) as avgt, count(*) as cnt "
+            "from ncei_climate91 WHERE station = ANY(:ids) "
+            "GROUP by station, month"
+        ),
+        conn,
+        params={"ids": list(ncei)},
+    )
+    df["avgc"] = (df["avgt"] - 32.0) * 5.0 / 9.0
+    df["weighted"] = df["avgc"] * df["cnt"]
+    grp = df.groupby("station")
+    res = pd.DataFrame(
+        {
+            "tav": grp["weighted"].sum() / grp["cnt"].sum(),
+            "amp": grp["avgc"].max() - grp["avgc"].min(),
+        }
+    )
+    res.index = [ncei[sid] for sid in res.index]
+    return res
+
+
+def _climate_from_data(df):
+    """Fallback of the APSIM tav and amp from the station's own data."""
+    avgc = (df["highc"] + df["lowc"]) / 2.0
+    monthly = avgc.groupby(df["month"]).mean()
+    return {"tav": avgc.mean(), "amp": monthly.max() - monthly.min()}
+
+
+def render_apsim(station, meta, df, ctx):
+    """APSIM MET file.
+
+    [weather.met.weather]
+    latitude = 42.1 (DECIMAL DEGREES)
+    tav = 9.325084 (oC) ! annual average ambient temperature
+    amp = 29.57153 (oC) ! annual amplitude in mean monthly temperature
+    year          day           radn          maxt          mint          rain
+    ()            ()            (MJ/m^2)      (oC)          (oC)          (mm)
+     1986          1             7.38585       0.8938889    -7.295556      0
+    """
+    climate = ctx["climate"]
+    if station in climate.index:
+        clim = climate.loc[station]
+    else:
+        clim = _climate_from_data(df)
+    res = (
+        "! Iowa Environmental Mesonet -- NWS Cooperative Data\n"
+        f"! Created: {utc():%d %b %Y %H:%M:%S} UTC\n"
+        f"! Contact: {CONTACT}\n"
+        f"! Station: {station} {meta['name']}\n"
+        f"! Data Period: {ctx['sts']} - {ctx['ets']}\n"
+    )
+    if ctx["scenario_year"] is not None:
+        res += (
+            f"! !SCENARIO DATA! inserted after: {ctx['ets']} "
+            f"replicating year: {ctx['scenario_year']}\n"
+        )
+    res += (
+        "[weather.met.weather]\n"
+        f"latitude = {meta['lat']:.1f} (DECIMAL DEGREES)\n"
+        f"tav = {clim['tav']:.3f} (oC) ! annual average ambient temperature\n"
+        f"amp = {clim['amp']:.3f} (oC) "
+        "! annual amplitude in mean monthly temperature\n"
+        "year        day       radn       maxt       mint      rain\n"
+        "  ()         ()   (MJ/m^2)       (oC)       (oC)       (mm)\n"
+    )
+    res += _format(
+        "%4s %10.0f %10.3f %10.1f %10.1f %10.2f\n",
+        df["year"],
+        df["doy"],
+        df["srad"].fillna(-99),
+        df["highc"],
+        df["lowc"],
+        df["precipmm"],
+    )
+    return {f"{station}.met": res}
+
+
+def render_century(station, meta, df, ctx):
+    """Century monthly format (precip cm, avg high C, avg low C).
+
+    prec  1980   2.60   6.40   0.90   1.00   0.70   0.00
+    tmin  1980  14.66  12.10   7.33  -0.89  -5.45  -7.29
+    tmax  1980  33.24  30.50  27.00  18.37  11.35   9.90
+    """
+    monthly = df.groupby(["year", "month"]).agg(
+        prec=("precipmm", "sum"), tmin=("lowc", "mean"), tmax=("highc", "mean")
+    )
+    years = range(ctx["sts"].year, ctx["ets"].year + 1)
+    monthly = monthly.reindex(
+        pd.MultiIndex.from_product([years, range(1, 13)]), fill_value=-99
+    )
+    res = (
+        "# Iowa Environmental Mesonet -- NWS Cooperative Data\n"
+        f"# Created: {utc():%d %b %Y %H:%M:%S} UTC\n"
+        f"# Contact: {CONTACT}\n"
+        f"# Station: {station} {meta['name']}\n"
+        f"# Data Period: {ctx['sts']} - {ctx['ets']}\n"
+    )
+    if ctx["scenario_year"] is not None:
+        res += (
+            f"# !SCENARIO DATA! inserted after: {ctx['ets']} "
+            f"replicating year: {ctx['scenario_year']}\n"
+        )
+    fmt = "%s  %s" + "%7.2f" * 12 + "\n"
+    for year in years:
+        for col in ["prec", "tmin", "tmax"]:
+            res += fmt % (col, year, *monthly.loc[year, col].values)
+    return {f"{station}.txt": res}
+
+
+def render_daycent(station, meta, df, ctx):
+    """DailyDayCent weather file (no extra drivers).
+
+    day of month, month, year, day of year, high C, low C, precip cm
+    """
+    res = "Daily Weather Data File (use extra weather drivers = 0):\n\n"
+    res += _format(
+        "%s %s %s %s %.2f %.2f %.2f\n",
+        df["dom"],
+        df["month"],
+        df["year"],
+        df["doy"],
+        df["highc"],
+        df["lowc"],
+        df["precipcm"],
+    )
+    return {f"{station}.wth": res}
+
+
+def render_salus(station, meta, df, ctx):
+    """SALUS CSV.
+
+    StationID, Year, DOY, SRAD, Tmax, Tmin, Rain, DewP, Wind, Par, dbnum
+    CTRL, 1981, 1, 5.62203, 2.79032, -3.53361, 5.43766, NaN, NaN, NaN, 2
+    """
+    res = (
+        "StationID, Year, DOY, SRAD, Tmax, Tmin, Rain, DewP, "
+        "Wind, Par, dbnum\n"
+    )
+    res += _format(
+        f"{station[:4]}, %s, %s, %.4f, %.2f, %.2f, %.2f, , , , %s\n",
+        df["year"],
+        df["doy"],
+        df["srad"].fillna(-99),
+        df["highc"],
+        df["lowc"],
+        df["precipmm"],
+        np.arange(len(df.index)) + 2,
+    )
+    return {f"{station}.csv": res}
+
+
+def render_dndc(station, meta, df, ctx):
+    """DNDC, one file per year of julian day, high C, low C, precip cm."""
+    sname = meta["name"].replace(" ", "_")
+    res = {}
+    for year, gdf in df.groupby("year"):
+        res[f"{sname}/{sname}_{year}.txt"] = _format(
+            "%s %.2f %.2f %.2f\n",
+            gdf["doy"],
+            gdf["highc"],
+            gdf["lowc"],
+            gdf["precipcm"],
+        )
+    return res
+
+
+def render_swat(station, meta, df, ctx):
+    """SWAT, precip [mm] and high and low temperature [C] files."""
+    header = f"IEM COOP {station}\n\n\n\n"
+    return {
+        f"swatfiles/{station}.pcp": header
+        + _format("%s%03i%5.1f\n", df["year"], df["doy"], df["precipmm"]),
+        f"swatfiles/{station}.tmp": header
+        + _format(
+            "%s%03i%5.1f%5.1f\n",
+            df["year"],
+            df["doy"],
+            df["highc"],
+            df["lowc"],
+        ),
+    }
+
+
+MODELS = {
+    "apsim": render_apsim,
+    "century": render_century,
+    "daycent": render_daycent,
+    "dndc": render_dndc,
+    "salus": render_salus,
+    "swat": render_swat,
+}
+# Models that are always a zip file, others are text for a single station
+ZIP_MODELS = ["dndc", "swat"]
+
+
+def generate(model, stations, nt, sts, ets, scenario_year=None):
+    """Yield (station, {filename: content}) for each known station.
+
+    Args:
+      model (str): key of MODELS
+      stations (list): station identifiers
+      nt: NetworkTable like object with the station metadata
+      sts, ets (date): inclusive period requested
+      scenario_year (int, optional): year to splice in after ets
+    """
+    sts, ets = get_period(model, sts, ets)
+    ctx = {"sts": sts, "ets": ets, "scenario_year": scenario_year}
+    bystate = {}
+    for sid in stations:
+        if sid in nt.sts and sid[:2].isalpha():
+            bystate.setdefault(sid[:2].lower(), []).append(sid)
+    with get_sqlalchemy_conn("coop") as conn:
+        ctx["climate"] = None
+        if model == "apsim":
+            ctx["climate"] = get_climate(
+                conn, [sid for sids in bystate.values() for sid in sids], nt
+            )
+        for state, sids in bystate.items():
+            for i in range(0, len(sids), STATION_BATCH):
+                batch = sids[i : i + STATION_BATCH]
+                df = fetch_state(conn, state, batch, sts, ets, scenario_year)
+                groups = dict(tuple(df.groupby("station")))
+                for sid in batch:
+                    sdf = groups.get(sid, df.iloc[0:0])
+                    yield sid, MODELS[model](sid, nt.sts[sid], sdf, ctx)
+
+
+def test_splice_scenario_leapday():
+    """Test that a leap year gets its 29 February from the scenario."""
+    days = pd.date_range("2023-02-26", "2023-03-02")
+    df = pd.DataFrame(
+        {
+            "station": "IA0000",
+            "day": [*days[:2], *days],
+            "high": range(len(days) + 2),
+            "scenario": [False, False] + [True] * len(days),
+        }
+    )
+    res = splice_scenario(df, datetime.date(2024, 2, 27))
+    assert res["day"].is_unique
+    assert list(res["day"].dt.strftime("%m%d")) == [
+        "0226",
+        "0227",
+        "0228",
+        "0229",
+        "0301",
+        "0302",
+    ]
+    # 29 February repeats 28 February
+    assert list(res["high"]) == [0, 1, 4, 4, 5, 6]
@@ -0,0 +1,79 @@
+"""Assemble and serve GeoJSON built from PostGIS ``ST_AsGeoJSON`` text.
+
+Loading each geometry with json.loads only for json.dumps to write it out
+again dominated building the large (ie national network) collections.  Here
+the geometry text from the database is spliced verbatim into each feature
+and only the small properties dictionary is serialized.  The response is
+kept in memcache gzip compressed and sent as is to clients accepting gzip.
+"""
+import gzip
+import json
+
+from pyiem.util import html_escape
+
+CONTENT_TYPE = "application/vnd.geo+json"
+
+
+def feature(fid, properties, geometry):
+    """Return the text of a GeoJSON feature.
+
+    Args:
+      fid: feature identifier
+      properties (dict): feature properties
+      geometry (str): GeoJSON text of the geometry, ie from ST_AsGeoJSON
+    """
+    return (
+        f'{{"type": "Feature", "id": {json.dumps(fid)}, '
+        f'"properties": {json.dumps(properties)}, '
+        f'"geometry": {"null" if geometry is None else geometry}}}'
+    )
+
+
+def feature_collection(features, **members):
+    """Return the text of a FeatureCollection.
+
+    Args:
+      features (iterable): feature texts from ``feature``
+      **members: additional top level members, ie generation_time
+    """
+    extra = "".join(
+        f", {json.dumps(key)}: {json.dumps(value)}"
+        for key, value in members.items()
+    )
+    return (
+        f'{{"type": "FeatureCollection", "features": [{", ".join(features)}]'
+        f"{extra}}}"
+    )
+
+
+def accepts_gzip(environ):
+    """Does the client accept a gzip encoded response."""
+    return "gzip" in environ.get("HTTP_ACCEPT_ENCODING", "")
+
+
+def respond(environ, start_response, mc, mckey, func, expire, cb=None):
+    """Serve the GeoJSON from memcache or generated by ``func``.
+
+    Args:
+      mc (pymemcache.Client): memcache client
+      mckey (str): memcache key, the value stored is gzip compressed
+      func (callable): returns the GeoJSON text on a cache miss
+      expire (int): memcache expiration in seconds
+      cb (str, optional): JSONP callback, which is sent uncompressed
+    """
+    content = mc.get(mckey)
+    if not content:
+        content = gzip.compress(func().encode("ascii"), compresslevel=6)
+        mc.set(mckey, content, expire)
+    headers = [("Content-type", CONTENT_TYPE), ("Vary", "Accept-Encoding")]
+    if cb is None and accepts_gzip(environ):
+        headers.append(("Content-Encoding", "gzip"))
+        start_response("200 OK", headers)
+        return [content]
+    content = gzip.decompress(content)
+    if cb is not None:
+        content = b"".join(
+            [f"{html_escape(cb)}(".encode("ascii"), content, b")"]
+        )
+    start_response("200 OK", headers)
+    return [content]
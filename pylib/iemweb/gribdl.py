@@ -0,0 +1,194 @@
+"""Download a subset of GRIB messages by HTTP byte ranges.
+
+NCEP (and the AWS/Google mirrors) publish a ``.idx`` inventory next to each
+GRIB2 file, one line per message::
+
+    22:23684154:d=2023041000:DSWRF:surface:0-15 min ave fcst:
+
+Messages are selected with declarative ``(var, level, step)`` filters, where
+each item is a fnmatch pattern (or a list of patterns) matched against the
+inventory fields, ie ``("DSWRF", "surface", "*ave fcst*")``.  Adjacent
+messages are coalesced into a single byte range, ranges are fetched
+concurrently over a pooled session with retries, and the output is written
+to a ``.part`` file that is renamed into place once complete.  A ``.part``
+file left over from a failed attempt is resumed at the last complete range.
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatchcase
+from functools import lru_cache
+
+import requests
+from pyiem.util import logger
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+LOG = logger()
+WORKERS = 4
+TIMEOUT = 60
+
+
+@lru_cache(maxsize=1)
+def get_session():
+    """Return a requests session with connection pooling and retries."""
+    retry = Retry(
+        total=5,
+        backoff_factor=2,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+    )
+    adapter = HTTPAdapter(pool_maxsize=16, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def parse_idx(text):
+    """Parse the .idx inventory into a list of message dicts.
+
+    Each dict has keys num, start, end (inclusive, None for the last
+    message), var, level and step.
+    """
+    res = []
+    for line in text.split("\n"):
+        tokens = line.split(":")
+        if len(tokens) < 6:
+            continue
+        res.append(
+            {
+                "num": tokens[0],
+                "start": int(tokens[1]),
+                "end": None,
+                "var": tokens[3],
+                "level": tokens[4],
+                "step": tokens[5],
+            }
+        )
+    for msg, nextmsg in zip(res[:-1], res[1:]):
+        msg["end"] = nextmsg["start"] - 1
+    return res
+
+
+def _match(value, patterns):
+    """Does the value match the pattern or any of the list of patterns."""
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    return any(fnmatchcase(value, pattern) for pattern in patterns)
+
+
+def select_messages(messages, filters):
+    """Return the messages matching any of the (var, level, step) filters."""
+    return [
+        msg
+        for msg in messages
+        if any(
+            _match(msg["var"], var)
+            and _match(msg["level"], level)
+            and _match(msg["step"], step)
+            for var, level, step in filters
+        )
+    ]
+
+
+def coalesce(messages):
+    """Merge the messages into a list of [start, end] byte ranges."""
+    ranges = []
+    for msg in sorted(messages, key=lambda x: x["start"]):
+        if ranges and ranges[-1][1] is not None:
+            if ranges[-1][1] + 1 == msg["start"]:
+                ranges[-1][1] = msg["end"]
+                continue
+        ranges.append([msg["start"], msg["end"]])
+    return ranges
+
+
+def get_messages(url, filters):
+    """Fetch the inventory for the GRIB url and select messages.
+
+    Returns:
+      list of message dicts or None if the inventory is unavailable
+    """
+    try:
+        resp = get_session().get(f"{url}.idx", timeout=TIMEOUT)
+    except requests.RequestException as exp:
+        LOG.info("failed to get idx %s: %s", url, exp)
+        return None
+    if resp.status_code != 200:
+        LOG.info("failed to get idx %s: %s", url, resp.status_code)
+        return None
+    return select_messages(parse_idx(resp.text), filters)
+
+
+def _fetch_range(url, byterange):
+    """Fetch a single byte range."""
+    start, end = byterange
+    headers = {"Range": f"bytes={start}-{'' if end is None else end}"}
+    resp = get_session().get(url, headers=headers, timeout=TIMEOUT)
+    resp.raise_for_status()
+    if resp.status_code == 200:
+        # Server ignored the range request
+        return resp.content[start : None if end is None else end + 1]
+    return resp.content
+
+
+def fetch_ranges(url, ranges, workers=WORKERS):
+    """Yield the content of each byte range, in order.
+
+    Raises:
+      requests.RequestException when a range can not be fetched
+    """
+    with ThreadPoolExecutor(max(1, workers)) as executor:
+        yield from executor.map(lambda rng: _fetch_range(url, rng), ranges)
+
+
+def fetch_messages(url, messages, fn, workers=WORKERS):
+    """Fetch the messages into the file ``fn``.
+
+    Returns:
+      bool, True when ``fn`` was written
+    """
+    ranges = coalesce(messages)
+    partfn = f"{fn}.part"
+    statefn = f"{partfn}.json"
+    state = {"url": url, "ranges": ranges, "done": 0, "size": 0}
+    if os.path.isfile(partfn) and os.path.isfile(statefn):
+        with open(statefn, encoding="utf-8") as fh:
+            previous = json.load(fh)
+        if previous["url"] == url and previous["ranges"] == ranges:
+            state = previous
+            LOG.info("resuming %s at range %s", fn, state["done"])
+    mode = "r+b" if state["done"] > 0 else "wb"
+    try:
+        with open(partfn, mode) as fh:
+            fh.truncate(state["size"])
+            fh.seek(state["size"])
+            for content in fetch_ranges(url, ranges[state["done"] :], workers):
+                fh.write(content)
+                fh.flush()
+                state["done"] += 1
+                state["size"] = fh.tell()
+                with open(statefn, "w", encoding="utf-8") as sfh:
+                    json.dump(state, sfh)
+    except requests.RequestException as exp:
+        LOG.warning("fetch of %s failed: %s", url, exp)
+        return False
+    os.rename(partfn, fn)
+    if os.path.isfile(statefn):
+        os.unlink(statefn)
+    return True
+
+
+def download(url, filters, fn, workers=WORKERS):
+    """Download the messages matching the filters from url into fn.
+
+    Returns:
+      number of messages written, None on failure
+    """
+    messages = get_messages(url, filters)
+    if not messages:
+        return None
+    if not fetch_messages(url, messages, fn, workers=workers):
+        return None
+    return len(messages)
@@ -0,0 +1,155 @@
+"""Running totals since 1 January kept within the IEMRE daily netCDF files.
+
+Summing ``p01d`` or computing growing degree days over a date range reads
+every daily slice of the grid in that range.  The ``*_cum`` variables here
+hold the total from 1 January through each day, so the total over any range
+is the difference of two slices.  ``update_totals`` recomputes the totals
+from a given day forward and is called by daily_analysis.py after it writes
+a day, compute_cumulative.py fills in a whole year.
+
+Missing daily values contribute nothing to the totals.  A total is only
+resumed from a day that has one, so a file gaining the variables (ie with
+the first daily_analysis run after they were added) is filled from the
+start of the year, and ``get_total`` sums the daily values for ranges not
+yet covered.
+"""
+import datetime
+
+import numpy as np
+from pyiem import iemre
+from pyiem.util import convert_value
+
+# Growing degree day bases [F] with a ceiling of GDD_CEILING
+GDD_BASES = [40, 48, 50]
+GDD_CEILING = 86
+# Stress degree days are accumulated above this high temperature [F]
+SDD_BASE = 86
+# Number of daily slices read at once
+CHUNK = 31
+CUM_VARS = {
+    "p01d_cum": {
+        "scale_factor": 0.1,
+        "units": "mm",
+        "long_name": "Precipitation since 1 January",
+    },
+    **{
+        f"gdd{base}_cum": {
+            "scale_factor": 0.3,
+            "units": "F",
+            "long_name": (
+                f"Growing Degree Days base {base}F ceiling {GDD_CEILING}F "
+                "since 1 January"
+            ),
+        }
+        for base in GDD_BASES
+    },
+    f"sdd{SDD_BASE}_cum": {
+        "scale_factor": 0.2,
+        "units": "F",
+        "long_name": f"Stress Degree Days above {SDD_BASE}F since 1 January",
+    },
+}
+
+
+def ensure_variables(nc):
+    """Create any of the running total variables missing from the file."""
+    for vname, attrs in CUM_VARS.items():
+        if vname in nc.variables:
+            continue
+        ncvar = nc.createVariable(
+            vname, np.uint16, ("time", "lat", "lon"), fill_value=65535
+        )
+        ncvar.units = attrs["units"]
+        ncvar.scale_factor = attrs["scale_factor"]
+        ncvar.long_name = attrs["long_name"]
+        ncvar.coordinates = "lon lat"
+
+
+def gdd(high, low, base, ceiling=GDD_CEILING):
+    """Growing degree days from high and low temperature [F]."""
+    high = np.clip(high, base, ceiling)
+    low = np.maximum(low, base)
+    return (high + low) / 2.0 - base
+
+
+def daily_increments(nc, sts, ets):
+    """Return the daily contributions to each running total.
+
+    Returns:
+      dict of variable name to array of shape (ets - sts, lat, lon)
+    """
+
+    def _get(vname, units=None):
+        vals = np.ma.filled(nc.variables[vname][sts:ets].astype(float), np.nan)
+        if units is not None:
+            vals = convert_value(vals, "degK", units)
+        return vals
+
+    high = _get("high_tmpk", "degF")
+    low = _get("low_tmpk", "degF")
+    res = {"p01d_cum": _get("p01d")}
+    for base in GDD_BASES:
+        res[f"gdd{base}_cum"] = gdd(high, low, base)
+    res[f"sdd{SDD_BASE}_cum"] = np.maximum(high - SDD_BASE, 0)
+    return {k: np.nan_to_num(v, nan=0.0) for k, v in res.items()}
+
+
+def update_totals(nc, idx, lastidx=None):
+    """Recompute the running totals from day ``idx`` through ``lastidx``.
+
+    Args:
+      nc: IEMRE daily netCDF file opened for writing
+      idx (int): first day offset to recompute
+      lastidx (int, optional): last day offset, default is today for the
+        current year and otherwise the end of the year
+    """
+    ensure_variables(nc)
+    if lastidx is None:
+        lastidx = nc.dimensions["time"].size - 1
+        year = int(nc.variables["time"].units.split()[2][:4])
+        today = datetime.date.today()
+        if year == today.year:
+            lastidx = iemre.daily_offset(today)
+        lastidx = max(lastidx, idx)
+    # Resume from the last day with totals, which are never masked once set
+    while idx > 0 and any(
+        np.ma.is_masked(nc.variables[vname][idx - 1]) for vname in CUM_VARS
+    ):
+        idx -= 1
+    running = {}
+    for vname in CUM_VARS:
+        if idx == 0:
+            running[vname] = np.zeros((iemre.NY, iemre.NX))
+        else:
+            running[vname] = np.ma.filled(nc.variables[vname][idx - 1], 0)
+    for sts in range(idx, lastidx + 1, CHUNK):
+        ets = min(sts + CHUNK, lastidx + 1)
+        increments = daily_increments(nc, sts, ets)
+        for vname, inc in increments.items():
+            cum = running[vname] + np.cumsum(inc, axis=0)
+            nc.variables[vname][sts:ets] = cum
+            running[vname] = cum[-1]
+
+
+def get_total(nc, vname, offset0, offset1):
+    """Return the total over days [offset0, offset1) from a running total.
+
+    When the running total does not cover the range, the daily values are
+    summed instead.
+
+    Returns:
+      2D masked array, or None when the file lacks the variable
+    """
+    if vname not in nc.variables:
+        return None
+    if offset1 <= offset0:
+        return np.ma.zeros((iemre.NY, iemre.NX))
+    total = nc.variables[vname][offset1 - 1]
+    if offset0 > 0:
+        previous = nc.variables[vname][offset0 - 1]
+        if not np.ma.is_masked(total) and not np.ma.is_masked(previous):
+            return total - previous
+    elif not np.ma.is_masked(total):
+        return total
+    increments = daily_increments(nc, offset0, offset1)
+    return np.ma.array(np.sum(increments[vname], axis=0))
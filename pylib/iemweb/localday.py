@@ -0,0 +1,40 @@
+"""Convert local calendar dates into UTC timestamp bounds.
+
+Filtering with ``date(valid at time zone tzname) = %s`` can not use the
+index on ``valid`` and forces a scan.  The helpers here compute the UTC
+bounds of the local day(s) so queries can use ``valid >= %s and valid < %s``
+instead.
+"""
+import datetime
+from zoneinfo import ZoneInfo
+
+from iemweb.stations import get_station
+
+
+def get_station_tzname(station, network):
+    """Return the time zone of the given station, None if unknown."""
+    meta = get_station(station, network)
+    return None if meta is None else meta["tzname"]
+
+
+def local_day_bounds(tzname, sdate, edate=None):
+    """Compute the UTC bounds for a local date range.
+
+    Args:
+      tzname (str): time zone name
+      sdate (date): first local date, inclusive
+      edate (date, optional): last local date, inclusive, defaults to sdate
+
+    Returns:
+      (datetime, datetime) aware UTC timestamps for use as
+      ``valid >= sts and valid < ets``
+    """
+    if edate is None:
+        edate = sdate
+    tzinfo = ZoneInfo(tzname)
+    sts = datetime.datetime.combine(sdate, datetime.time(0), tzinfo=tzinfo)
+    ets = datetime.datetime.combine(
+        edate + datetime.timedelta(days=1), datetime.time(0), tzinfo=tzinfo
+    )
+    utc = datetime.timezone.utc
+    return sts.astimezone(utc), ets.astimezone(utc)
@@ -0,0 +1,160 @@
+"""Reusable regridding tables, mostly for getting data onto the IEMRE grid.
+
+Building a ``scipy.interpolate.NearestNDInterpolator`` constructs a KD-tree
+over every source point, which dominated jobs regridding the same model
+grid for many variables and timesteps.  Here the source to target index
+(or bilinear index and weight) table is computed once per pair of grid
+definitions, kept in process (least recently used evicted) and persisted
+under CACHEDIR keyed by a fingerprint of the coordinates.  Applying a
+table is then a single gather.
+
+Results are identical to ``NearestNDInterpolator((lons, lats), vals)(xi,
+yi)`` and, for rectilinear sources, to ``RegularGridInterpolator`` except
+that targets outside of the source grid are NaN instead of an error.
+"""
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+CACHEDIR = "/mesonet/share/regrid"
+# Number of tables kept in process
+MAXMEMORY = 16
+_MEMORY = OrderedDict()
+
+
+def fingerprint(*arrays):
+    """Return a hex digest identifying the given coordinate arrays.
+
+    The full arrays are hashed, which is cheap next to building a table and
+    so grids differing at a single point never share one.
+    """
+    digest = hashlib.sha1()
+    for arr in arrays:
+        arr = np.ascontiguousarray(np.asarray(arr, dtype=np.float64))
+        digest.update(str(arr.shape).encode("ascii"))
+        digest.update(arr.tobytes())
+    return digest.hexdigest()
+
+
+def _cached(kind, key, func, persist):
+    """Fetch the table from memory, disk or by computing it."""
+    if (kind, key) in _MEMORY:
+        _MEMORY.move_to_end((kind, key))
+        return _MEMORY[(kind, key)]
+    fn = f"{CACHEDIR}/{kind}_{key}.npz"
+    table = None
+    if persist and os.path.isfile(fn):
+        try:
+            with np.load(fn) as npz:
+                table = {k: npz[k] for k in npz.files}
+        except Exception:  # noqa
+            table = None
+    if table is None:
+        table = func()
+        if persist:
+            os.makedirs(CACHEDIR, exist_ok=True)
+            tmpfn = f"{fn}.{os.getpid()}.npz"
+            np.savez(tmpfn, **table)
+            os.rename(tmpfn, fn)
+    while len(_MEMORY) >= MAXMEMORY:
+        _MEMORY.popitem(last=False)
+    _MEMORY[(kind, key)] = table
+    return table
+
+
+def get_nn_table(lons, lats, xi, yi, persist=True):
+    """Return the index of the nearest source point for each target point.
+
+    Args:
+      lons, lats: source point coordinates (any, but matching, shapes)
+      xi, yi: target coordinates, the table has their broadcast shape
+      persist (bool): store the table on disk for later runs
+
+    Returns:
+      dict with ``idx`` into the raveled source values
+    """
+    lons = np.asarray(lons, dtype=np.float64).ravel()
+    lats = np.asarray(lats, dtype=np.float64).ravel()
+    xi, yi = np.broadcast_arrays(
+        np.asarray(xi, dtype=np.float64), np.asarray(yi, dtype=np.float64)
+    )
+
+    def _compute():
+        tree = cKDTree(np.column_stack([lons, lats]))
+        _, idx = tree.query(np.column_stack([xi.ravel(), yi.ravel()]))
+        return {"idx": idx.astype(np.int64).reshape(xi.shape)}
+
+    key = fingerprint(lons, lats, xi, yi)
+    return _cached("nn", key, _compute, persist)
+
+
+def nn_regrid(lons, lats, vals, xi, yi, persist=True):
+    """Nearest neighbor regrid of ``vals`` valid at lons, lats onto xi, yi.
+
+    Like NearestNDInterpolator, any mask on ``vals`` is ignored.
+    """
+    table = get_nn_table(lons, lats, xi, yi, persist=persist)
+    return np.asarray(vals).ravel()[table["idx"]]
+
+
+def _axis_weights(axis, vals):
+    """Bracketing indices and the weight of the upper one along an axis."""
+    axis = np.asarray(axis, dtype=np.float64)
+    size = axis.size
+    ascending = axis[-1] > axis[0]
+    work = axis if ascending else axis[::-1]
+    i1 = np.clip(np.searchsorted(work, vals), 1, size - 1)
+    i0 = i1 - 1
+    weight = (vals - work[i0]) / (work[i1] - work[i0])
+    valid = (vals >= work[0]) & (vals <= work[-1])
+    if not ascending:
+        i0, i1 = size - 1 - i0, size - 1 - i1
+    return i0, i1, weight, valid
+
+
+def get_bilinear_table(xaxis, yaxis, xi, yi, persist=True):
+    """Return bilinear interpolation indices and weights.
+
+    Args:
+      xaxis, yaxis: 1D coordinates of a rectilinear source grid of shape
+        (yaxis.size, xaxis.size), either ascending or descending
+      xi, yi: target coordinates, the table has their broadcast shape
+      persist (bool): store the table on disk for later runs
+
+    Returns:
+      dict with ``idx`` and ``weight`` arrays of shape (4, *target shape)
+    """
+    xaxis = np.asarray(xaxis, dtype=np.float64).ravel()
+    yaxis = np.asarray(yaxis, dtype=np.float64).ravel()
+    xi, yi = np.broadcast_arrays(
+        np.asarray(xi, dtype=np.float64), np.asarray(yi, dtype=np.float64)
+    )
+
+    def _compute():
+        x0, x1, wx, xvalid = _axis_weights(xaxis, xi)
+        y0, y1, wy, yvalid = _axis_weights(yaxis, yi)
+        nx = xaxis.size
+        idx = np.stack(
+            [y0 * nx + x0, y0 * nx + x1, y1 * nx + x0, y1 * nx + x1]
+        )
+        weight = np.stack(
+            [(1 - wy) * (1 - wx), (1 - wy) * wx, wy * (1 - wx), wy * wx]
+        )
+        weight[:, ~(xvalid & yvalid)] = np.nan
+        return {"idx": idx.astype(np.int64), "weight": weight}
+
+    key = fingerprint(xaxis, yaxis, xi, yi)
+    return _cached("bilinear", key, _compute, persist)
+
+
+def bilinear_regrid(xaxis, yaxis, vals, xi, yi, persist=True):
+    """Bilinear regrid of the rectilinear ``vals`` onto xi, yi.
+
+    NaN values in ``vals`` propagate to the targets using them.
+    """
+    table = get_bilinear_table(xaxis, yaxis, xi, yi, persist=persist)
+    vals = np.asarray(vals, dtype=np.float64).ravel()
+    return np.sum(vals[table["idx"]] * table["weight"], axis=0)
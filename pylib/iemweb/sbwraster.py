@@ -0,0 +1,242 @@
+"""Pre-rasterized storm based warning (SBW) polygon footprints.
+
+Each NEW SBW polygon is rasterized once onto a fixed global 0.01 degree grid
+(row 0 starting at 90N, column 0 at 180W) and stored as row runs of
+``[col0, col1)`` within yearly files per phenomena and significance.  Maps
+of warning frequency then become a vectorized accumulation over the stored
+runs instead of rasterizing every polygon per request.
+
+scripts/sbw/rasterize_sbw.py maintains the store.  A year is only known to
+be complete once a run has covered it from 1 January, which is recorded by
+a marker file.  Periods including incomplete years have to be rasterized
+from the database on demand, see ``footprint_event``.
+"""
+import os
+
+import numpy as np
+from affine import Affine
+from rasterio.features import rasterize
+from shapely import wkb
+
+STORE = "/mesonet/share/sbw_raster"
+DELTA = 0.01
+WEST = -180.0
+NORTH = 90.0
+# Keys and dtypes of the arrays stored per event and per run
+EVENT_DTYPES = {"wfo": "U3", "eventid": np.int32, "issue": np.int64}
+RUN_DTYPES = {"row": np.uint16, "col0": np.uint16, "col1": np.uint16}
+# Limit the number of pixels expanded at once by accumulate_latest
+CHUNK_PIXELS = 5_000_000
+
+
+def get_store_fn(year, phenomena, significance):
+    """Where the given year of footprints lives."""
+    return f"{STORE}/{year}/{phenomena}_{significance}.npz"
+
+
+def get_marker_fn(year):
+    """The file marking the year of footprints as complete."""
+    return f"{STORE}/{year}/complete"
+
+
+def is_complete(year):
+    """Has the year been fully rasterized into the store."""
+    return os.path.isfile(get_marker_fn(year))
+
+
+def mark_complete(year):
+    """Record that the year has been fully rasterized into the store."""
+    fn = get_marker_fn(year)
+    os.makedirs(os.path.dirname(fn), exist_ok=True)
+    with open(fn, "w", encoding="ascii"):
+        pass
+
+
+def window_for_bounds(west, south, east, north):
+    """Convert lon/lat bounds into a (row0, row1, col0, col1) grid window."""
+    row0 = int(np.floor((NORTH - north) / DELTA))
+    row1 = int(np.ceil((NORTH - south) / DELTA))
+    col0 = int(np.floor((west - WEST) / DELTA))
+    col1 = int(np.ceil((east - WEST) / DELTA))
+    return row0, row1, col0, col1
+
+
+def window_centers(window):
+    """Return the (lons, lats) 1D pixel centers of the window."""
+    row0, row1, col0, col1 = window
+    lons = WEST + (np.arange(col0, col1) + 0.5) * DELTA
+    lats = NORTH - (np.arange(row0, row1) + 0.5) * DELTA
+    return lons, lats
+
+
+def footprint_runs(geom):
+    """Rasterize the geometry into global (row, col0, col1) runs.
+
+    Any pixel touched by the geometry is included.
+    """
+    row0, row1, col0, col1 = window_for_bounds(*geom.bounds)
+    # pad, so that pixels touching the bounds edges are not lost
+    row0, row1, col0, col1 = row0 - 1, row1 + 1, col0 - 1, col1 + 1
+    # round, so that pixel edges are identical no matter the window
+    transform = Affine(
+        DELTA,
+        0.0,
+        round(WEST + col0 * DELTA, 6),
+        0.0,
+        0 - DELTA,
+        round(NORTH - row0 * DELTA, 6),
+    )
+    mask = rasterize(
+        [geom],
+        out_shape=(row1 - row0, col1 - col0),
+        transform=transform,
+        all_touched=True,
+        dtype=np.uint8,
+    )
+    edges = np.diff(np.pad(mask.astype(np.int8), ((0, 0), (1, 1))), axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    return rows + row0, starts + col0, ends + col0
+
+
+def footprint_event(wfo, eventid, issue, geom):
+    """Build the event dict for a warning.
+
+    Args:
+      wfo (str): issuing office
+      eventid (int): VTEC event identifier
+      issue (int): issuance as epoch seconds
+      geom (bytes): WKB of the polygon
+    """
+    rows, col0, col1 = footprint_runs(wkb.loads(bytes(geom)))
+    return {
+        "wfo": wfo,
+        "eventid": eventid,
+        "issue": issue,
+        "row": rows,
+        "col0": col0,
+        "col1": col1,
+    }
+
+
+def load_store(year, phenomena, significance):
+    """Load the footprints for a year, None when nothing is stored."""
+    fn = get_store_fn(year, phenomena, significance)
+    if not os.path.isfile(fn):
+        return None
+    with np.load(fn) as npz:
+        return {key: npz[key] for key in npz.files}
+
+
+def save_store(year, phenomena, significance, store):
+    """Atomically write the footprints for a year."""
+    fn = get_store_fn(year, phenomena, significance)
+    os.makedirs(os.path.dirname(fn), exist_ok=True)
+    tmpfn = f"{fn}.{os.getpid()}.npz"
+    np.savez(tmpfn, **store)
+    os.rename(tmpfn, fn)
+
+
+def build_store(events):
+    """Build the store arrays from a list of event dicts.
+
+    Each event has keys wfo, eventid, issue (epoch seconds), row, col0 and
+    col1, the events are sorted by issuance time.
+    """
+    events = sorted(events, key=lambda x: x["issue"])
+    store = {
+        key: np.array([e[key] for e in events], dtype=dtype)
+        for key, dtype in EVENT_DTYPES.items()
+    }
+    store["ptr"] = np.cumsum([0] + [len(e["row"]) for e in events])
+    for key, dtype in RUN_DTYPES.items():
+        store[key] = np.concatenate(
+            [np.asarray(e[key], dtype=dtype) for e in events] or [[]]
+        ).astype(dtype)
+    return store
+
+
+def store_events(store):
+    """Convert the store arrays back into a list of event dicts."""
+    if store is None:
+        return []
+    res = []
+    for i in range(len(store["issue"])):
+        sl = slice(store["ptr"][i], store["ptr"][i + 1])
+        event = {key: store[key][i] for key in EVENT_DTYPES}
+        event.update({key: store[key][sl] for key in RUN_DTYPES})
+        res.append(event)
+    return res
+
+
+def load_years(years, phenomena, significance):
+    """Load and concatenate the footprints for the given years."""
+    stores = [load_store(yr, phenomena, significance) for yr in years]
+    stores = [st for st in stores if st is not None]
+    if not stores:
+        return None
+    res = {
+        key: np.concatenate([st[key] for st in stores])
+        for key in [*EVENT_DTYPES, *RUN_DTYPES]
+    }
+    res["ptr"] = np.cumsum(
+        np.concatenate([[0]] + [np.diff(st["ptr"]) for st in stores])
+    )
+    return res
+
+
+def select_runs(store, event_mask, window):
+    """Return the runs of the selected events clipped to the window.
+
+    Returns:
+      (event index, row, col0, col1) arrays relative to the window
+    """
+    row0, row1, col0, col1 = window
+    # Gather only the runs of the selected events
+    events = np.flatnonzero(event_mask)
+    ptr = store["ptr"]
+    nruns = ptr[events + 1] - ptr[events]
+    offsets = np.repeat(ptr[events] - (np.cumsum(nruns) - nruns), nruns)
+    runidx = offsets + np.arange(nruns.sum())
+    rows = store["row"][runidx]
+    c0 = store["col0"][runidx]
+    c1 = store["col1"][runidx]
+    keep = (rows >= row0) & (rows < row1) & (c1 > col0) & (c0 < col1)
+    return (
+        np.repeat(events, nruns)[keep],
+        rows[keep].astype(np.int64) - row0,
+        np.clip(c0[keep].astype(np.int64), col0, col1) - col0,
+        np.clip(c1[keep].astype(np.int64), col0, col1) - col0,
+    )
+
+
+def accumulate_counts(runs, shape):
+    """Count the number of events covering each pixel."""
+    _, rows, c0, c1 = runs
+    diff = np.zeros((shape[0], shape[1] + 1), dtype=np.int32)
+    np.add.at(diff, (rows, c0), 1)
+    np.add.at(diff, (rows, c1), -1)
+    return np.cumsum(diff, axis=1)[:, :-1]
+
+
+def accumulate_latest(runs, shape):
+    """Find the last issued event covering each pixel.
+
+    Since the events are sorted by issuance, this is the largest event
+    index covering each pixel, -1 where nothing is found.
+    """
+    evidx, rows, c0, c1 = runs
+    best = np.full(shape[0] * shape[1], -1, dtype=np.int64)
+    lengths = c1 - c0
+    starts = rows * shape[1] + c0
+    # process in chunks of runs to bound the memory usage
+    bounds = np.searchsorted(
+        np.cumsum(lengths),
+        np.arange(CHUNK_PIXELS, lengths.sum(), CHUNK_PIXELS),
+    )
+    for sl in np.split(np.arange(len(lengths)), bounds):
+        cnt = lengths[sl]
+        offsets = np.arange(cnt.sum()) - np.repeat(np.cumsum(cnt) - cnt, cnt)
+        pixels = np.repeat(starts[sl], cnt) + offsets
+        np.maximum.at(best, pixels, np.repeat(evidx[sl], cnt))
+    return best.reshape(shape)
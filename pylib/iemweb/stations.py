@@ -0,0 +1,113 @@
+"""Process wide cache of the mesosite stations table.
+
+All stations are loaded once per process and indexed by network, iemid and
+time zone, so lookups are dictionary hits instead of a NetworkTable query
+per request.  The cache is versioned by ``max(modified)``, ``max(iemid)``
+and ``count(*)`` of the stations table, which is checked at most every
+CHECK_SECONDS and triggers a reload when it changes.
+
+``get_network_table`` returns an object with the ``sts`` dictionary of
+``pyiem.network.Table``, so it can be used as a drop in replacement.
+"""
+import threading
+import time
+
+from pyiem.util import get_dbconnc
+
+CHECK_SECONDS = 60
+_LOCK = threading.Lock()
+_CACHE = {
+    "version": None,
+    "checked": 0,
+    "bynetwork": {},
+    "byiemid": {},
+    "bytzname": {},
+}
+
+
+class StationTable:
+    """Minimal stand-in for pyiem.network.Table"""
+
+    def __init__(self, sts):
+        """Constructor."""
+        self.sts = sts
+
+
+def _get_version(cursor):
+    """Return the current version of the stations table."""
+    cursor.execute(
+        "SELECT max(modified) as mm, max(iemid) as mi, count(*) as cnt "
+        "from stations"
+    )
+    row = cursor.fetchone()
+    return (row["mm"], row["mi"], row["cnt"])
+
+
+def _load(cursor):
+    """Build the indexes from the database."""
+    cursor.execute(
+        "SELECT *, ST_x(geom) as lon, ST_y(geom) as lat from stations "
+        "ORDER by name ASC"
+    )
+    bynetwork = {}
+    byiemid = {}
+    bytzname = {}
+    for row in cursor:
+        row.pop("geom", None)
+        row["attributes"] = {}
+        bynetwork.setdefault(row["network"], {})[row["id"]] = row
+        byiemid[row["iemid"]] = row
+        bytzname.setdefault(row["tzname"], []).append(row)
+    cursor.execute("SELECT iemid, attr, value from station_attributes")
+    for row in cursor:
+        if row["iemid"] in byiemid:
+            byiemid[row["iemid"]]["attributes"][row["attr"]] = row["value"]
+    _CACHE["bynetwork"] = bynetwork
+    _CACHE["byiemid"] = byiemid
+    _CACHE["bytzname"] = bytzname
+
+
+def refresh(force=False):
+    """Reload the cache when the stations table has changed."""
+    with _LOCK:
+        if not force and time.time() - _CACHE["checked"] < CHECK_SECONDS:
+            return
+        pgconn, cursor = get_dbconnc("mesosite")
+        version = _get_version(cursor)
+        if force or version != _CACHE["version"]:
+            _load(cursor)
+            _CACHE["version"] = version
+        _CACHE["checked"] = time.time()
+        pgconn.close()
+
+
+def get_network_table(networks, only_online=False):
+    """Return a NetworkTable like object for one or more networks."""
+    refresh()
+    if isinstance(networks, str):
+        networks = [networks]
+    sts = {}
+    for network in networks:
+        for sid, meta in _CACHE["bynetwork"].get(network, {}).items():
+            if only_online and not meta["online"]:
+                continue
+            sts[sid] = meta
+    return StationTable(sts)
+
+
+def get_station(station, network):
+    """Return the metadata dictionary for the station, None if unknown."""
+    refresh()
+    return _CACHE["bynetwork"].get(network, {}).get(station)
+
+
+def get_station_by_iemid(iemid):
+    """Return the metadata dictionary for the iemid, None if unknown."""
+    refresh()
+    return _CACHE["byiemid"].get(iemid)
+
+
+def get_stations_by_tzname(tzname):
+    """Return the list of station metadata dictionaries in the time zone."""
+    refresh()
+    return _CACHE["bytzname"].get(tzname, [])
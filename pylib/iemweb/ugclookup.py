@@ -0,0 +1,56 @@
+"""Find UGC polygons containing a point without a per-request spatial query.
+
+The ``ugcs`` table (current and historical polygons) is fetched once per
+0.1 degree grid cell, with each polygon clipped to the (slightly padded)
+cell, and cached in process.  A point lookup is then an exact shapely
+containment test against the few small clipped polygons of its cell, so
+slightly varying coordinates from mobile clients share the database work.
+"""
+import time
+from functools import lru_cache
+
+import numpy as np
+from pyiem.util import get_dbconn
+from shapely import wkb
+from shapely.geometry import Point
+from shapely.prepared import prep
+
+CELL = 0.1
+# Pad the clip box so that points on a cell edge are within the interior
+PAD = 0.001
+# Refresh cells after this many seconds to pick up new UGC polygons
+MAXAGE = 86400
+
+
+@lru_cache(maxsize=4096)
+def _load_cell(ix, iy, _epoch):
+    """Fetch the clipped UGC polygons intersecting this grid cell."""
+    west = ix * CELL - PAD
+    south = iy * CELL - PAD
+    east = (ix + 1) * CELL + PAD
+    north = (iy + 1) * CELL + PAD
+    pgconn = get_dbconn("postgis")
+    cursor = pgconn.cursor()
+    cursor.execute(
+        """
+        WITH env as (SELECT ST_MakeEnvelope(%s, %s, %s, %s, 4326) as e)
+        SELECT gid, ST_AsBinary(ST_Intersection(geom, env.e)) from ugcs, env
+        WHERE geom && env.e and ST_Intersects(geom, env.e)
+        """,
+        (west, south, east, north),
+    )
+    res = [(gid, prep(wkb.loads(bytes(geom)))) for gid, geom in cursor]
+    pgconn.close()
+    return res
+
+
+def get_ugc_gids(lon, lat):
+    """Return the list of ugcs.gid values with a polygon containing the point.
+
+    Like ST_Contains, points on a polygon boundary are not included.
+    """
+    ix = int(np.floor(lon / CELL))
+    iy = int(np.floor(lat / CELL))
+    pt = Point(lon, lat)
+    cell = _load_cell(ix, iy, int(time.time() // MAXAGE))
+    return [gid for gid, geom in cell if geom.contains(pt)]
@@ -0,0 +1,197 @@
+"""Precomputed wind direction x speed counts for windroses.
+
+For each station, we store sparse counts keyed by local year, month, hour,
+wind direction and wind speed (both rounded to integers, which is lossless
+for ASOS reports).  Windroses that align to month boundaries can then be
+generated from a few thousand integers instead of every observation.
+
+The counts are maintained nightly by scripts/windrose/windrose_counts.py and
+used by scripts/windrose/make_windrose.py and cgi-bin/mywindrose.py, which
+only trusts counts refreshed within MAXAGE for the period of record.
+"""
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+from pyiem.util import logger, utc
+from pyiem.windrose_utils import windrose
+
+LOG = logger()
+COUNTS_DIR = "/mesonet/share/windrose/counts"
+# Trailing days recounted by each update to pick up late observations
+RECOUNT_DAYS = 7
+# Counts not refreshed within this long are considered out of date
+MAXAGE = datetime.timedelta(days=2)
+KEYS = ["year", "month", "hour", "drct", "sknt"]
+DTYPES = {
+    "year": np.int16,
+    "month": np.int8,
+    "hour": np.int8,
+    "drct": np.int16,
+    "sknt": np.int16,
+    "count": np.int32,
+}
+
+
+def get_countsfn(network, sid):
+    """Return the filename storing the counts for this station."""
+    return f"{COUNTS_DIR}/{network}/{sid}.npz"
+
+
+def counts_current(network, sid):
+    """Have the counts been refreshed within MAXAGE."""
+    fn = get_countsfn(network, sid)
+    if not os.path.isfile(fn):
+        return False
+    age = datetime.datetime.now().timestamp() - os.path.getmtime(fn)
+    return age < MAXAGE.total_seconds()
+
+
+def load_counts(network, sid):
+    """Load the counts for a station.
+
+    Returns:
+      (pd.DataFrame, last_valid) or (None, None) when no counts exist
+    """
+    fn = get_countsfn(network, sid)
+    if not os.path.isfile(fn):
+        return None, None
+    with np.load(fn) as npz:
+        df = pd.DataFrame({col: npz[col] for col in DTYPES})
+        last_valid = pd.Timestamp(int(npz["last_valid"]), unit="s", tz="UTC")
+    return df, last_valid
+
+
+def save_counts(network, sid, df, last_valid):
+    """Atomically write the counts for a station."""
+    fn = get_countsfn(network, sid)
+    os.makedirs(os.path.dirname(fn), exist_ok=True)
+    tmpfn = f"{fn}.{os.getpid()}.npz"
+    np.savez_compressed(
+        tmpfn,
+        last_valid=np.int64(last_valid.timestamp()),
+        **{
+            col: df[col].to_numpy(dtype=dtype) for col, dtype in DTYPES.items()
+        },
+    )
+    os.rename(tmpfn, fn)
+
+
+def update_counts(cursor, network, sid, tzname):
+    """Recount the recent months of observations for a station.
+
+    Observations can arrive late or be corrected, so the months overlapping
+    the trailing RECOUNT_DAYS before the last counted observation are
+    dropped and counted again from the database.
+
+    Args:
+      cursor: database cursor to the asos database
+      network (str): network identifier
+      sid (str): station identifier
+      tzname (str): station time zone, used for the month and hour keys
+
+    Returns:
+      number of observations counted
+    """
+    df, last_valid = load_counts(network, sid)
+    if df is None:
+        sts = utc(1900, 1, 1)
+    else:
+        # Start of the local month containing the recount window
+        sts = (
+            (last_valid - pd.Timedelta(days=RECOUNT_DAYS))
+            .tz_convert(tzname)
+            .replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        )
+        yyyymm = df["year"].to_numpy(dtype=int) * 100 + df["month"].to_numpy()
+        keep = yyyymm < sts.year * 100 + sts.month
+        recounted = not keep.all()
+        df = df[keep]
+    # Let the database do the aggregation, so only counts come back
+    cursor.execute(
+        """
+        SELECT extract(year from valid at time zone %s)::int as year,
+        extract(month from valid at time zone %s)::int as month,
+        extract(hour from valid at time zone %s)::int as hour,
+        round(drct)::int as drct, round(sknt)::int as sknt,
+        count(*), max(valid) from alldata WHERE station = %s and
+        valid >= %s and sknt >= 0 and drct >= 0 and report_type in (3, 4)
+        GROUP by 1, 2, 3, 4, 5
+        """,
+        (tzname, tzname, tzname, sid, sts),
+    )
+    if cursor.rowcount == 0:
+        if df is not None and recounted:
+            # The observations were removed, so drop their counts as well
+            save_counts(network, sid, df, last_valid)
+        elif df is not None:
+            # Nothing new, but the counts are current
+            os.utime(get_countsfn(network, sid))
+        return 0
+    newdf = pd.DataFrame(cursor.fetchall(), columns=[*KEYS, "count", "max"])
+    counted = int(newdf["count"].sum())
+    last_valid = newdf["max"].max()
+    newdf = newdf.drop(columns="max")
+    if df is not None:
+        newdf = pd.concat([df, newdf])
+    newdf = newdf.groupby(KEYS, as_index=False)["count"].sum()
+    save_counts(network, sid, newdf, pd.Timestamp(last_valid))
+    LOG.info(
+        "%s %s counted %s obs since %s through %s",
+        network,
+        sid,
+        counted,
+        sts,
+        last_valid,
+    )
+    return counted
+
+
+def filter_counts(df, months=None, hours=None, sts=None, ets=None):
+    """Subset the counts.
+
+    Args:
+      df (pd.DataFrame): counts as returned by load_counts
+      months (list, optional): months to limit to
+      hours (list, optional): local hours to limit to
+      sts (datetime, optional): inclusive start, must be a month boundary
+      ets (datetime, optional): exclusive end, must be a month boundary
+    """
+    mask = np.ones(len(df.index), dtype=bool)
+    if months is not None:
+        mask &= df["month"].isin(months).to_numpy()
+    if hours is not None:
+        mask &= df["hour"].isin(hours).to_numpy()
+    yyyymm = df["year"].to_numpy(dtype=int) * 100 + df["month"].to_numpy()
+    if sts is not None:
+        mask &= yyyymm >= sts.year * 100 + sts.month
+    if ets is not None:
+        mask &= yyyymm < ets.year * 100 + ets.month
+    return df[mask]
+
+
+def counts_windrose(sid, df, **kwargs):
+    """Generate a windrose from (filtered) counts.
+
+    The counts are expanded back into observations, which only costs an
+    np.repeat, and handed to pyiem's windrose for consistent rendering.
+    """
+    counts = df["count"].to_numpy()
+    valid = pd.to_datetime(
+        pd.DataFrame(
+            {
+                "year": df["year"],
+                "month": df["month"],
+                "day": 1,
+                "hour": df["hour"],
+            }
+        )
+    ).to_numpy()
+    return windrose(
+        sid,
+        sknt=np.repeat(df["sknt"].to_numpy(dtype=float), counts),
+        drct=np.repeat(df["drct"].to_numpy(dtype=float), counts),
+        valid=np.repeat(valid, counts),
+        **kwargs,
+    )
@@ -0,0 +1,44 @@
+"""Stream a zip file as its entries are generated.
+
+zipfile only needs a ``write`` method on its output.  With an unseekable
+output it writes each entry with a data descriptor, so every compressed
+entry can be sent to the client as soon as it is done instead of building
+the whole archive in memory.
+"""
+import zipfile
+
+
+class ChunkWriter:
+    """Unseekable file-like object collecting what zipfile writes."""
+
+    def __init__(self):
+        """Constructor."""
+        self.chunks = []
+
+    def write(self, data):
+        """Collect the data."""
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        """Nothing to do."""
+
+    def pop(self):
+        """Return and clear what has been written so far."""
+        res = b"".join(self.chunks)
+        self.chunks = []
+        return res
+
+
+def stream_zip(entries):
+    """Yield the bytes of a zip file containing the entries.
+
+    Args:
+      entries: iterable of (filename, str or bytes content)
+    """
+    writer = ChunkWriter()
+    with zipfile.ZipFile(writer, "w", zipfile.ZIP_DEFLATED) as zfp:
+        for fn, content in entries:
+            zfp.writestr(fn, content)
+            yield writer.pop()
+    yield writer.pop()
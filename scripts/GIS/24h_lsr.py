@@ -1,6 +1,6 @@
 """Dump 24 hour LSRs to a file.
 
-Called from RUN_5MIN.sh
+Called from run_jobs.py 5min
 """
 import datetime
 import os
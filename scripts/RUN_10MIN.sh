@@ -3,14 +3,16 @@
 cd current
 python vsby.py
 python today_precip.py
-python today_gust.py
 python temperature.py
-python today_high.py
+python today_maps.py
 python rwis_station.py
 
 cd ../dbutil
 timeout -v 540 python asos2archive.py &
 
+cd ../sbw
+python rasterize_sbw.py &
+
 cd ../ingestors
 python dot_truckcams.py &
 
@@ -65,6 +65,7 @@ if [ $DD -eq "15" ]
 fi
 
 cd ../../windrose
+python windrose_counts.py &
 python daily_drive_network.py &
 
 cd ../yieldfx
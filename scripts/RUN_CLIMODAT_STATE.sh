@@ -8,6 +8,8 @@ python dbutil/compute_climate_sts.py ${STATE}CLIMATE
 python climodat/use_acis.py $STATE
 # 4. Look for any gaps that need estimating
 python climodat/estimate_missing.py $STATE
+# 4b. Rebuild the per-station columnar cache
+python climodat/update_cache.py $STATE full
 # 5. Sync our COOP archives the same
 python coop/use_acis.py $STATE
 # 6. Sync our IEMAccess (ASOS) archives
@@ -30,6 +30,8 @@ python compute4regions.py $(date --date '1 days ago'  +'%Y %m %d')
 python hrrr_solarrad.py $(date --date '1 days ago'  +'%Y %m %d')
 # Sync any coop data that may have updated over the past 24 hours
 python sync_coop_updates.py
+# Refresh the per-station cache used by the climodat autoplots
+python update_cache.py
 
 cd ../iemre
 # Since we have now adjusted the 12z precip 1 day ago, we should rerun
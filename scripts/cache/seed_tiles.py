@@ -0,0 +1,91 @@
+"""Pre-seed the low zoom tiles of freshly landed realtime composites.
+
+Requests the tiles for the timestamp of the current realtime product, which
+htdocs/c/rtile.py then writes into its persistent tile store.  So both the
+realtime view and later replays of the event are served from disk.  Only
+tiles rendered from the archive file are stored, so a product that has not
+reached the archive yet is skipped.
+
+Run from run_jobs.py 5min
+"""
+import json
+import math
+import os
+from datetime import datetime
+
+import requests
+from pyiem.util import logger
+
+LOG = logger()
+BASEURL = "http://iem.local/c/rtile.py/1.0.0"
+LDMDATA = "/mesonet/ldmdata/gis/images/4326"
+ARCHIVE = "/mesonet/ARCHIVE/data/%Y/%m/%d/GIS"
+MAXZOOM = 6
+# layer, realtime metadata file, archive template, (west, south, east, north)
+LAYERS = [
+    (
+        "ridge::USCOMP-N0Q",
+        f"{LDMDATA}/USCOMP/n0q_0.json",
+        f"{ARCHIVE}/uscomp/n0q_%Y%m%d%H%M.png",
+        (-126, 23, -65, 50),
+    ),
+    (
+        "mrms::P1H",
+        f"{LDMDATA}/mrms/p1h.json",
+        f"{ARCHIVE}/mrms/p1h_%Y%m%d%H%M.png",
+        (-130, 20, -60, 55),
+    ),
+]
+
+
+def lonlat2tile(lon, lat, z):
+    """Convert a longitude and latitude into a tile x, y."""
+    n = 2**z
+    x = int((lon + 180.0) / 360.0 * n)
+    rad = math.radians(lat)
+    y = int((1.0 - math.asinh(math.tan(rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def get_valid(fn):
+    """Get the timestamp of the realtime product."""
+    with open(fn, encoding="utf-8") as fh:
+        meta = json.load(fh)["meta"]
+    valid = meta.get("valid", meta.get("end_valid"))
+    return datetime.strptime(valid, "%Y-%m-%dT%H:%M:%SZ")
+
+
+def seed(sess, layer, valid, bounds):
+    """Seed the tiles for this layer."""
+    fails = 0
+    total = 0
+    for z in range(MAXZOOM + 1):
+        x0, y0 = lonlat2tile(bounds[0], bounds[3], z)
+        x1, y1 = lonlat2tile(bounds[2], bounds[1], z)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                url = f"{BASEURL}/{layer}-{valid:%Y%m%d%H%M}/{z}/{x}/{y}.png"
+                total += 1
+                req = sess.get(url, timeout=30)
+                if req.status_code != 200:
+                    fails += 1
+                    LOG.info("got status_code %s for %s", req.status_code, url)
+    LOG.info("%s %s seeded %s tiles, %s failed", layer, valid, total, fails)
+
+
+def main():
+    """Go Main Go."""
+    with requests.Session() as sess:
+        for layer, fn, template, bounds in LAYERS:
+            if not os.path.isfile(fn):
+                LOG.info("%s is missing", fn)
+                continue
+            valid = get_valid(fn)
+            if not os.path.isfile(valid.strftime(template)):
+                LOG.info("%s %s not yet archived", layer, valid)
+                continue
+            seed(sess, layer, valid, bounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ pre-generate them and allow folks to download.
     This is a cron job from RUN_2AM.sh
 """
 import datetime
+import os
 import sys
 
 import requests
@@ -27,15 +28,18 @@ def get_uri(uri, localfn):
             req.content,
         )
         return
-    with open(localfn, "wb") as fh:
+    # watchwarn.py serves these files, so replace them atomically
+    with open(f"{localfn}.tmp", "wb") as fh:
         fh.write(req.content)
+    os.rename(f"{localfn}.tmp", localfn)
 
 
 def get_files(year):
     """Go get our files and then cache them!"""
+    # cache=no, so that we do not get our own previous bundle back
     myuri = (
-        f"{URL}?simple=yes&year1={year}&month1=1&day1=1&hour1=0&minute1=0"
-        f"&year2={year}&month2=12&day2=31&hour2=23&minute2=59"
+        f"{URL}?simple=yes&cache=no&year1={year}&month1=1&day1=1&hour1=0"
+        f"&minute1=0&year2={year}&month2=12&day2=31&hour2=23&minute2=59"
     )
     get_uri(myuri, f"{FINAL}/{year}_all.zip")
 
@@ -5,7 +5,7 @@ Run for a previous date from RUN_2AM.sh
 import datetime
 import sys
 
-from pyiem.network import Table as NetworkTable
+from iemweb.stations import get_network_table
 from pyiem.reference import state_names
 from pyiem.util import get_dbconnc, logger
 
@@ -43,7 +43,7 @@ def daily_averages(table, ts):
         sday_limiter = f" and sday = '{ts:%m%d}' "
         day_limiter = f" and valid = '2000-{ts:%m-%d}' "
     for st in state_names:
-        nt = NetworkTable(f"{st}CLIMATE")
+        nt = get_network_table(f"{st}CLIMATE", only_online=True)
         if not nt.sts:
             LOG.info("Skipping %s as it has no stations", st)
             continue
@@ -0,0 +1,30 @@
+"""Refresh the per-station columnar cache of climodat data.
+
+Without arguments, the trailing days of every state are refreshed, called
+from RUN_NOON.sh after the daily estimator and COOP sync.  With a state and
+``full``, that state's complete record is rebuilt, called from
+RUN_CLIMODAT_STATE.sh after the ACIS sync.
+
+    python update_cache.py [state] [full]
+"""
+import sys
+
+from iemweb.climodat import update_state
+from pyiem.reference import state_names
+from pyiem.util import get_sqlalchemy_conn, logger
+
+LOG = logger()
+
+
+def main(argv):
+    """Go Main"""
+    states = [argv[1]] if len(argv) > 1 else list(state_names)
+    full = len(argv) > 2 and argv[2] == "full"
+    with get_sqlalchemy_conn("coop") as conn:
+        for state in states:
+            count = update_state(conn, state, full=full)
+            LOG.info("%s updated %s stations, full: %s", state, count, full)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -1,16 +1,8 @@
 """Create an analysis of LSR snowfall reports"""
-import os
-import subprocess
-import tempfile
+from zoneinfo import ZoneInfo
 
-import requests
-from pyiem.util import (
-    exponential_backoff,
-    get_dbconn,
-    get_properties,
-    logger,
-    utc,
-)
+from iemweb.batchplot import run_batch
+from pyiem.util import get_dbconn, get_properties, logger, utc
 
 LOG = logger()
 
@@ -41,42 +33,27 @@ def website_enable_check():
     mesosite.commit()
 
 
-def do(url, fn):
-    """Do the work."""
-    res = exponential_backoff(requests.get, url, timeout=60)
-    if res is None:
-        LOG.info("%s failure", url)
-        return
-    if res.status_code != 200:
-        LOG.info("%s resulted in %s", url, res.status_code)
-        return
-    with tempfile.NamedTemporaryFile(delete=False) as tmpfd:
-        tmpfd.write(res.content)
-    pqstr = f"plot c {utc():%Y%m%d%H%M} {fn} bogus{utc().second} png"
-    subprocess.call(["pqinsert", "-i", "-p", pqstr, tmpfd.name])
-    os.unlink(tmpfd.name)
-
-
 def main():
     """Go Main Go."""
-    url = (
-        "http://iem.local/plotting/auto/plot/207/t:state::csector:IA"
-        "::p:both::hours:12::sz:25.png"
-    )
-    do(url, "lsr_snowfall.png")
-
-    url = (
-        "http://iem.local/plotting/auto/plot/207/t:state::csector:IA"
-        "::p:contour::hours:12::sz:25.png"
-    )
-    do(url, "lsr_snowfall_nv.png")
-
-    # -----------------
-    url = (
-        "http://iem.local/plotting/auto/plot/207/t:state::csector:midwest"
-        "::p:contour::hours:12::sz:25.png"
-    )
-    do(url, "mw_lsr_snowfall.png")
+    now = utc()
+    # Pin the end time so that the Iowa maps share their data query, the
+    # autoplot takes this in the central time zone
+    endts = now.astimezone(ZoneInfo("America/Chicago"))
+    base = f"t:state::hours:12::sz:25::endts:{endts:%Y/%m/%d %H%M}::"
+    jobs = []
+    for fdict, fn in [
+        ("csector:IA::p:both", "lsr_snowfall.png"),
+        ("csector:IA::p:contour", "lsr_snowfall_nv.png"),
+        ("csector:midwest::p:contour", "mw_lsr_snowfall.png"),
+    ]:
+        jobs.append(
+            {
+                "appid": 207,
+                "fdict": f"{base}{fdict}",
+                "pqstr": f"plot c {now:%Y%m%d%H%M} {fn} bogus{now.second} png",
+            }
+        )
+    run_batch(jobs)
 
     website_enable_check()
 
@@ -1,33 +1,32 @@
 """Generate analysis of Peak Wind Gust."""
 import datetime
-import os
-import subprocess
-import tempfile
+import sys
 
-import requests
+from iemweb.batchplot import run_batch
 
 
-def main():
-    """Go Main Go"""
+def get_jobs(_argv):
+    """Return the autoplot jobs to render."""
     now = datetime.datetime.now()
-
-    service = (
-        "http://iem.local/plotting/auto/plot/206/t:state::network:WFO"
-        f"::wfo:DMX::state:IA::v:max_gust::p:both::day:{now:%Y-%m-%d}::"
-        "cmap:gist_stern_r::_cb:1.png"
-    )
-
-    req = requests.get(service, timeout=60)
-    tmpfd = tempfile.NamedTemporaryFile(delete=False)
-    tmpfd.write(req.content)
-    tmpfd.close()
-
-    pqstr = "plot ac %s summary/today_gust.png iowa_wind_gust.png png" % (
-        now.strftime("%Y%m%d%H%M"),
-    )
-    subprocess.call(["pqinsert", "-i", "-p", pqstr, tmpfd.name])
-    os.unlink(tmpfd.name)
+    return [
+        {
+            "appid": 206,
+            "fdict": (
+                "t:state::network:WFO::wfo:DMX::state:IA::v:max_gust::"
+                f"p:both::day:{now:%Y-%m-%d}::cmap:gist_stern_r"
+            ),
+            "pqstr": (
+                f"plot ac {now:%Y%m%d%H%M} summary/today_gust.png "
+                "iowa_wind_gust.png png"
+            ),
+        }
+    ]
+
+
+def main(argv):
+    """Go Main Go"""
+    run_batch(get_jobs(argv))
 
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv)
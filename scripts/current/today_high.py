@@ -1,30 +1,38 @@
 """High Temperature.
 
-RUN_10MIN.sh
+RUN_10MIN.sh via today_maps.py
 """
 import datetime
 import sys
 
-from pyiem.util import web2ldm
+from iemweb.batchplot import run_batch
 
 
-def main(argv):
-    """Go Main Go"""
+def get_jobs(argv):
+    """Return the autoplot jobs to render."""
     now = datetime.date.today()
     mode = "ac"
     if len(argv) == 4:
         now = datetime.date(int(argv[1]), int(argv[2]), int(argv[3]))
         mode = "a"
+    return [
+        {
+            "appid": 206,
+            "fdict": (
+                "t:state::state:IA::v:max_tmpf::p:both::"
+                f"day:{now:%Y-%m-%d}::cmap:jet::_r:43"
+            ),
+            "pqstr": (
+                f"plot {mode} {now:%Y%m%d0000} summary/iowa_asos_high.png "
+                "iowa_asos_high.png png"
+            ),
+        }
+    ]
+
 
-    url = (
-        "http://iem.local/plotting/auto/plot/206/t:state::state:IA::"
-        f"v:max_tmpf::p:both::day:{now:%Y-%m-%d}::cmap:jet::_r:43::_cb:1.png"
-    )
-    pqstr = (
-        f"plot {mode} {now:%Y%m%d0000} summary/iowa_asos_high.png "
-        "iowa_asos_high.png png"
-    )
-    web2ldm(url, pqstr)
+def main(argv):
+    """Go Main Go"""
+    run_batch(get_jobs(argv))
 
 
 if __name__ == "__main__":
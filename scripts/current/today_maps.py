@@ -0,0 +1,19 @@
+"""Render the autoplot driven maps of today's ASOS data in one batch.
+
+Both maps come from autoplot 206 for the same day, so the data query is
+shared.  RUN_10MIN.sh
+"""
+import sys
+
+import today_gust
+import today_high
+from iemweb.batchplot import run_batch
+
+
+def main(argv):
+    """Go Main Go"""
+    run_batch(today_high.get_jobs(argv) + today_gust.get_jobs(argv))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
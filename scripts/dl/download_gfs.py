@@ -3,17 +3,36 @@
 At 2GB per run, we don't have capacity to archive this all.  So we save 1-2
 days worth of data into /mesonet/tmp/gfs/
 
-RUN from RUN_20_AFTER.sh
+RUN from run_jobs.py 20_after
 """
 import datetime
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
-import requests
-from pyiem.util import exponential_backoff, logger, utc
+from iemweb.gribdl import fetch_messages, get_messages
+from pyiem.util import logger, utc
 
 LOG = logger()
 BASEDIR = "/mesonet/tmp/gfs"
+# Number of forecast hours downloaded at once
+WORKERS = 4
+FILTERS = [
+    # Precip and high/low temp
+    (["PRATE", "TMAX", "TMIN"], "*", "*"),
+    (["ULWRF", "DSWRF"], "surface", "?*ave fcst*"),
+    # Save soil temp and water at surface, 10cm and 40cm
+    (
+        ["TSOIL", "SOILW"],
+        [
+            "0-0.1 m below ground",
+            "0.1-0.4 m below ground",
+            "0.4-1 m below ground",
+            "1-2 m below ground",
+        ],
+        "*",
+    ),
+]
 
 
 def cull(valid):
@@ -40,58 +59,20 @@ def fetch(valid, hr):
     baseurl = "https://ftpprd.ncep.noaa.gov/data/nccf/com/gfs/prod/"
     if (utc() - valid) > datetime.timedelta(days=2):
         baseurl = "https://s3.amazonaws.com/noaa-gfs-bdp-pds/"
-    uri = valid.strftime(
-        f"{baseurl}gfs.%Y%m%d/%H/atmos/gfs.t%Hz.sfluxgrbf{hr:03.0f}.grib2.idx"
+    url = valid.strftime(
+        f"{baseurl}gfs.%Y%m%d/%H/atmos/gfs.t%Hz.sfluxgrbf{hr:03.0f}.grib2"
     )
-    req = exponential_backoff(requests.get, uri, timeout=30)
-    if req is None or req.status_code != 200:
-        LOG.info("failed to get idx: %s", uri)
+    messages = get_messages(url, FILTERS)
+    if not messages:
         return
 
-    offsets = []
-    neednext = False
-    for line in req.content.decode("utf-8").split("\n"):
-        tokens = line.split(":")
-        if len(tokens) < 3:
-            continue
-        if neednext:
-            offsets[-1].append(int(tokens[1]))
-            neednext = False
-        # Precip and high/low temp
-        if tokens[3] in ["PRATE", "TMAX", "TMIN"]:
-            offsets.append([int(tokens[1])])
-            neednext = True
-        elif tokens[3] in ["ULWRF", "DSWRF"]:
-            if tokens[4] == "surface" and tokens[5].find("ave fcst") > 0:
-                offsets.append([int(tokens[1])])
-                neednext = True
-        # Save soil temp and water at surface, 10cm and 40cm
-        elif tokens[3] in ["TSOIL", "SOILW"]:
-            if tokens[4] in [
-                "0-0.1 m below ground",
-                "0.1-0.4 m below ground",
-                "0.4-1 m below ground",
-                "1-2 m below ground",
-            ]:
-                offsets.append([int(tokens[1])])
-                neednext = True
-
     fn = valid.strftime(
         f"{BASEDIR}/%Y%m%d%H/gfs.t%Hz.sfluxgrbf{hr:03.0f}.grib2"
     )
     LOG.info("writing %s", fn)
-    if len(offsets) != 13 and hr > 0:
-        LOG.warning("found %s gribs for %s[%s]", len(offsets), valid, hr)
-    for pr in offsets:
-        headers = {"Range": f"bytes={pr[0]}-{pr[1]}"}
-        req = exponential_backoff(
-            requests.get, uri[:-4], headers=headers, timeout=30
-        )
-        if req is None:
-            LOG.warning("failure for uri: %s", uri)
-            continue
-        with open(fn, "ab") as fh:
-            fh.write(req.content)
+    if len(messages) != 13 and hr > 0:
+        LOG.warning("found %s gribs for %s[%s]", len(messages), valid, hr)
+    fetch_messages(url, messages, fn)
 
 
 def main(argv):
@@ -101,10 +82,14 @@ def main(argv):
     if ts.hour % 6 != 0:
         return
     times = [ts, ts - datetime.timedelta(hours=6)]
-    for ts in times:
-        for hr in range(0, 385, 6):
-            if need_to_run(ts, hr):
-                fetch(ts, hr)
+    queue = [
+        (valid, hr)
+        for valid in times
+        for hr in range(0, 385, 6)
+        if need_to_run(valid, hr)
+    ]
+    with ThreadPoolExecutor(WORKERS) as executor:
+        list(executor.map(lambda x: fetch(*x), queue))
     # now cull old content
     for hr in range(72, 97, 6):
         cull(ts - datetime.timedelta(hours=hr))
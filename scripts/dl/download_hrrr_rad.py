@@ -9,11 +9,10 @@ import datetime
 import os
 import subprocess
 import sys
-import tempfile
 
 import pygrib
-import requests
-from pyiem.util import exponential_backoff, logger, utc
+from iemweb.gribdl import fetch_messages, get_messages
+from pyiem.util import logger, utc
 
 LOG = logger()
 
@@ -44,50 +43,24 @@ def fetch(valid):
     baseuri = "https://nomads.ncep.noaa.gov/pub/data/nccf/com/hrrr/prod"
     if valid < utc() - datetime.timedelta(days=1):
         baseuri = "https://noaa-hrrr-bdp-pds.s3.amazonaws.com"
-    uri = valid.strftime(
-        f"{baseuri}/hrrr.%Y%m%d/conus/hrrr.t%Hz.wrfsubhf01.grib2.idx"
+    url = valid.strftime(
+        f"{baseuri}/hrrr.%Y%m%d/conus/hrrr.t%Hz.wrfsubhf01.grib2"
     )
-    req = exponential_backoff(requests.get, uri, timeout=30)
-    if req is None or req.status_code != 200:
-        LOG.warning("failed to get idx %s", uri)
+    messages = get_messages(url, [("DSWRF", "*", "*ave fcst*")])
+    if not messages:
+        LOG.warning("failed to find messages for %s", url)
         return
-
-    offsets = []
-    neednext = False
-    for line in req.content.decode("utf-8").split("\n"):
-        tokens = line.split(":")
-        if len(tokens) < 3:
-            continue
-        if neednext:
-            offsets[-1].append(int(tokens[1]))
-            neednext = False
-        if (
-            tokens[3]
-            in [
-                "DSWRF",
-            ]
-            and tokens[5].find("ave fcst") > -1
-        ):
-            offsets.append([int(tokens[1])])
-            neednext = True
     pqstr = valid.strftime(
         "data u %Y%m%d%H00 bogus model/hrrr/%H/hrrr.t%Hz.3kmf01.grib2 grib2"
     )
 
-    if len(offsets) != 4:
-        LOG.warning("warning, found %s gribs for %s", len(offsets), valid)
-    for pr in offsets:
-        headers = {"Range": f"bytes={pr[0]}-{pr[1]}"}
-        req = exponential_backoff(
-            requests.get, uri[:-4], headers=headers, timeout=30
-        )
-        if req is None:
-            LOG.info("failure for uri: %s", uri)
-            continue
-        with tempfile.NamedTemporaryFile(delete=False) as tmpfd:
-            tmpfd.write(req.content)
-        subprocess.call(["pqinsert", "-p", pqstr, tmpfd.name])
-        os.unlink(tmpfd.name)
+    if len(messages) != 4:
+        LOG.warning("warning, found %s gribs for %s", len(messages), valid)
+    tmpfn = f"/tmp/hrrr_rad_{valid:%Y%m%d%H}.grib2"
+    if not fetch_messages(url, messages, tmpfn):
+        return
+    subprocess.call(["pqinsert", "-p", pqstr, tmpfn])
+    os.unlink(tmpfn)
 
 
 def main(argv):
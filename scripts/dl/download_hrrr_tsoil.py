@@ -8,13 +8,26 @@ import datetime
 import os
 import subprocess
 import sys
-import tempfile
 
 import pygrib
-import requests
-from pyiem.util import exponential_backoff, logger, utc
+from iemweb.gribdl import fetch_messages, get_messages
+from pyiem.util import logger, utc
 
 LOG = logger()
+# Save soil temp and water at surface, 10cm and 40cm
+FILTERS = [
+    (
+        ["TSOIL", "SOILW"],
+        [
+            "0-0 m below ground",
+            "0.1-0.1 m below ground",
+            "0.3-0.3 m below ground",
+            "0.6-0.6 m below ground",
+            "1-1 m below ground",
+        ],
+        "*",
+    ),
+]
 
 
 def need_to_run(valid):
@@ -44,54 +57,25 @@ def fetch(valid):
     baseuri = "https://nomads.ncep.noaa.gov/pub/data/nccf/com/hrrr/prod"
     if valid < utc() - datetime.timedelta(days=1):
         baseuri = "https://noaa-hrrr-bdp-pds.s3.amazonaws.com"
-    uri = valid.strftime(
-        f"{baseuri}/hrrr.%Y%m%d/conus/hrrr.t%Hz.wrfprsf00.grib2.idx"
+    url = valid.strftime(
+        f"{baseuri}/hrrr.%Y%m%d/conus/hrrr.t%Hz.wrfprsf00.grib2"
     )
-    req = exponential_backoff(requests.get, uri, timeout=30)
-    if req is None or req.status_code != 200:
-        LOG.info("failed to get idx %s", uri)
+    messages = get_messages(url, FILTERS)
+    if not messages:
+        LOG.info("failed to find messages for %s", url)
         return
 
-    offsets = []
-    neednext = False
-    for line in req.content.decode("utf-8").split("\n"):
-        tokens = line.split(":")
-        if len(tokens) < 3:
-            continue
-        if neednext:
-            offsets[-1].append(int(tokens[1]))
-            neednext = False
-        # Save soil temp and water at surface, 10cm and 40cm
-        if tokens[3] in ["TSOIL", "SOILW"]:
-            if tokens[4] in [
-                "0-0 m below ground",
-                "0.1-0.1 m below ground",
-                "0.3-0.3 m below ground",
-                "0.6-0.6 m below ground",
-                "1-1 m below ground",
-            ]:
-                offsets.append([int(tokens[1])])
-                neednext = True
-
     pqstr = valid.strftime(
         "data u %Y%m%d%H00 bogus model/hrrr/%H/hrrr.t%Hz.3kmf00.grib2 grib2"
     )
 
-    if len(offsets) != 10:
-        LOG.warning("warning, found %s gribs for %s", len(offsets), valid)
-    for pr in offsets:
-        headers = {"Range": f"bytes={pr[0]}-{pr[1]}"}
-        req = exponential_backoff(
-            requests.get, uri[:-4], headers=headers, timeout=30
-        )
-        if req is None:
-            LOG.info("failure for uri: %s", uri)
-            continue
-        tmpfd = tempfile.NamedTemporaryFile(delete=False)
-        tmpfd.write(req.content)
-        tmpfd.close()
-        subprocess.call(["pqinsert", "-p", pqstr, tmpfd.name])
-        os.unlink(tmpfd.name)
+    if len(messages) != 10:
+        LOG.warning("warning, found %s gribs for %s", len(messages), valid)
+    tmpfn = f"/tmp/hrrr_tsoil_{valid:%Y%m%d%H}.grib2"
+    if not fetch_messages(url, messages, tmpfn):
+        return
+    subprocess.call(["pqinsert", "-p", pqstr, tmpfn])
+    os.unlink(tmpfn)
 
 
 def main(argv):
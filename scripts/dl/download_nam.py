@@ -3,13 +3,25 @@ import datetime
 import os
 import subprocess
 import sys
-import tempfile
 
 import pygrib
-import requests
-from pyiem.util import exponential_backoff, logger
+from iemweb.gribdl import fetch_messages, get_messages
+from pyiem.util import logger
 
 LOG = logger()
+FILTERS = [
+    (["ULWRF", "DSWRF"], "surface", "?*ave fcst*"),
+    # Save soil temp and water at surface, 10cm and 40cm
+    (
+        ["TSOIL", "SOILW"],
+        [
+            "0-0.1 m below ground",
+            "0.1-0.4 m below ground",
+            "0.4-1 m below ground",
+        ],
+        "*",
+    ),
+]
 
 
 def need_to_run(valid, hr):
@@ -32,58 +44,29 @@ def need_to_run(valid, hr):
 
 def fetch(valid, hr):
     """Fetch the data for this timestamp"""
-    uri = valid.strftime(
+    url = valid.strftime(
         "https://nomads.ncep.noaa.gov/pub/data/nccf/com/nam/prod/"
-        f"nam.%Y%m%d/nam.t%Hz.conusnest.hiresf0{hr}.tm00.grib2.idx"
+        f"nam.%Y%m%d/nam.t%Hz.conusnest.hiresf0{hr}.tm00.grib2"
     )
-    req = exponential_backoff(requests.get, uri, timeout=30)
-    if req is None or req.status_code != 200:
-        LOG.info("failed to get idx: %s", uri)
+    messages = get_messages(url, FILTERS)
+    if not messages:
+        LOG.info("failed to find messages for %s", url)
         return
 
-    offsets = []
-    neednext = False
-    for line in req.content.decode("utf-8").split("\n"):
-        tokens = line.split(":")
-        if len(tokens) < 3:
-            continue
-        if neednext:
-            offsets[-1].append(int(tokens[1]))
-            neednext = False
-        if tokens[3] in ["ULWRF", "DSWRF"]:
-            if tokens[4] == "surface" and tokens[5].find("ave fcst") > 0:
-                offsets.append([int(tokens[1])])
-                neednext = True
-        # Save soil temp and water at surface, 10cm and 40cm
-        if tokens[3] in ["TSOIL", "SOILW"]:
-            if tokens[4] in [
-                "0-0.1 m below ground",
-                "0.1-0.4 m below ground",
-                "0.4-1 m below ground",
-            ]:
-                offsets.append([int(tokens[1])])
-                neednext = True
-
     pqstr = valid.strftime(
         "data u %Y%m%d%H00 bogus model/nam/"
         f"%H/nam.t%Hz.conusnest.hiresf0{hr}.tm00.grib2 grib2"
     )
 
-    if len(offsets) != 8:
-        LOG.info("warning, found %s gribs for %s[%s]", len(offsets), valid, hr)
-    for pr in offsets:
-        headers = {"Range": f"bytes={pr[0]}-{pr[1]}"}
-        req = exponential_backoff(
-            requests.get, uri[:-4], headers=headers, timeout=30
+    if len(messages) != 8:
+        LOG.info(
+            "warning, found %s gribs for %s[%s]", len(messages), valid, hr
         )
-        if req is None:
-            LOG.info("failure for uri: %s", uri)
-            continue
-        tmpfd = tempfile.NamedTemporaryFile(delete=False)
-        tmpfd.write(req.content)
-        tmpfd.close()
-        subprocess.call(["pqinsert", "-p", pqstr, tmpfd.name])
-        os.unlink(tmpfd.name)
+    tmpfn = f"/tmp/nam_{valid:%Y%m%d%H}_{hr}.grib2"
+    if not fetch_messages(url, messages, tmpfn):
+        return
+    subprocess.call(["pqinsert", "-p", pqstr, tmpfn])
+    os.unlink(tmpfn)
 
 
 def main():
@@ -11,6 +11,7 @@ import tempfile
 
 import pygrib
 import requests
+from iemweb.gribdl import fetch_messages, get_messages
 from pyiem.util import exponential_backoff, logger, utc
 
 LOG = logger()
@@ -72,43 +73,21 @@ def fetch(dt):
     if os.path.isfile(localfn):
         LOG.info("Skipping as we have data %s", localfn)
         return
-    uri = (
+    url = (
         "https://nomads.weather.gov/pub/data/nccf/com/rtma/prod/"
-        f"rtma2p5_ru.{dt:%Y%m%d}/rtma2p5_ru.t{dt:%H%M}z.2dvaranl_ndfd.grb2.idx"
+        f"rtma2p5_ru.{dt:%Y%m%d}/rtma2p5_ru.t{dt:%H%M}z.2dvaranl_ndfd.grb2"
     )
-    req = exponential_backoff(requests.get, uri, timeout=30)
-    if req is None or req.status_code != 200:
-        LOG.info("failed to get idx: %s", uri)
+    messages = get_messages(url, [(["TMP", "DPT"], "*", "*")])
+    if messages is None:
         return
 
-    offsets = []
-    neednext = False
-    for line in req.content.decode("utf-8").split("\n"):
-        tokens = line.split(":")
-        if len(tokens) < 3:
-            continue
-        if neednext:
-            offsets[-1].append(int(tokens[1]))
-            neednext = False
-        # Precip and high/low temp
-        if tokens[3] in ["TMP", "DPT"]:
-            offsets.append([int(tokens[1])])
-            neednext = True
-
-    if len(offsets) != 2:
+    if len(messages) != 2:
         LOG.info("Failed to find required gribs")
         return
 
-    with tempfile.NamedTemporaryFile(mode="wb", delete=False) as tmpfp:
-        for pr in offsets:
-            headers = {"Range": f"bytes={pr[0]}-{pr[1]}"}
-            req = exponential_backoff(
-                requests.get, uri[:-4], headers=headers, timeout=30
-            )
-            if req is None:
-                LOG.warning("failure for uri: %s", uri)
-                continue
-            tmpfp.write(req.content)
+    tmpfn = f"/tmp/rtma_ru_{dt:%Y%m%d%H%M}.grb2"
+    if not fetch_messages(url, messages, tmpfn):
+        return
     cmd = [
         "pqinsert",
         "-i",
@@ -117,11 +96,11 @@ def fetch(dt):
             f"data a {dt:%Y%m%d%H%M} bogus model/rtma/"
             f"{dt:%H}/{localfn.split('/')[-1]} grib2"
         ),
-        tmpfp.name,
+        tmpfn,
     ]
     LOG.info(" ".join(cmd))
     subprocess.call(cmd)
-    os.unlink(tmpfp.name)
+    os.unlink(tmpfn)
 
 
 def main(argv):
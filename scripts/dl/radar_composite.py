@@ -1,6 +1,6 @@
 """Write NEXRAD composite sector views to archive.
 
-run from RUN_5MIN.sh
+run from run_jobs.py 5min
 """
 import datetime
 import os
@@ -9,9 +9,9 @@ from datetime import date, timedelta
 
 import numpy as np
 import pygrib
+from iemweb.regrid import nn_regrid
 from pyiem import iemre
 from pyiem.util import logger, ncopen, utc
-from scipy.interpolate import NearestNDInterpolator
 
 LOG = logger()
 
@@ -154,16 +154,18 @@ def merge_grib(nc, now):
             days = (fxtime.date() - now.date()).days - 1
             if hits == 4:
                 LOG.info("Writing %s, days=%s", fxtime, days)
-                nn = NearestNDInterpolator((lons, lats), np.ravel(tmaxgrid))
-                nc.variables["high_tmpk"][days, :, :] = nn(xi, yi)
-                nn = NearestNDInterpolator((lons, lats), np.ravel(tmingrid))
-                nc.variables["low_tmpk"][days, :, :] = nn(xi, yi)
-                nn = NearestNDInterpolator((lons, lats), np.ravel(pgrid))
-                nc.variables["p01d"][days, :, :] = nn(xi, yi)
-                nn = NearestNDInterpolator(
-                    (lons, lats), np.ravel(tsoilgrid / 4.0)
+                nc.variables["high_tmpk"][days, :, :] = nn_regrid(
+                    lons, lats, tmaxgrid, xi, yi
+                )
+                nc.variables["low_tmpk"][days, :, :] = nn_regrid(
+                    lons, lats, tmingrid, xi, yi
+                )
+                nc.variables["p01d"][days, :, :] = nn_regrid(
+                    lons, lats, pgrid, xi, yi
+                )
+                nc.variables["tsoil"][days, :, :] = nn_regrid(
+                    lons, lats, tsoilgrid / 4.0, xi, yi
                 )
-                nc.variables["tsoil"][days, :, :] = nn(xi, yi)
             tmingrid = None
             tmaxgrid = None
             tsoilgrid = None
@@ -1,7 +1,7 @@
 """Attempt at totalling up DCP data
 
 Run from `RUN_12Z.sh` for previous day
-Run from `RUN_20_AFTER.sh` for current day
+Run from `run_jobs.py 20_after` for current day
 """
 import datetime
 import sys
@@ -8,9 +8,11 @@ import time
 
 import pygrib
 import requests
-from pyiem.util import exponential_backoff, logger, utc
+from iemweb.gribdl import coalesce, fetch_ranges, get_messages
+from pyiem.util import logger, utc
 
 LOG = logger()
+FILTERS = [("REFD", "1000 m above ground", "*")]
 # HRRR model hours available
 HOURS = [18] * 24
 for _hr in range(0, 24, 6):
@@ -50,57 +52,34 @@ def run(valid):
                 time.sleep(15)
             shr = f"{hr:02.0f}"
             if hr <= 18:
-                uri = valid.strftime(
-                    f"{service}hrrr.%Y%m%d/conus/"
-                    f"hrrr.t%Hz.wrfsubhf{shr}.grib2.idx"
+                url = valid.strftime(
+                    f"{service}hrrr.%Y%m%d/conus/hrrr.t%Hz.wrfsubhf{shr}.grib2"
                 )
             else:
-                uri = valid.strftime(
-                    f"{service}hrrr.%Y%m%d/conus/"
-                    f"hrrr.t%Hz.wrfsfcf{shr}.grib2.idx"
+                url = valid.strftime(
+                    f"{service}hrrr.%Y%m%d/conus/hrrr.t%Hz.wrfsfcf{shr}.grib2"
                 )
-            LOG.info(uri)
-            req = exponential_backoff(requests.get, uri, timeout=30)
-            if req is None or req.status_code != 200:
-                LOG.info("failed to fetch %s", uri)
+            LOG.info(url)
+            messages = get_messages(url, FILTERS)
+            if messages is None:
+                LOG.info("failed to fetch %s.idx", url)
                 if hr > 18:
                     continue
                 LOG.info("ABORT")
                 return
-            data = req.text
 
-            offsets = []
-            neednext = False
-            for line in data.split("\n"):
-                if line.strip() == "":
-                    continue
-                tokens = line.split(":")
-                if neednext:
-                    offsets[-1].append(int(tokens[1]))
-                    neednext = False
-                if tokens[3] == "REFD" and tokens[4] == "1000 m above ground":
-                    offsets.append([int(tokens[1])])
-                    neednext = True
-
-            if 0 < hr < 19 and len(offsets) != 4:
+            if 0 < hr < 19 and len(messages) != 4:
                 LOG.info(
-                    "[%s] hr: %s offsets: %s",
+                    "[%s] hr: %s messages: %s",
                     valid.strftime("%Y%m%d%H"),
                     hr,
-                    offsets,
+                    [msg["num"] for msg in messages],
                 )
-            for pr in offsets:
-                headers = {"Range": f"bytes={pr[0]}-{pr[1]}"}
-                req = exponential_backoff(
-                    requests.get,
-                    uri[:-4],
-                    headers=headers,
-                    timeout=30,
-                )
-                if req is None:
-                    LOG.info("FAIL %s %s", uri[:-4], headers)
-                    continue
-                output.write(req.content)
+            try:
+                for content in fetch_ranges(url, coalesce(messages)):
+                    output.write(content)
+            except requests.RequestException as exp:
+                LOG.info("FAIL %s %s", url, exp)
 
     # insert into LDM Please
     pqstr = (
@@ -0,0 +1,25 @@
+"""Compute the running total variables for a year of IEMRE daily data.
+
+Adds the variables when missing, daily_analysis.py keeps them current.
+
+    python compute_cumulative.py <year>
+"""
+import sys
+
+from iemweb.iemrecum import update_totals
+from pyiem import iemre
+from pyiem.util import logger, ncopen
+
+LOG = logger()
+
+
+def main(argv):
+    """Go Main Go."""
+    year = int(argv[1])
+    with ncopen(iemre.get_daily_ncname(year), "a", timeout=600) as nc:
+        update_totals(nc, 0)
+    LOG.info("Done with %s", year)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -14,6 +14,7 @@ import sys
 
 import numpy as np
 import pandas as pd
+from iemweb.iemrecum import update_totals
 from metpy.interpolate import inverse_distance_to_grid
 from pyiem import iemre
 from pyiem.util import (
@@ -487,6 +488,9 @@ def workflow(ts):
     subprocess.call(
         ["python", "db_to_netcdf.py", f"{ts:%Y}", f"{ts:%m}", f"{ts:%d}"]
     )
+    # Running totals from this date forward depend on what was just written
+    with ncopen(iemre.get_daily_ncname(ts.year), "a", timeout=600) as nc:
+        update_totals(nc, iemre.daily_offset(ts))
 
 
 def main(argv):
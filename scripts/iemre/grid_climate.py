@@ -4,9 +4,9 @@ import sys
 
 import numpy as np
 import pandas as pd
+from iemweb.regrid import nn_regrid
 from pyiem import iemre
 from pyiem.util import convert_value, get_sqlalchemy_conn, logger, ncopen
-from scipy.interpolate import NearestNDInterpolator
 from sqlalchemy import text
 
 LOG = logger()
@@ -17,10 +17,14 @@ def generic_gridder(nc, df, idx):
     Generic gridding algorithm for easy variables
     """
     xi, yi = np.meshgrid(nc.variables["lon"][:], nc.variables["lat"][:])
-    nn = NearestNDInterpolator(
-        (df["lon"].values, df["lat"].values), df[idx].values
+    grid = nn_regrid(
+        df["lon"].values,
+        df["lat"].values,
+        df[idx].values,
+        xi,
+        yi,
+        persist=False,
     )
-    grid = nn(xi, yi)
     LOG.info(
         "%s %s %.3f %.3f",
         len(df.index),
@@ -3,10 +3,10 @@ import datetime
 import sys
 
 import numpy as np
+from iemweb.regrid import nn_regrid
 from pandas import read_sql
 from pyiem import iemre
 from pyiem.util import convert_value, get_dbconnstr, logger, ncopen
-from scipy.interpolate import NearestNDInterpolator
 
 LOG = logger()
 COOP = get_dbconnstr("coop")
@@ -17,11 +17,14 @@ def generic_gridder(nc, df, idx):
     Generic gridding algorithm for easy variables
     """
     xi, yi = np.meshgrid(nc.variables["lon"][:], nc.variables["lat"][:])
-    nn = NearestNDInterpolator(
-        (df["lon"].values, df["lat"].values),
+    grid = nn_regrid(
+        df["lon"].values,
+        df["lat"].values,
         df["precip"].values,
+        xi,
+        yi,
+        persist=False,
     )
-    grid = nn(xi, yi)
     LOG.info(
         "%s %s grid:%.3f->%.3f obs:%.2f->%.2f",
         len(df.index),
@@ -12,9 +12,9 @@ from zoneinfo import ZoneInfo
 import numpy as np
 import pygrib
 import pyproj
+from iemweb.regrid import nn_regrid
 from pyiem import iemre
 from pyiem.util import get_dbconn, logger, ncopen, utc
-from scipy.interpolate import NearestNDInterpolator
 
 LOG = logger()
 P4326 = pyproj.Proj("EPSG:4326")
@@ -47,14 +47,15 @@ def do_coop(ts):
         lats.append(row[1])
         vals.append(row[2])
 
-    nn = NearestNDInterpolator(
-        (np.array(lons), np.array(lats)), np.array(vals)
-    )
     xi, yi = np.meshgrid(iemre.XAXIS, iemre.YAXIS)
 
     ds = iemre.get_grids(ts.date(), varnames="rsds")
     # Convert MJ/d to Wm2
-    ds["rsds"].values = nn(xi, yi) * 1000000.0 / 86400.0
+    ds["rsds"].values = (
+        nn_regrid(lons, lats, vals, xi, yi, persist=False)
+        * 1000000.0
+        / 86400.0
+    )
     iemre.set_grids(ts.date(), ds)
     subprocess.call(
         ["python", "db_to_netcdf.py", f"{ts:%Y}", f"{ts:%m}", f"{ts:%d}"]
@@ -83,13 +84,10 @@ def try_merra(ts):
     total = total / 24.0
 
     lons, lats = np.meshgrid(lon1d, lat1d)
-    nn = NearestNDInterpolator(
-        (lons.flatten(), lats.flatten()), total.flatten()
-    )
     xi, yi = np.meshgrid(iemre.XAXIS, iemre.YAXIS)
 
     ds = iemre.get_grids(ts.date(), varnames="rsds")
-    ds["rsds"].values = nn(xi, yi)
+    ds["rsds"].values = nn_regrid(lons, lats, total, xi, yi)
     iemre.set_grids(ts.date(), ds)
     subprocess.call(
         ["python", "db_to_netcdf.py", f"{ts:%Y}", f"{ts:%m}", f"{ts:%d}"]
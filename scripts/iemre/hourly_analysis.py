@@ -10,13 +10,13 @@ import warnings
 import numpy as np
 import pandas as pd
 import pygrib
+from iemweb.regrid import bilinear_regrid, nn_regrid
 from metpy.calc import wind_components
 from metpy.interpolate import inverse_distance_to_grid
 from metpy.units import masked_array, units
 from pyiem import iemre
 from pyiem.iemre import hourly_offset
 from pyiem.util import get_sqlalchemy_conn, logger, ncopen, utc
-from scipy.interpolate import NearestNDInterpolator, RegularGridInterpolator
 
 # Prevent invalid value encountered in cast
 warnings.simplefilter("ignore", RuntimeWarning)
@@ -56,8 +56,9 @@ def use_era5land(ts, kind):
                         vals_shifted = np.roll(vals, shift=shift, axis=axis)
                         idx = ~vals_shifted.mask * vals.mask
                         vals[idx] = vals_shifted[idx]
-                nn = RegularGridInterpolator((lats, lons), vals.filled(np.nan))
-                data = np.ma.array(nn((yi, xi)))
+                data = np.ma.array(
+                    bilinear_regrid(lons, lats, vals.filled(np.nan), xi, yi)
+                )
                 data.mask = np.isnan(data)
                 res.append(data)
         if res:
@@ -92,8 +93,7 @@ def use_hrrr_soilt(ts):
                 continue
             lats, lons = [np.ravel(x) for x in grb.latlons()]
             xi, yi = np.meshgrid(iemre.XAXIS, iemre.YAXIS)
-            nn = NearestNDInterpolator((lons, lats), np.ravel(grb.values))
-            return nn(xi, yi)
+            return nn_regrid(lons, lats, grb.values, xi, yi)
         grbs.close()
     except Exception as exp:
         LOG.debug("%s exp:%s", fn, exp)
@@ -130,8 +130,7 @@ def use_rtma(ts, kind):
             if lats is None:
                 lats, lons = [np.ravel(x) for x in grb.latlons()]
             xi, yi = np.meshgrid(iemre.XAXIS, iemre.YAXIS)
-            nn = NearestNDInterpolator((lons, lats), np.ravel(grb.values))
-            res.append(nn(xi, yi))
+            res.append(nn_regrid(lons, lats, grb.values, xi, yi))
         return res
     except Exception as exp:
         LOG.debug("%s exp:%s", fn, exp)
@@ -5,6 +5,7 @@ import sys
 
 import geopandas as gpd
 import numpy as np
+from iemweb.iemrecum import ensure_variables
 from pyiem import iemre
 from pyiem.grid.zs import CachingZonalStats
 from pyiem.util import get_sqlalchemy_conn, logger, ncopen
@@ -205,6 +206,9 @@ def init_year(ts):
     v1.standard_name = "4inch Soil Temperature"
     v1.coordinates = "lon lat"
 
+    # Running totals since 1 January, see iemweb.iemrecum
+    ensure_variables(nc)
+
     nc.close()
 
 
@@ -9,9 +9,9 @@ import sys
 
 import numpy as np
 import pygrib
+from iemweb.regrid import nn_regrid
 from pyiem import iemre
 from pyiem.util import logger, ncopen, utc
-from scipy.interpolate import NearestNDInterpolator
 
 LOG = logger()
 
@@ -82,9 +82,8 @@ def copy_to_iemre(valid):
     lats = np.ravel(lats[stride, stride])
     lons = np.ravel(lons[stride, stride])
     vals = np.ravel(val[stride, stride])
-    nn = NearestNDInterpolator((lons, lats), vals)
     xi, yi = np.meshgrid(iemre.XAXIS, iemre.YAXIS)
-    res = nn(xi, yi)
+    res = nn_regrid(lons, lats, vals, xi, yi)
 
     # Lets clip bad data
     # 10 inches per hour is bad data
@@ -9,10 +9,10 @@ import sys
 
 import numpy as np
 import pandas as pd
+from iemweb.regrid import nn_regrid
 from pyiem import prism as prismutil
 from pyiem.iemre import daily_offset, hourly_offset
 from pyiem.util import find_ij, logger, ncopen, utc
-from scipy.interpolate import NearestNDInterpolator
 
 DEBUGLON = -93.89
 DEBUGLAT = 42.04
@@ -81,8 +81,7 @@ def workflow(valid):
     # make sure the s4total does not have zeros
     s4total = np.where(s4total < 0.001, 0.001, s4total)
 
-    nn = NearestNDInterpolator((lons.flatten(), lats.flatten()), ppt.flat)
-    prism_on_s4grid = nn(s4lons, s4lats)
+    prism_on_s4grid = nn_regrid(lons, lats, ppt, s4lons, s4lats)
     multiplier = prism_on_s4grid / s4total
     LOG.info(
         "gridavgs: prism: %.3f stageIV: %.3f prismons4grid: %.3f mul: %.3f",
@@ -6,18 +6,24 @@ NCEI provides monthly tar files for nearly up to the current day here:
 https://www.ncei.noaa.gov/pub/download/hidden/onemin/
 
 NCEI generates these at about 1530EDT, so we run a bit after that via crontab
+
+The realtime tarballs are streamed member by member without extraction to
+disk and stations are parsed plus written to the database within a process
+pool, which bounds the number of concurrent COPY streams.
 """
 # stdlib
-import codecs
 import datetime
 import os
 import re
 import subprocess
 import sys
 import tarfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from io import StringIO
+from itertools import zip_longest
 
 # third party
+import numpy as np
 import pandas as pd
 import requests
 from pyiem.util import (
@@ -40,6 +46,25 @@ REAL_RE = re.compile(r"^\-?\d+\.\d+$")
 INT_RE = re.compile(r"^\-?\d+$")
 RUNWAY_RE = re.compile(r" \d+\s\d+\+?\s*$")
 DT1980 = utc(1980, 1, 1)
+# Number of worker processes, which is also the max concurrent COPY streams
+WORKERS = 4
+COLS = (
+    "station valid vis1_coeff vis1_nd vis2_coeff vis2_nd vis3_coeff "
+    "vis3_nd drct sknt gust_drct gust_sknt ptype precip pres1 "
+    "pres2 pres3 tmpf dwpf"
+).split()
+# Integer columns, which need to stay integers for the COPY
+INTCOLS = ["drct", "sknt", "gust_drct", "gust_sknt", "tmpf", "dwpf"]
+# Page 2 is fixed width: (column, start, end, minval, maxval, is_int)
+P2_FIELDS = [
+    ("precip", 43, 48, 0, 0.5, False),
+    ("pres1", 69, 77, 10, 40, False),
+    ("pres2", 77, 85, 10, 40, False),
+    ("pres3", 85, 93, 10, 40, False),
+    ("tmpf", 94, 97, -90, 150, True),
+    ("dwpf", 99, 102, -90, 150, True),
+]
+PGCONN = None
 
 
 def tstamp2dt(s, metadata):
@@ -64,6 +89,80 @@ def tstamp2dt(s, metadata):
     return ts.replace(hour=utc_hr, minute=int(s[14:16]))
 
 
+def tstamp2dt_vec(tstamps, metadata):
+    """Vectorized tstamp2dt, returns a Series with NaT for bad values."""
+    good = tstamps.str[0].isin(["1", "2"])
+    day = pd.to_datetime(
+        tstamps.str[:8].where(good), format="%Y%m%d", errors="coerce", utc=True
+    )
+    local_hr = pd.to_numeric(tstamps.str[8:10], errors="coerce")
+    utc_hr = pd.to_numeric(tstamps.str[12:14], errors="coerce")
+    minute = pd.to_numeric(tstamps.str[14:16], errors="coerce")
+    if metadata["utc_direction"] == 1:
+        shift = np.where(utc_hr < local_hr, 1, 0)
+    else:
+        shift = np.where(utc_hr > local_hr, -1, 0)
+    return (
+        day
+        + pd.to_timedelta(shift, unit="D")
+        + pd.to_timedelta(utc_hr, unit="h")
+        + pd.to_timedelta(minute, unit="m")
+    )
+
+
+def read_page2(text, metadata):
+    """Vectorized fixed-width parsing of a 6506 (page 2) report.
+
+    Args:
+      text (str): the file content
+      metadata (dict): with `utc_direction` and `archive_end` set
+
+    Returns:
+      pd.DataFrame indexed by valid
+    """
+    lines = pd.Series(text.splitlines(), dtype=object)
+    lines = lines[lines.str.len() >= 30]
+    res = pd.DataFrame({"valid": tstamp2dt_vec(lines.str[13:29], metadata)})
+    lines = lines.str.translate(str.maketrans("[]\\", "   "))
+    ptype = lines.str[31:34].str.strip()
+    res["ptype"] = ptype.str[:2].where(ptype != "")
+    for col, sts, ets, minval, maxval, is_int in P2_FIELDS:
+        vals = lines.str[sts:ets].str.strip()
+        regex = INT_RE if is_int else REAL_RE
+        vals = pd.to_numeric(
+            vals.where(vals.str.match(regex.pattern)), errors="coerce"
+        )
+        res[col] = vals.where((vals >= minval) & (vals <= maxval))
+    return finalize(res, metadata)
+
+
+def read_page1(text, metadata):
+    """Parse a 6505 (page 1) report into a DataFrame indexed by valid.
+
+    The visibility tokens are not at fixed positions, so this leans on the
+    line based p1_parser.
+    """
+    rows = []
+    for ln in text.splitlines():
+        d = p1_parser(ln, metadata)
+        if d is None:
+            continue
+        rows.append(d)
+    if not rows:
+        return pd.DataFrame(index=pd.DatetimeIndex([], tz="UTC", name="valid"))
+    res = pd.DataFrame(rows).drop(
+        columns=["wban", "faaid", "id3", "tstamp"], errors="ignore"
+    )
+    res["valid"] = pd.to_datetime(res["valid"], utc=True)
+    return finalize(res, metadata)
+
+
+def finalize(df, metadata):
+    """Drop bad and already archived timestamps, the last duplicate wins."""
+    df = df[df["valid"].notna() & (df["valid"] > metadata["archive_end"])]
+    return df.drop_duplicates("valid", keep="last").set_index("valid")
+
+
 def p2_parser(ln, metadata):
     """
     Handle the parsing of a line found in the 6506 report, return QC dict
@@ -218,44 +317,28 @@ def dl_archive(df, dt):
             df.at[station, f"fn{page + 4}"] = f"{datadir}/{fn}"
 
 
-def liner(fn):
-    """Hacky."""
-    return codecs.open(fn, "r", "utf-8", "ignore")
+def read_text(fn):
+    """Read a file, ignoring any encoding errors."""
+    with open(fn, "rb") as fh:
+        return fh.read().decode("utf-8", "ignore")
 
 
-def runner(pgconn, metadata, station):
-    """Do the work prescribed."""
-    if not os.path.isfile(metadata["fn5"]) or not os.path.isfile(
-        metadata["fn6"]
-    ):
-        return 0
-
-    # Our final amount of data
-    data = {}
-    # We have two files to worry about
-    for ln in liner(metadata["fn5"]):
-        d = p1_parser(ln, metadata)
-        if d is None or d["valid"] <= metadata["archive_end"]:
-            continue
-        data[d["valid"]] = d
+def combine_pages(station, page1, page2):
+    """Merge the two parsed pages into the frame to be inserted."""
+    df = page1.join(page2, how="outer").reset_index().reindex(columns=COLS)
+    df["station"] = station
+    for col in INTCOLS:
+        df[col] = pd.to_numeric(df[col]).round().astype("Int64")
+    return df
 
-    for ln in liner(metadata["fn6"]):
-        d = p2_parser(ln, metadata)
-        if d is None or d["valid"] <= metadata["archive_end"]:
-            continue
-        res = data.setdefault(d["valid"], {})
-        res.update(d)
 
-    if not data:
-        LOG.debug(
-            "No data found station: %s, archive_end: %s",
-            station,
-            metadata["archive_end"],
-        )
+def write_station(pgconn, station, df):
+    """Replace the database data for this station with this frame."""
+    if df.empty:
+        LOG.debug("No data found station: %s", station)
         return 0
-
-    mints = min(data)
-    maxts = max(data)
+    mints = df["valid"].min()
+    maxts = df["valid"].max()
     if (maxts - mints) > datetime.timedelta(days=40):
         LOG.warning(
             "refusing to update %s due to %s-%s > 40 days",
@@ -275,21 +358,10 @@ def runner(pgconn, metadata, station):
         "removed %s rows between %s and %s", cursor.rowcount, mints, maxts
     )
     sio = StringIO()
-    cols = (
-        "station valid vis1_coeff vis1_nd vis2_coeff vis2_nd vis3_coeff "
-        "vis3_nd drct sknt gust_drct gust_sknt ptype precip pres1 "
-        "pres2 pres3 tmpf dwpf"
-    ).split()
-
-    # Loop over the data we got please
-    fmt = "\t".join(["%s"] * len(cols[2:]))
-    for ts, entry in data.items():
-        sio.write(f"{station}\t{ts}\t")
-        sio.write(fmt % (*[entry.get(col) for col in cols[2:]],))
-        sio.write("\n")
+    df.to_csv(sio, sep="\t", header=False, index=False, na_rep="None")
     sio.seek(0)
     sql = (
-        f"copy alldata_1minute({','.join(cols)}) from stdin "
+        f"copy alldata_1minute({','.join(COLS)}) from stdin "
         "with null as 'None'"
     )
     with cursor.copy(sql) as copy:
@@ -300,6 +372,38 @@ def runner(pgconn, metadata, station):
     return count
 
 
+def process_station(station, metadata, page1, page2):
+    """Parse and ingest a station, run within the worker processes.
+
+    Args:
+      station (str): the station identifier
+      metadata (dict): with `utc_direction` and `archive_end` set
+      page1 (str): page 1 content
+      page2 (str): page 2 content
+    """
+    global PGCONN
+    if PGCONN is None:
+        PGCONN = get_dbconn("asos1min")
+    df = combine_pages(
+        station, read_page1(page1, metadata), read_page2(page2, metadata)
+    )
+    return write_station(PGCONN, station, df)
+
+
+def process_files(station, metadata):
+    """Ingest a station's downloaded files, run within the worker processes."""
+    if not os.path.isfile(metadata["fn5"]) or not os.path.isfile(
+        metadata["fn6"]
+    ):
+        return 0
+    return process_station(
+        station,
+        metadata,
+        read_text(metadata["fn5"]),
+        read_text(metadata["fn6"]),
+    )
+
+
 def update_iemprops(ts):
     """db update"""
     pgconn = get_dbconn("mesosite")
@@ -314,7 +418,12 @@ def update_iemprops(ts):
 
 
 def init_dataframe(argv):
-    """Build the processing dataframe."""
+    """Build the processing dataframe.
+
+    Returns:
+      (pd.DataFrame, realtime) with realtime being None for archive
+      processing, otherwise the (datetime, filebase) of the tarballs to stream
+    """
     # ASOS query limit keeps other sites out of result that may have 1min
     # Do a time zone trick to figure out UTC offset 1 is ahead
     df = pd.read_sql(
@@ -332,8 +441,9 @@ def init_dataframe(argv):
     df["fn5"] = ""
     df["fn6"] = ""
     dt = utc()
+    realtime = None
     if len(argv) == 2:  # Hard coded hidden filename
-        dl_realtime(df, dt, filebase=argv[1])
+        realtime = (dt, argv[1])
     elif len(argv) >= 3:
         if len(argv) == 4:
             LOG.info("Limiting work to station %s", argv[1])
@@ -345,10 +455,10 @@ def init_dataframe(argv):
     else:
         merge_archive_end(df, dt)
         df["archive_end"] = df["archive_end"].fillna(DT1980)
-        dl_realtime(df, dt)
+        realtime = (dt, None)
         update_iemprops(dt)
 
-    return df
+    return df, realtime
 
 
 def merge_archive_end(df, dt):
@@ -363,43 +473,104 @@ def merge_archive_end(df, dt):
     df["archive_end"] = df2["max"]
 
 
-def dl_realtime(df, dt, filebase=None):
-    """Download and stage the 'real-time' processing."""
-    for page in [1, 2]:
-        # Good grief asos-1min-pg1_d202207_c20220721.tar.gz
-        tmpfn = (
-            f"asos-1min-pg{page}_d{dt.strftime('%Y%m')}_c{dt:%Y%m%d}.tar.gz"
-        )
-        if filebase is not None:
-            tmpfn = f"asos-1min-pg{page}_{filebase}.tar.gz"
-        if not os.path.isfile(f"{TMPDIR}/{tmpfn}"):
-            uri = f"{HIDDENURL}/{tmpfn}"
-            res = requests.get(uri, timeout=60, stream=True)
-            if res.status_code != 200:
-                LOG.warning("Got HTTP %s for %s", res.status_code, uri)
+def fetch_tarball(page, dt, filebase=None):
+    """Download the realtime tarball for this page, returns filename."""
+    # Good grief asos-1min-pg1_d202207_c20220721.tar.gz
+    tmpfn = f"asos-1min-pg{page}_d{dt.strftime('%Y%m')}_c{dt:%Y%m%d}.tar.gz"
+    if filebase is not None:
+        tmpfn = f"asos-1min-pg{page}_{filebase}.tar.gz"
+    if not os.path.isfile(f"{TMPDIR}/{tmpfn}"):
+        uri = f"{HIDDENURL}/{tmpfn}"
+        res = requests.get(uri, timeout=60, stream=True)
+        if res.status_code != 200:
+            LOG.warning("Got HTTP %s for %s", res.status_code, uri)
+            return None
+        with open(f"{TMPDIR}/{tmpfn}", "wb") as fh:
+            for chunk in res.iter_content(chunk_size=4096):
+                if chunk:
+                    fh.write(chunk)
+    return f"{TMPDIR}/{tmpfn}"
+
+
+def stream_members(df, tarfn):
+    """Yield (station, text) for the members of the tarball."""
+    with tarfile.open(tarfn, "r:gz") as tar:
+        for tarinfo in tar:
+            if not tarinfo.isreg():
                 continue
-            with open(f"{TMPDIR}/{tmpfn}", "wb") as fh:
-                for chunk in res.iter_content(chunk_size=4096):
-                    if chunk:
-                        fh.write(chunk)
-        with tarfile.open(f"{TMPDIR}/{tmpfn}", "r:gz") as tar:
-            for tarinfo in tar:
-                if not tarinfo.isreg():
-                    continue
-                if not tarinfo.name.startswith("asos-1min-pg"):
-                    LOG.info("Unknown filename %s", tarinfo.name)
-                    continue
-                station = tarinfo.name.split("-")[3]
-                if station[0] == "K":
-                    station = station[1:]
-                if station not in df.index:
-                    LOG.warning("Unknown station %s, FIXME!", station)
-                    continue
-                f = tar.extractfile(tarinfo.name)
-                with open(f"{TMPDIR}/{tarinfo.name}", "wb") as fh:
-                    fh.write(f.read())
-                # sick
-                df.at[station, f"fn{page + 4}"] = f"{TMPDIR}/{tarinfo.name}"
+            if not tarinfo.name.startswith("asos-1min-pg"):
+                LOG.info("Unknown filename %s", tarinfo.name)
+                continue
+            station = tarinfo.name.split("-")[3]
+            if station[0] == "K":
+                station = station[1:]
+            if station not in df.index:
+                LOG.warning("Unknown station %s, FIXME!", station)
+                continue
+            payload = tar.extractfile(tarinfo).read()
+            yield station, payload.decode("utf-8", "ignore")
+
+
+def bounded_submit(pool, pending, func, *args):
+    """Submit work, but first wait when too much work is in flight."""
+    while len(pending) >= WORKERS * 2:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        pending -= done
+    future = pool.submit(func, *args)
+    pending.add(future)
+    return future
+
+
+def metadata_dict(row):
+    """Pickle friendly metadata for the workers."""
+    return {
+        "utc_direction": row["utc_direction"],
+        "archive_end": row["archive_end"],
+        "fn5": row["fn5"],
+        "fn6": row["fn6"],
+    }
+
+
+def stream_realtime(pool, df, dt, filebase=None):
+    """Stream the realtime tarballs through the process pool.
+
+    The two tarballs are read in lockstep and a station is submitted as soon
+    as both of its members have been seen.  The members are in the same
+    station order, so only a few unpaired members are held at once.
+    """
+    tarfns = [fetch_tarball(page, dt, filebase) for page in [1, 2]]
+    if None in tarfns:
+        return []
+    unpaired = [{}, {}]
+    pending = set()
+    results = []
+    for members in zip_longest(
+        *[stream_members(df, tarfn) for tarfn in tarfns],
+        fillvalue=(None, None),
+    ):
+        for page, (station, text) in enumerate(members):
+            if station is None:
+                continue
+            unpaired[page][station] = text
+            if station not in unpaired[1 - page]:
+                continue
+            results.append(
+                bounded_submit(
+                    pool,
+                    pending,
+                    process_station,
+                    station,
+                    metadata_dict(df.loc[station]),
+                    unpaired[0].pop(station),
+                    unpaired[1].pop(station),
+                )
+            )
+    if unpaired[0] or unpaired[1]:
+        LOG.info(
+            "%s stations lacked a page 1 or 2 member",
+            len(unpaired[0]) + len(unpaired[1]),
+        )
+    return results
 
 
 def cleanup(df):
@@ -417,15 +588,26 @@ def main(argv):
     """Go Main Go"""
     cronjob = not sys.stdout.isatty()
     # Build a dataframe to do work with
-    df = init_dataframe(argv)
-
-    pgconn = get_dbconn("asos1min")
-    progress = tqdm(df.index.values, disable=cronjob)
-    total = 0
-    for station in progress:
-        row = df.loc[station]
-        progress.set_description(f"{station}")
-        total += runner(pgconn, row, station)
+    df, realtime = init_dataframe(argv)
+
+    with ProcessPoolExecutor(WORKERS) as pool:
+        if realtime is not None:
+            futures = stream_realtime(pool, df, *realtime)
+        else:
+            pending = set()
+            futures = [
+                bounded_submit(
+                    pool,
+                    pending,
+                    process_files,
+                    station,
+                    metadata_dict(df.loc[station]),
+                )
+                for station in df.index.values
+            ]
+        total = 0
+        for future in tqdm(futures, disable=cronjob):
+            total += future.result()
     if not cronjob or total < 1e6:
         LOG.info("Ingested %s observations", total)
     cleanup(df)
@@ -477,3 +659,38 @@ def test_parser():
         if i == 28:
             assert abs(res["dwpf"] - -2) < 0.01
         assert res is not None
+
+
+def test_page2_vectorized():
+    """Test that the vectorized page 2 parser matches the line parser."""
+    metadata = {"utc_direction": 1, "archive_end": DT1980}
+    with open("p2_examples.txt", encoding="utf-8") as fh:
+        text = fh.read()
+    df = read_page2(text, metadata)
+    for ln in text.splitlines():
+        res = p2_parser(ln, metadata)
+        row = df.loc[res["valid"]]
+        for col in [
+            "ptype",
+            "precip",
+            "pres1",
+            "pres2",
+            "pres3",
+            "tmpf",
+            "dwpf",
+        ]:
+            if res[col] is None:
+                assert pd.isna(row[col])
+            else:
+                assert row[col] == res[col]
+
+
+def test_empty_page1():
+    """Test that page 2 rows are kept when page 1 has none."""
+    metadata = {"utc_direction": 1, "archive_end": DT1980}
+    with open("p2_examples.txt", encoding="utf-8") as fh:
+        page2 = read_page2(fh.read(), metadata)
+    df = combine_pages("DSM", read_page1("", metadata), page2)
+    assert len(df.index) == len(page2.index)
+    assert list(df.columns) == COLS
+    assert df["tmpf"].notna().any()
@@ -1,5 +1,8 @@
 """Ingest DOT RWIS Webcams.
 
+Images not yet in camera_log are fetched and inserted into LDM by a pool
+of threads, with the database updated in bulk once they are done.
+
 NOTE this uses a custom openssl.conf :/
 
 OPENSSL_CONF=openssl.conf python ingest_dot_webcams.py
@@ -11,6 +14,7 @@ import json
 import os
 import subprocess
 import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
 
 # third party
@@ -26,6 +30,8 @@ URI = (
 CLOUD404 = "/mesonet/tmp/dotcloud404.txt"
 # prevent things from the future.
 CEILING = util.utc() + timedelta(minutes=30)
+# Number of images fetched and inserted at once
+WORKERS = 8
 
 
 def add_entry(cursor, cam, props):
@@ -39,12 +45,12 @@ def add_entry(cursor, cam, props):
     )
 
 
-def process_feature(cursor, domain, feat):
-    """Do what we need to do with this feature."""
+def get_images(cursor, domain, feat):
+    """Return the list of (cam, valid, url) images found with this feature."""
     props = feat["attributes"]
     if props["RPUID"] is None or props["CAMERA_POSITION"] is None:
         LOG.info("feature has no RPUID, skipping")
-        return
+        return []
     rpuid = int(props["RPUID"])
     # Previous ingest used SCANWEB_POSITIONID, which was one less than CP
     scene = int(props["CAMERA_POSITION"])
@@ -54,6 +60,7 @@ def process_feature(cursor, domain, feat):
         LOG.warning("cam %s not in domain, adding entry", cam)
         add_entry(cursor, cam, props)
         domain.append(cam)
+    res = []
     # Loop over 10 possible images found with this feature
     for i in range(1, 11):
         suffix = f"_{i}" if i > 1 else ""
@@ -67,75 +74,151 @@ def process_feature(cursor, domain, feat):
         if valid > CEILING:
             LOG.info("%s is in the future %s, skipping", cam, valid)
             continue
-        LOG.info("%s %s %s", cam, valid, props[f"IMAGE_URL{suffix}"])
-        # Do we have this image?
-        cursor.execute(
-            "SELECT drct from camera_log where valid = %s and cam = %s",
-            (valid, cam),
-        )
-        if cursor.rowcount > 0:
-            continue
         url = props[f"IMAGE_URL{suffix}"]
         if url.find("Not_Available") > -1:
             LOG.debug("skipping %s %s %s", cam, valid, url)
             continue
-        try:
-            req = requests.get(url, timeout=30)
-        except requests.exceptions.Timeout:
-            # Try again
-            req = requests.get(url, timeout=60)
-        if req.status_code == 404:
-            LOG.debug("cloud 404 %s", url)
-            with open(CLOUD404, "a", encoding="utf8") as fh:
-                fh.write(f"{url}\n")
-                continue
-        if req.status_code != 200:
-            LOG.info("Fetching %s resulted in status %s", url, req.status_code)
-            continue
-        tmpfd = tempfile.NamedTemporaryFile(mode="wb", delete=False)
-        tmpfd.write(req.content)
-        tmpfd.close()
-        # Get current entry
-        cursor.execute(
-            "SELECT valid from camera_current where cam = %s", (cam,)
-        )
-        if cursor.rowcount == 0:
-            LOG.warning("Creating camera_current entry for %s", cam)
-            cursor.execute(
-                "INSERT into camera_current(cam, valid, drct) "
-                "VALUES (%s, %s, %s)",
-                (cam, valid - timedelta(minutes=1), 0),
-            )
-            cursor.execute(
-                "SELECT valid from camera_current where cam = %s", (cam,)
-            )
-        lastvalid = cursor.fetchone()[0]
-        routes = "a"
-        if valid > lastvalid:
-            routes = "ac"
-        cmd = (
-            f"pqinsert -p 'webcam {routes} {valid:%Y%m%d%H%M} "
-            f"camera/stills/{cam}.jpg "
-            f"camera/{cam}/{cam}_{valid:%Y%m%d%H%M}.jpg jpg' {tmpfd.name}"
-        )
-        with subprocess.Popen(
-            cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-        ) as proc:
-            stdout, stderr = proc.communicate()
-            if stderr != b"" or stdout != b"":
-                LOG.info("%s stdout: %s stderr: %s", cmd, stdout, stderr)
-                continue
-        os.unlink(tmpfd.name)
-        # Create log entry
-        cursor.execute(
-            "INSERT into camera_log(cam, valid, drct) VALUES (%s, %s, %s)",
-            (cam, valid, 0),
-        )
-        if valid > lastvalid:
-            cursor.execute(
-                "UPDATE camera_current SET valid = %s where cam = %s",
-                (valid, cam),
-            )
+        res.append((cam, valid, url))
+    return res
+
+
+def get_known(cursor, images):
+    """Return the set of (cam, valid) already in camera_log."""
+    if not images:
+        return set()
+    cursor.execute(
+        "SELECT cam, valid from camera_log where cam = ANY(%s) and "
+        "valid >= %s",
+        (
+            list({img[0] for img in images}),
+            min(img[1] for img in images),
+        ),
+    )
+    return {(row[0], row[1]) for row in cursor}
+
+
+def fetch_image(session, image):
+    """Fetch the image, returning the content or the HTTP status code."""
+    url = image[2]
+    try:
+        req = session.get(url, timeout=30)
+    except requests.exceptions.Timeout:
+        # Try again
+        req = session.get(url, timeout=60)
+    if req.status_code != 200:
+        return req.status_code
+    return req.content
+
+
+def insert_image(tmpdir, image, content, routes):
+    """Insert the image into LDM, returning success."""
+    cam, valid, _url = image
+    tmpfn = os.path.join(tmpdir, f"{cam}_{valid:%Y%m%d%H%M}.jpg")
+    with open(tmpfn, "wb") as fh:
+        fh.write(content)
+    pqstr = (
+        f"webcam {routes} {valid:%Y%m%d%H%M} camera/stills/{cam}.jpg "
+        f"camera/{cam}/{cam}_{valid:%Y%m%d%H%M}.jpg jpg"
+    )
+    proc = subprocess.run(
+        ["pqinsert", "-p", pqstr, tmpfn], capture_output=True, check=False
+    )
+    os.unlink(tmpfn)
+    if proc.stderr != b"" or proc.stdout != b"":
+        LOG.info("%s stdout: %s stderr: %s", pqstr, proc.stdout, proc.stderr)
+        return False
+    return True
+
+
+def process_image(session, tmpdir, image, current):
+    """Fetch and insert the image, returning the result."""
+    try:
+        content = fetch_image(session, image)
+    except Exception as exp:
+        LOG.info("Fetching %s failed: %s", image[2], exp)
+        return None
+    if isinstance(content, int):
+        return content
+    LOG.info("%s %s %s", *image)
+    routes = "ac" if current else "a"
+    try:
+        return insert_image(tmpdir, image, content, routes)
+    except Exception as exp:
+        LOG.info("Inserting %s failed: %s", image[2], exp)
+        return None
+
+
+def process_images(cursor, images):
+    """Fetch the new images concurrently and update the database."""
+    known = get_known(cursor, images)
+    images = sorted({img for img in images if img[:2] not in known})
+    cams = list({img[0] for img in images})
+    cursor.execute(
+        "SELECT cam, valid from camera_current where cam = ANY(%s)", (cams,)
+    )
+    lastvalid = dict(cursor.fetchall())
+    # Only the newest image for each camera updates the current still
+    newest = {}
+    for cam, valid, _url in images:
+        if valid > lastvalid.get(cam, valid - timedelta(minutes=1)):
+            newest[cam] = valid
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=WORKERS)
+    session.mount("https://", adapter)
+    inserted = []
+    with tempfile.TemporaryDirectory() as tmpdir, ThreadPoolExecutor(
+        WORKERS
+    ) as executor:
+        futures = {
+            executor.submit(
+                process_image,
+                session,
+                tmpdir,
+                img,
+                newest.get(img[0]) == img[1],
+            ): img
+            for img in images
+        }
+        for future in as_completed(futures):
+            image = futures[future]
+            res = future.result()
+            if res is True:
+                inserted.append(image)
+            elif res == 404:
+                LOG.debug("cloud 404 %s", image[2])
+                with open(CLOUD404, "a", encoding="utf8") as fh:
+                    fh.write(f"{image[2]}\n")
+            elif res is not None and res is not False:
+                LOG.info("Fetching %s resulted in status %s", image[2], res)
+    if not inserted:
+        return
+    cursor.execute(
+        "INSERT into camera_log(cam, valid, drct) "
+        "SELECT unnest(%s::text[]), unnest(%s::timestamptz[]), 0",
+        ([img[0] for img in inserted], [img[1] for img in inserted]),
+    )
+    LOG.info("inserted %s/%s images", len(inserted), len(images))
+    # Only the images sent with the current (c) route
+    current = {
+        cam: valid for cam, valid, _url in inserted if newest.get(cam) == valid
+    }
+    if not current:
+        return
+    missing = [cam for cam in current if cam not in lastvalid]
+    for cam in missing:
+        LOG.warning("Creating camera_current entry for %s", cam)
+    cursor.execute(
+        "INSERT into camera_current(cam, valid, drct) "
+        "SELECT unnest(%s::text[]), unnest(%s::timestamptz[]), 0",
+        (missing, [current[cam] for cam in missing]),
+    )
+    cursor.execute(
+        "UPDATE camera_current c SET valid = n.valid FROM "
+        "(SELECT unnest(%s::text[]) as cam, "
+        "unnest(%s::timestamptz[]) as valid) n "
+        "WHERE c.cam = n.cam and c.valid < n.valid",
+        (list(current), list(current.values())),
+    )
 
 
 def main():
@@ -161,14 +244,17 @@ def main():
         )
         return
     LOG.info("len(features): %s", len(jobj["features"]))
+    mcursor = pgconn.cursor()
+    images = []
     for feat in jobj["features"]:
-        mcursor = pgconn.cursor()
         try:
-            process_feature(mcursor, domain, feat)
+            images.extend(get_images(mcursor, domain, feat))
         except Exception as exp:
             LOG.exception(exp)
-        mcursor.close()
-        pgconn.commit()
+    pgconn.commit()
+    process_images(mcursor, images)
+    mcursor.close()
+    pgconn.commit()
 
 
 if __name__ == "__main__":
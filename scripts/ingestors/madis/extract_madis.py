@@ -1,45 +1,48 @@
 """extract_madis.py Get the latest MADIS numbers from the data file!"""
 import datetime
 import os
-from zoneinfo import ZoneInfo
 
 import numpy as np
 from netCDF4 import chartostring
 from pyiem.util import convert_value, get_dbconn, logger, ncopen
 
 LOG = logger()
+PROVIDERS = ["IEM", "IADOT"]
+
+
+def tofloat(arr):
+    """Convert a (masked) array into a float array with NaN for missing."""
+    return np.ma.filled(np.ma.asarray(arr, dtype=float), np.nan)
 
 
 def figure(val, qcval):
-    """hack"""
-    if qcval > 1000:
-        return None
-    if np.ma.is_masked(val) or np.ma.is_masked(qcval):
-        return None
+    """Compute the degF departure implied by a degK QC departure."""
+    with np.errstate(invalid="ignore"):
+        qcval = np.where(qcval > 1000, np.nan, qcval)
     return convert_value(val + qcval, "degK", "degF") - convert_value(
         val, "degK", "degF"
     )
 
 
 def figure_alti(qcval):
-    """hack"""
-    if qcval > 100000.0:
-        return None
-    return float(qcval / 100.0)
+    """Compute the altimeter QC departure."""
+    with np.errstate(invalid="ignore"):
+        return np.where(qcval > 100000.0, np.nan, qcval / 100.0)
 
 
 def check(val):
-    """hack"""
-    if val > 1000000.0:
-        return None
-    return float(val)
+    """Null out unreasonable values."""
+    with np.errstate(invalid="ignore"):
+        return np.where(val > 1000000.0, np.nan, val)
+
+
+def nan2none(arr):
+    """Convert array into a list suitable for database insertion."""
+    return [None if np.isnan(x) else x for x in np.asarray(arr).tolist()]
 
 
 def main():
     """GO Main Go"""
-    pgconn = get_dbconn("iem")
-    icursor = pgconn.cursor()
-
     utcnow = datetime.datetime.utcnow()
     fn = None
     for i in range(10):
@@ -52,80 +55,80 @@ def main():
         if fn is not None:
             break
 
-    if not os.path.isfile(fn):
+    if fn is None or not os.path.isfile(fn):
         LOG.warning("Found no files? last: %s", fn)
         return
 
     with ncopen(fn) as nc:
         providers = chartostring(nc.variables["dataProvider"][:])
-        stations = chartostring(nc.variables["stationId"][:])
-        nc_tmpk = nc.variables["temperature"][:]
-        nc_dwpk = nc.variables["dewpoint"][:]
-        nc_alti = nc.variables["altimeter"][:]
-        tmpkqcd = nc.variables["temperatureQCD"][:]
-        dwpkqcd = nc.variables["dewpointQCD"][:]
-        altiqcd = nc.variables["altimeterQCD"][:]
-        times = nc.variables["observationTime"][:]
-
-    for p in range(providers.shape[0]):
-        provider = providers[p]
-        if provider not in ["IEM", "IADOT"]:
-            continue
-        sid = stations[p]
-        ticks = int(times[p])
-        ts = datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=ticks)
-        ts = ts.replace(tzinfo=ZoneInfo("UTC"))
-
-        (tmpf, tmpf_qc_av, tmpf_qc_sc) = (None, None, None)
-        (dwpf, dwpf_qc_av, dwpf_qc_sc) = (None, None, None)
-        (alti, alti_qc_av, alti_qc_sc) = (None, None, None)
-
-        if not np.ma.is_masked(nc_tmpk[p]):
-            tmpf = check(convert_value(nc_tmpk[p], "degK", "degF"))
-            tmpf_qc_av = figure(nc_tmpk[p], tmpkqcd[p, 0])
-            tmpf_qc_sc = figure(nc_tmpk[p], tmpkqcd[p, 6])
-        if not np.ma.is_masked(nc_dwpk[p]):
-            dwpf = check(convert_value(nc_dwpk[p], "degK", "degF"))
-            dwpf_qc_av = figure(nc_dwpk[p], dwpkqcd[p, 0])
-            dwpf_qc_sc = figure(nc_dwpk[p], dwpkqcd[p, 6])
-        if not np.ma.is_masked(nc_alti[p]):
-            alti = check((nc_alti[p] / 100.0) * 0.0295298)
-            alti_qc_av = figure_alti(altiqcd[p, 0] * 0.0295298)
-            alti_qc_sc = figure_alti(altiqcd[p, 6] * 0.0295298)
-        sql = """
-            UPDATE current_qc c SET tmpf = %s, tmpf_qc_av = %s,
-            tmpf_qc_sc = %s, dwpf = %s, dwpf_qc_av = %s,
-            dwpf_qc_sc = %s, alti = %s, alti_qc_av = %s,
-            alti_qc_sc = %s, valid = %s FROM stations t
-            WHERE c.iemid = t.iemid and t.id = %s and
-            t.network in ('ISUSM', 'IA_RWIS')
-        """
-        args = (
-            tmpf,
-            tmpf_qc_av,
-            tmpf_qc_sc,
-            dwpf,
-            dwpf_qc_av,
-            dwpf_qc_sc,
-            alti,
-            alti_qc_av,
-            alti_qc_sc,
-            ts,
-            sid,
-        )
-        icursor.execute(sql, args)
-        if icursor.rowcount == 0:
-            # Add entry
-            LOG.warning("Adding current_qc entry for %s", sid)
-            icursor.execute(
-                "INSERT into current_qc (iemid) "
-                "SELECT iemid from stations where id = %s "
-                "and network in ('ISUSM', 'IA_RWIS')",
-                (sid,),
+        idx = np.nonzero(np.isin(providers, PROVIDERS))[0]
+        stations = chartostring(nc.variables["stationId"][:])[idx]
+        # Only the last record per station is kept, so the update is sane
+        _, ridx = np.unique(stations[::-1], return_index=True)
+        keep = np.sort(len(idx) - 1 - ridx)
+        idx = idx[keep]
+        stations = stations[keep]
+        tmpk = tofloat(nc.variables["temperature"][:][idx])
+        dwpk = tofloat(nc.variables["dewpoint"][:][idx])
+        alti = tofloat(nc.variables["altimeter"][:][idx])
+        tmpkqcd = tofloat(nc.variables["temperatureQCD"][:][idx])
+        dwpkqcd = tofloat(nc.variables["dewpointQCD"][:][idx])
+        altiqcd = tofloat(nc.variables["altimeterQCD"][:][idx])
+        times = np.ma.filled(nc.variables["observationTime"][:][idx], 0)
+    if idx.size == 0:
+        LOG.info("No %s records found in %s", PROVIDERS, fn)
+        return
+
+    epoch = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+    cols = {
+        "tmpf": check(convert_value(tmpk, "degK", "degF")),
+        "tmpf_qc_av": figure(tmpk, tmpkqcd[:, 0]),
+        "tmpf_qc_sc": figure(tmpk, tmpkqcd[:, 6]),
+        "dwpf": check(convert_value(dwpk, "degK", "degF")),
+        "dwpf_qc_av": figure(dwpk, dwpkqcd[:, 0]),
+        "dwpf_qc_sc": figure(dwpk, dwpkqcd[:, 6]),
+        "alti": check(alti / 100.0 * 0.0295298),
+        "alti_qc_av": figure_alti(altiqcd[:, 0] * 0.0295298),
+        "alti_qc_sc": figure_alti(altiqcd[:, 6] * 0.0295298),
+    }
+    # QC values are meaningless without an observation
+    for col in ["tmpf", "dwpf", "alti"]:
+        for suffix in ["_qc_av", "_qc_sc"]:
+            cols[col + suffix] = np.where(
+                np.isnan(cols[col]), np.nan, cols[col + suffix]
             )
-            if icursor.rowcount == 0:
-                LOG.warning("Unknown station? %s", sid)
+    valid = [epoch + datetime.timedelta(seconds=int(x)) for x in times]
 
+    pgconn = get_dbconn("iem")
+    icursor = pgconn.cursor()
+    # Add any missing current_qc entries in one go
+    icursor.execute(
+        "INSERT into current_qc (iemid) SELECT t.iemid from stations t "
+        "LEFT JOIN current_qc c on (t.iemid = c.iemid) WHERE t.id = ANY(%s) "
+        "and t.network in ('ISUSM', 'IA_RWIS') and c.iemid is null",
+        (stations.tolist(),),
+    )
+    if icursor.rowcount > 0:
+        LOG.warning("Added %s current_qc entries", icursor.rowcount)
+    # A single bulk update, the data arrives as parallel arrays
+    colnames = list(cols.keys())
+    icursor.execute(
+        f"""
+        UPDATE current_qc c SET
+        {", ".join(f"{col} = d.{col}" for col in colnames)}, valid = d.valid
+        FROM stations t, unnest(%s::text[], %s::timestamptz[],
+        {", ".join(["%s::float8[]"] * len(colnames))})
+        as d(sid, valid, {", ".join(colnames)})
+        WHERE c.iemid = t.iemid and t.id = d.sid and
+        t.network in ('ISUSM', 'IA_RWIS')
+        """,
+        (
+            stations.tolist(),
+            valid,
+            *[nan2none(cols[col]) for col in colnames],
+        ),
+    )
+    LOG.info("Updated %s/%s current_qc rows", icursor.rowcount, idx.size)
     icursor.close()
     pgconn.commit()
     pgconn.close()
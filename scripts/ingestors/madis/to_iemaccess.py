@@ -1,7 +1,7 @@
 """Suck in MADIS data into the iemdb.
 
 Run from RUN_20MIN.sh
-RUN_20_AFTER for previous hour
+run_jobs.py 20_after for previous hour
 RUN_40_AFTER for 2 hours ago.
 """
 import datetime
@@ -42,11 +42,11 @@ def find_file(offset0):
     return fn
 
 
-def sanity_check(val, lower, upper):
-    """Simple bounds check"""
-    if lower < val < upper:
-        return float(val)
-    return None
+def bounded(arr, lower, upper):
+    """Simple bounds check, returning a float array with NaN for bad."""
+    arr = np.ma.filled(np.ma.asarray(arr, dtype=float), np.nan)
+    with np.errstate(invalid="ignore"):
+        return np.where((arr > lower) & (arr < upper), arr, np.nan)
 
 
 def provider2network(provider, name):
@@ -81,6 +81,41 @@ def build_roadstate_xref(ncvar):
     return xref
 
 
+def compute_networks(providers, names):
+    """Vectorized provider2network, only evaluating unique combinations."""
+    networks = np.full(providers.shape, None, dtype=object)
+    uproviders, inverse = np.unique(providers, return_inverse=True)
+    for idx, provider in enumerate(uproviders):
+        if not provider.endswith("DOT") and provider not in MY_PROVIDERS:
+            continue
+        rows = inverse == idx
+        if provider != "MesoWest":
+            networks[rows] = provider2network(provider, "")
+            continue
+        # MesoWest encodes the network within the station name
+        unames, ninverse = np.unique(names[rows], return_inverse=True)
+        lookup = np.array(
+            [provider2network(provider, name) for name in unames],
+            dtype=object,
+        )
+        networks[rows] = lookup[ninverse]
+    return networks
+
+
+def last_record_index(stations, keep):
+    """Return record indices, with only the last record kept per station."""
+    idx = np.nonzero(keep)[0]
+    # np.unique returns the first occurrence, so search the reversed array
+    _, ridx = np.unique(stations[idx][::-1], return_index=True)
+    return np.sort(idx[::-1][ridx])
+
+
+def build_roadstate(values, xref):
+    """Map road state codes into text values, None when missing."""
+    codes = np.ma.filled(np.ma.asarray(values), -9999)
+    return np.array([xref.get(code) for code in codes.tolist()], dtype=object)
+
+
 def main(argv):
     """Do Something"""
     pgconn, icursor = get_dbconnc("iem")
@@ -90,138 +125,82 @@ def main(argv):
     stations = chartostring(nc.variables["stationId"][:])
     providers = chartostring(nc.variables["dataProvider"][:])
     names = chartostring(nc.variables["stationName"][:])
-
-    tmpk = nc.variables["temperature"][:]
-    dwpk = nc.variables["dewpoint"][:]
-    relh = nc.variables["relHumidity"][:]
-
-    # Set some data bounds to keep mcalc from complaining
-    tmpk = np.where(
-        np.ma.logical_or(np.ma.less(tmpk, 200), np.ma.greater(tmpk, 320)),
-        np.nan,
-        tmpk,
-    )
-    dwpk = np.where(
-        np.ma.logical_or(np.ma.less(dwpk, 200), np.ma.greater(dwpk, 320)),
-        np.nan,
-        dwpk,
-    )
-    relh = np.where(
-        np.ma.logical_and(np.ma.less(relh, 100.1), np.ma.greater(relh, 0)),
-        relh,
-        np.nan,
-    )
-    obtime = nc.variables["observationTime"][:]
-    pressure = nc.variables["stationPressure"][:]
-    # altimeter = nc.variables["altimeter"][:]
-    # slp = nc.variables["seaLevelPressure"][:]
-    drct = nc.variables["windDir"][:]
-    smps = nc.variables["windSpeed"][:]
-    gmps = nc.variables["windGust"][:]
-    # gmps_drct = nc.variables["windDirMax"][:]
-    pcpn = nc.variables["precipAccum"][:]
-    rtk1 = nc.variables["roadTemperature1"][:]
-    rtk2 = nc.variables["roadTemperature2"][:]
-    rtk3 = nc.variables["roadTemperature3"][:]
-    rtk4 = nc.variables["roadTemperature4"][:]
-    subk1 = nc.variables["roadSubsurfaceTemp1"][:]
-    rstate1 = nc.variables["roadState1"][:]
+    networks = compute_networks(providers, names)
+    idx = last_record_index(stations, networks != None)  # noqa
+    LOG.info("Found %s/%s records of interest", len(idx), len(providers))
+    stations = stations[idx]
+    networks = networks[idx]
+
+    def _read(varname, lower, upper):
+        """Subset and bounds check a variable."""
+        return bounded(nc.variables[varname][:][idx], lower, upper)
+
+    data = {
+        "tmpf": convert_value(_read("temperature", 200, 320), "degK", "degF"),
+        "dwpf": convert_value(_read("dewpoint", 200, 320), "degK", "degF"),
+        "relh": _read("relHumidity", 0, 100.1),
+        "drct": _read("windDir", -1, 361),
+        "sknt": convert_value(
+            _read("windSpeed", -1, 200), "meter / second", "knot"
+        ),
+        "gust": convert_value(
+            _read("windGust", -1, 200), "meter / second", "knot"
+        ),
+        "pres": _read("stationPressure", 0, 1000000) / 100.0 * 0.02952,
+        "vsby": bounded(
+            convert_value(nc.variables["visibility"][:][idx], "meter", "mile"),
+            0,
+            30,
+        ),
+        "rwis_subf": convert_value(
+            _read("roadSubsurfaceTemp1", 0, 500), "degK", "degF"
+        ),
+        "pday": np.round(mm2inch(_read("precipAccum", -1, 5000)), 2),
+    }
+    for i in range(4):
+        data[f"tsf{i}"] = convert_value(
+            _read(f"roadTemperature{i + 1}", 0, 500), "degK", "degF"
+        )
     road_state_xref = build_roadstate_xref(nc.variables["roadState1"])
-    rstate2 = nc.variables["roadState2"][:]
-    rstate3 = nc.variables["roadState3"][:]
-    rstate4 = nc.variables["roadState4"][:]
-    vsby = convert_value(nc.variables["visibility"][:], "meter", "mile")
+    scond = {
+        f"scond{i}": build_roadstate(
+            nc.variables[f"roadState{i + 1}"][:][idx], road_state_xref
+        )
+        for i in range(4)
+    }
+    obtime = np.ma.filled(nc.variables["observationTime"][:][idx], 0)
     nc.close()
 
-    db = {}
-
-    for recnum, provider in enumerate(providers):
-        name = names[recnum]
-        network = provider2network(provider, name)
-        if network is None:
-            continue
-        LOG.debug("provider: %s name: %s network: %s", provider, name, network)
-        this_station = stations[recnum]
-        db[this_station] = {}
-        ticks = obtime[recnum]
-        ts = datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=ticks)
-        db[this_station]["ts"] = ts.replace(tzinfo=ZoneInfo("UTC"))
-        db[this_station]["network"] = network
-        db[this_station]["pres"] = sanity_check(pressure[recnum], 0, 1000000)
-        db[this_station]["tmpk"] = sanity_check(tmpk[recnum], 200, 330)
-        db[this_station]["dwpk"] = sanity_check(dwpk[recnum], 200, 330)
-        db[this_station]["relh"] = sanity_check(relh[recnum], 0, 100.1)
-        db[this_station]["drct"] = sanity_check(drct[recnum], -1, 361)
-        db[this_station]["smps"] = sanity_check(smps[recnum], -1, 200)
-        db[this_station]["gmps"] = sanity_check(gmps[recnum], -1, 200)
-        db[this_station]["rtk1"] = sanity_check(rtk1[recnum], 0, 500)
-        db[this_station]["rtk2"] = sanity_check(rtk2[recnum], 0, 500)
-        db[this_station]["rtk3"] = sanity_check(rtk3[recnum], 0, 500)
-        db[this_station]["rtk4"] = sanity_check(rtk4[recnum], 0, 500)
-        db[this_station]["subk"] = sanity_check(subk1[recnum], 0, 500)
-        db[this_station]["pday"] = sanity_check(pcpn[recnum], -1, 5000)
-        db[this_station]["vsby"] = sanity_check(vsby[recnum], 0, 30)
-        if rstate1[recnum] is not np.ma.masked:
-            db[this_station]["scond0"] = road_state_xref.get(rstate1[recnum])
-        if rstate2[recnum] is not np.ma.masked:
-            db[this_station]["scond1"] = road_state_xref.get(rstate2[recnum])
-        if rstate3[recnum] is not np.ma.masked:
-            db[this_station]["scond2"] = road_state_xref.get(rstate3[recnum])
-        if rstate4[recnum] is not np.ma.masked:
-            db[this_station]["scond3"] = road_state_xref.get(rstate4[recnum])
-
-    for sid, val in db.items():
-        iem = Observation(sid, val["network"], val["ts"])
-        for colname in ["scond0", "scond1", "scond2", "scond3"]:
-            iem.data[colname] = val.get(colname)
-        if val["tmpk"] is not None:
-            iem.data["tmpf"] = convert_value(val["tmpk"], "degK", "degF")
-        if val["dwpk"] is not None:
-            iem.data["dwpf"] = convert_value(val["dwpk"], "degK", "degF")
-        if val["relh"] is not None and val["relh"] is not np.ma.masked:
-            iem.data["relh"] = float(val["relh"])
-        if val["drct"] is not None:
-            iem.data["drct"] = val["drct"]
-        if val["smps"] is not None:
-            iem.data["sknt"] = convert_value(
-                val["smps"], "meter / second", "knot"
-            )
-        if val["gmps"] is not None:
-            iem.data["gust"] = convert_value(
-                val["gmps"], "meter / second", "knot"
-            )
-        if val["pres"] is not None:
-            iem.data["pres"] = (float(val["pres"]) / 100.00) * 0.02952
-        if val["rtk1"] is not None:
-            iem.data["tsf0"] = convert_value(val["rtk1"], "degK", "degF")
-        if val["rtk2"] is not None:
-            iem.data["tsf1"] = convert_value(val["rtk2"], "degK", "degF")
-        if val["rtk3"] is not None:
-            iem.data["tsf2"] = convert_value(val["rtk3"], "degK", "degF")
-        if val["rtk4"] is not None:
-            iem.data["tsf3"] = convert_value(val["rtk4"], "degK", "degF")
-        if val["vsby"] is not None:
-            iem.data["vsby"] = val["vsby"]
-        if val["subk"] is not None:
-            iem.data["rwis_subf"] = convert_value(val["subk"], "degK", "degF")
-        if val["pday"] is not None:
-            iem.data["pday"] = round(mm2inch(val["pday"]), 2)
+    epoch = datetime.datetime(1970, 1, 1, tzinfo=ZoneInfo("UTC"))
+    # Convert columns to lists once, so to avoid numpy scalar overhead
+    data = {k: v.tolist() for k, v in data.items()}
+    scond = {k: v.tolist() for k, v in scond.items()}
+    new_stations = False
+    for row, sid in enumerate(stations.tolist()):
+        valid = epoch + datetime.timedelta(seconds=int(obtime[row]))
+        iem = Observation(sid, networks[row], valid)
+        for colname, values in scond.items():
+            iem.data[colname] = values[row]
+        for colname, values in data.items():
+            if not np.isnan(values[row]):
+                iem.data[colname] = values[row]
         if not iem.save(icursor):
             LOG.warning(
                 "MADIS Extract: %s found new station: %s network: %s" "",
                 fn.split("/")[-1],
                 sid,
-                val["network"],
+                networks[row],
             )
-            subprocess.call(["python", "sync_stations.py", fn])
-            os.chdir("../../dbutil")
-            subprocess.call(["sh", "SYNC_STATIONS.sh"])
-            os.chdir("../ingestors/madis")
-            LOG.info("...done with sync.")
-        del iem
+            new_stations = True
     icursor.close()
     pgconn.commit()
     pgconn.close()
+    if new_stations:
+        subprocess.call(["python", "sync_stations.py", fn])
+        os.chdir("../../dbutil")
+        subprocess.call(["sh", "SYNC_STATIONS.sh"])
+        os.chdir("../ingestors/madis")
+        LOG.info("...done with sync.")
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 """Create the RR5 SHEF product that the Weather Bureau Desires
 
-Run from RUN_20_AFTER.sh
+Run from run_jobs.py 20_after
 
 """
 import datetime
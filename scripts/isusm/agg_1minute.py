@@ -1,7 +1,7 @@
 """
 Need to do some custom 1 minute data aggregation to fill out hourly table.
 
-RUN_20_AFTER.sh
+run_jobs.py 20_after
 """
 import datetime
 import sys
@@ -1,6 +1,6 @@
 """Aggregate ISUSM Precipitation.
 
-called from RUN_5MIN.sh
+called from run_jobs.py 5min
 """
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
@@ -1,6 +1,6 @@
 """Dump the MADIS CSV file to LDM.
 
-Run from RUN_5MIN.sh
+Run from run_jobs.py 5min
 """
 import os
 import subprocess
@@ -3,14 +3,19 @@
 
  run from RUN_10_AFTER.sh
 
+ Decoded grids are cached as memory-mapped float32 arrays, keyed by product
+ and valid time, so that the various accumulation windows and reruns share
+ a single decode of each GRIB file.
 """
 import datetime
+import glob
 import gzip
 import json
 import os
 import subprocess
 import sys
 import tempfile
+import time
 
 import numpy as np
 import pygrib
@@ -20,8 +25,12 @@ from pyiem.util import logger
 
 LOG = logger()
 TMP = "/mesonet/tmp"
+GRID_CACHE_DIR = f"{TMP}/mrms_grid_cache"
+# 72 hour window plus the six hour reprocessing offset, with some slop
+GRID_CACHE_MAXAGE = 4 * 86400
 MISSED_FILES = []
 DOWNLOADED_FILES = []
+GRIDS = {}
 
 
 def convert_to_image(data):
@@ -64,10 +73,47 @@ def convert_to_image(data):
 
 
 def cleanup():
-    """Remove tmp downloaded files"""
+    """Remove tmp downloaded files and expire old cached grids"""
     for fn in DOWNLOADED_FILES:
         if os.path.isfile(fn):
             os.unlink(fn)
+    GRIDS.clear()
+    threshold = time.time() - GRID_CACHE_MAXAGE
+    for fn in glob.glob(f"{GRID_CACHE_DIR}/*.npy"):
+        if os.stat(fn).st_mtime < threshold:
+            LOG.info("Expiring cached grid %s", fn)
+            os.unlink(fn)
+
+
+def decode_grib(gribfn):
+    """Decompress and decode a gzipped GRIB file without temp files."""
+    with gzip.open(gribfn, "rb") as fh:
+        grb = pygrib.fromstring(fh.read())
+    # careful here, missing values are carried as negative numbers
+    return np.ma.filled(grb.values, -3).astype(np.float32)
+
+
+def get_grid(mproduct, valid):
+    """Get the decoded grid for this product and time, None if missing.
+
+    Grids are returned as read-only memory maps, fetching and decoding
+    the GRIB only when it is not already within the cache.
+    """
+    key = f"{mproduct}_{valid:%Y%m%d%H%M}"
+    if key in GRIDS:
+        return GRIDS[key]
+    cachefn = f"{GRID_CACHE_DIR}/{key}.npy"
+    if not os.path.isfile(cachefn):
+        gribfn = mrms.fetch(mproduct, valid)
+        if gribfn is None:
+            return None
+        DOWNLOADED_FILES.append(gribfn)
+        os.makedirs(GRID_CACHE_DIR, exist_ok=True)
+        tmpfn = f"{cachefn}.{os.getpid()}.npy"
+        np.save(tmpfn, decode_grib(gribfn))
+        os.rename(tmpfn, cachefn)
+    GRIDS[key] = np.load(cachefn, mmap_mode="r")
+    return GRIDS[key]
 
 
 def is_realtime(gts):
@@ -111,33 +157,22 @@ def doit(gts, hr):
     total = None
     mproduct = "RadarOnly_QPE_24H" if hr >= 24 else "RadarOnly_QPE_01H"
     for now in times:
-        gribfn = mrms.fetch(mproduct, now)
-        if gribfn is None:
+        grid = get_grid(mproduct, now)
+        if grid is None:
             LOG.warning(
-                "%s MISSING %s\n  %s\n",
-                hr,
-                now.strftime("%Y-%m-%dT%H:%MZ"),
-                gribfn,
+                "%s MISSING %s %s", hr, mproduct, f"{now:%Y-%m-%dT%H:%MZ}"
             )
-            MISSED_FILES.append(gribfn)
+            MISSED_FILES.append(f"{mproduct} {now:%Y-%m-%dT%H:%MZ}")
             return
-        DOWNLOADED_FILES.append(gribfn)
-        (tmpfp, tmpfn) = tempfile.mkstemp()
-        with gzip.GzipFile(gribfn, "rb") as fp:
-            with open(tmpfn, "wb") as tmpfp:
-                tmpfp.write(fp.read())
-        grbs = pygrib.open(tmpfn)
-        grb = grbs[1]
-        os.unlink(tmpfn)
 
         # careful here, how we deal with the two missing values!
         if total is None:
-            total = grb["values"]
+            total = np.array(grid)
         else:
-            maxgrid = np.maximum(grb["values"], total)
+            maxgrid = np.maximum(grid, total)
             total = np.where(
-                np.logical_and(grb["values"] >= 0, total >= 0),
-                grb["values"] + total,
+                np.logical_and(grid >= 0, total >= 0),
+                grid + total,
                 maxgrid,
             )
 
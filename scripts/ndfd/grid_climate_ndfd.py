@@ -2,11 +2,11 @@
 import datetime
 
 import numpy as np
+from iemweb.regrid import nn_regrid
 from pyiem import iemre
 from pyiem.network import Table as NetworkTable
 from pyiem.reference import state_names
 from pyiem.util import convert_value, get_dbconnc, ncopen
-from scipy.interpolate import NearestNDInterpolator
 
 NT = NetworkTable([f"{abbr}CLIMATE" for abbr in state_names])
 
@@ -30,8 +30,14 @@ def generic_gridder(nc, cursor, idx):
         )
         return None
 
-    nn = NearestNDInterpolator((lons, lats), np.array(vals))
-    grid = nn(nc.variables["lon"][:], nc.variables["lat"][:])
+    grid = nn_regrid(
+        lons,
+        lats,
+        vals,
+        nc.variables["lon"][:],
+        nc.variables["lat"][:],
+        persist=False,
+    )
     print(
         ("%s %s %.3f %.3f")
         % (cursor.rowcount, idx, np.max(grid), np.min(grid))
@@ -1,6 +1,6 @@
 """Copy NDFD grib data to IEMRE...
 
-Run from RUN_20_AFTER.sh
+Run from run_jobs.py 20_after
 """
 import os
 import shutil
@@ -8,9 +8,9 @@ from datetime import date, timedelta
 
 import numpy as np
 import pygrib
+from iemweb.regrid import nn_regrid
 from pyiem import iemre
 from pyiem.util import logger, ncopen, utc
-from scipy.interpolate import NearestNDInterpolator
 
 LOG = logger()
 
@@ -104,8 +104,9 @@ def do_target(nc, now, target, day, xi, yi, vname):
             ):
                 # This is 0z
                 LOG.info("%s_tmpk day: %s fn: %s", ncvar, day, testfn)
-                nn = NearestNDInterpolator((lons, lats), np.ravel(grb.values))
-                nc.variables[f"{ncvar}_tmpk"][day, :, :] = nn(xi, yi)
+                nc.variables[f"{ncvar}_tmpk"][day, :, :] = nn_regrid(
+                    lons, lats, grb.values, xi, yi
+                )
                 found = True
         grbs.close()
         hour += 1
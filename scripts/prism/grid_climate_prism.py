@@ -3,11 +3,11 @@ import datetime
 import sys
 
 import numpy as np
+from iemweb.regrid import nn_regrid
 from pyiem import iemre
 from pyiem.network import Table as NetworkTable
 from pyiem.reference import state_names
 from pyiem.util import convert_value, get_dbconnc, logger, ncopen
-from scipy.interpolate import NearestNDInterpolator
 
 LOG = logger()
 NT = NetworkTable(["%sCLIMATE" % (abbr,) for abbr in state_names])
@@ -33,8 +33,7 @@ def generic_gridder(nc, cursor, idx):
         return None
 
     xi, yi = np.meshgrid(nc.variables["lon"][:], nc.variables["lat"][:])
-    nn = NearestNDInterpolator((lons, lats), np.array(vals))
-    grid = nn(xi, yi)
+    grid = nn_regrid(lons, lats, vals, xi, yi, persist=False)
     LOG.info(
         "%s %s %.3f %.3f",
         cursor.rowcount,
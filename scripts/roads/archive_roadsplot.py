@@ -1,6 +1,6 @@
 """Archive a road conditions plot every 5 minutes.
 
-Called from RUN_5MIN.sh
+Called from run_jobs.py 5min
 """
 import datetime
 import os
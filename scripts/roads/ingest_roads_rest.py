@@ -1,6 +1,6 @@
 """Consume DOT REST Service with Iowa Winter Road Conditions
 
-Run every five minutes from RUN_5MIN.sh
+Run every five minutes from run_jobs.py 5min
 
       "attributes" : {
         "OBJECTID" : 38,
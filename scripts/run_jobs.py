@@ -0,0 +1,245 @@
+"""Run a cron schedule of jobs as a dependency graph.
+
+This replaces the RUN_*.sh chains that cd around and start a fresh python
+interpreter per script.  Here, a forkserver process imports the heavy
+libraries once, and each job is a fork of that warm process that executes
+the script as ``__main__`` with the given arguments.  So the existing
+``if __name__ == "__main__": main(sys.argv)`` entry points work unchanged.
+Non-python jobs (ie ``./RUN_PLOTS``) run as a subprocess.
+
+Each job may declare jobs it must run ``after``, a ``timeout`` in seconds
+after which it is killed, and arguments as strftime templates against the
+(optionally ``offset``) UTC schedule time.  At most WORKERS jobs run at
+once.  The duration and exit status of each job are logged and written to
+STATUS_DIR/<schedule>.json
+
+    python run_jobs.py <schedule> [YYYY mm dd HH MI]
+"""
+import datetime
+import json
+import multiprocessing
+import os
+import runpy
+import subprocess
+import sys
+import time
+
+from pyiem.util import logger, utc
+
+LOG = logger()
+SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+STATUS_DIR = "/mesonet/tmp/run_jobs"
+WORKERS = 6
+DEFAULT_TIMEOUT = 600
+PRELOAD = ["numpy", "pandas", "matplotlib", "pyiem.util", "pyiem.plot"]
+
+
+def job(name, path, args="", after=None, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """Build a job definition.
+
+    Args:
+      name (str): unique name within the schedule
+      path (str): script path relative to the scripts directory
+      args (str): space separated arguments, formatted with strftime
+      after (list): names of jobs that must finish first
+      timeout (int): seconds before the job is killed
+      offset (timedelta): applied to the schedule time for ``args``
+    """
+    return {
+        "name": name,
+        "path": path,
+        "args": args,
+        "after": after or [],
+        "timeout": timeout,
+        "offset": kwargs.get("offset", datetime.timedelta(0)),
+    }
+
+
+def _imerg(hours, minute, extra=""):
+    """Helper for the download_imerg.py invocations."""
+    return job(
+        f"imerg_{hours}h_{minute}",
+        "dl/download_imerg.py",
+        f"%Y %m %d %H {minute} {extra}".strip(),
+        offset=datetime.timedelta(hours=-hours),
+    )
+
+
+def _serial(jobs):
+    """Chain the jobs so they run one after another."""
+    for prev, this in zip(jobs[:-1], jobs[1:]):
+        this["after"].append(prev["name"])
+    return jobs
+
+
+SCHEDULES = {
+    "5min": [
+        job("nws_wawa_archive", "cache/nws_wawa_archive.py"),
+        job("seed_tiles", "cache/seed_tiles.py"),
+        job("agg_precip", "isusm/agg_precip.py"),
+        job("csv2ldm", "isusm/csv2ldm.py"),
+        job(
+            "archive_roadsplot",
+            "roads/archive_roadsplot.py",
+            "%Y %m %d %H %M",
+        ),
+        job("ingest_roads_rest", "roads/ingest_roads_rest.py"),
+        job("ingest_ifc_precip", "ingestors/ifc/ingest_ifc_precip.py"),
+        job("radar_composite", "dl/radar_composite.py", "%Y %m %d %H %M"),
+        job("24h_lsr", "GIS/24h_lsr.py"),
+        job("lsr_snow_mapper", "current/lsr_snow_mapper.py"),
+        job("process_rwis", "ingestors/rwis/process_rwis.py"),
+        job("process_soil", "ingestors/rwis/process_soil.py"),
+        job("ingest_rw", "ingestors/rwis/ingest_rw.py"),
+    ],
+    "20_after": [
+        job(
+            "download_gfs",
+            "dl/download_gfs.py",
+            "%Y %m %d %H",
+            offset=datetime.timedelta(hours=-6),
+            timeout=1800,
+        ),
+        # Be nice to NASA and fetch these one at a time
+        *_serial(
+            [
+                _imerg(7, "00"),
+                _imerg(7, "30", "ac"),
+                _imerg(27, "00"),
+                _imerg(27, "30"),
+                _imerg(35, "00"),
+                _imerg(35, "30"),
+                _imerg(4380, "00"),
+                _imerg(4380, "30"),
+            ]
+        ),
+        job("extract_hfmetar", "ingestors/madis/extract_hfmetar.py", "0"),
+        job("madis_to_iemaccess", "ingestors/madis/to_iemaccess.py", "1"),
+        job("run_plots", "plots/RUN_PLOTS"),
+        job("ndfd2iemre", "ndfd/ndfd2iemre.py"),
+        job("agg_1minute", "isusm/agg_1minute.py"),
+        job("isusm2rr5", "isuag/isusm2rr5.py", after=["agg_1minute"]),
+        job("compute_hads_pday", "hads/compute_hads_pday.py"),
+        job("uscrn_ingest", "ingestors/uscrn_ingest.py"),
+        job(
+            "compute_uscrn_pday",
+            "uscrn/compute_uscrn_pday.py",
+            after=["uscrn_ingest"],
+        ),
+    ],
+}
+
+
+def run_job(path, argv):
+    """Child process entry, run the script as if from the command line."""
+    os.chdir(os.path.dirname(path))
+    if not path.endswith(".py"):
+        sys.exit(subprocess.run([path, *argv[1:]], check=False).returncode)
+    sys.argv = argv
+    runpy.run_path(path, run_name="__main__")
+
+
+def get_argv(jobdef, valid):
+    """Compute the argv for this job."""
+    path = os.path.join(SCRIPTS, jobdef["path"])
+    args = (valid + jobdef["offset"]).strftime(jobdef["args"]).split()
+    return path, [path, *args]
+
+
+def validate(jobs):
+    """Ensure the dependency graph makes sense.
+
+    Raises:
+      ValueError for duplicate names, unknown dependencies or cycles
+    """
+    names = [j["name"] for j in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError("Duplicate job names found")
+    deps = {j["name"]: set(j["after"]) for j in jobs}
+    for name, after in deps.items():
+        if not after.issubset(deps):
+            raise ValueError(f"{name} depends on unknown {after - set(deps)}")
+    done = set()
+    while len(done) < len(deps):
+        ready = [n for n in deps if n not in done and deps[n] <= done]
+        if not ready:
+            raise ValueError(f"Cycle found among {set(deps) - done}")
+        done.update(ready)
+
+
+def run_schedule(jobs, valid, workers=WORKERS):
+    """Run the jobs, returning a dict of their results."""
+    validate(jobs)
+    ctx = multiprocessing.get_context("forkserver")
+    ctx.set_forkserver_preload(PRELOAD)
+    pending = {j["name"]: j for j in jobs}
+    running = {}
+    results = {}
+    while pending or running:
+        # Launch whatever is ready, a failed dependency skips the job
+        for name, jobdef in list(pending.items()):
+            if len(running) >= workers:
+                break
+            if not all(dep in results for dep in jobdef["after"]):
+                continue
+            pending.pop(name)
+            failed = [d for d in jobdef["after"] if results[d]["status"]]
+            if failed:
+                LOG.warning("Skipping %s as %s failed", name, failed)
+                results[name] = {"status": "skipped", "duration": 0}
+                continue
+            proc = ctx.Process(
+                target=run_job, args=get_argv(jobdef, valid), name=name
+            )
+            proc.start()
+            running[name] = (proc, time.monotonic(), jobdef["timeout"])
+        time.sleep(0.1)
+        for name, (proc, started, timeout) in list(running.items()):
+            duration = time.monotonic() - started
+            if proc.is_alive():
+                if duration < timeout:
+                    continue
+                LOG.warning("Killing %s after %.0fs", name, duration)
+                proc.kill()
+                proc.join()
+                status = "timeout"
+            else:
+                status = proc.exitcode
+            running.pop(name)
+            results[name] = {"status": status, "duration": round(duration, 2)}
+            if status:
+                LOG.warning("%s failed with %s", name, status)
+            else:
+                LOG.info("%s finished in %.2fs", name, duration)
+    return results
+
+
+def write_status(schedule, valid, results):
+    """Save the results for this schedule run."""
+    os.makedirs(STATUS_DIR, exist_ok=True)
+    fn = f"{STATUS_DIR}/{schedule}.json"
+    with open(f"{fn}.tmp", "w", encoding="utf-8") as fh:
+        json.dump(
+            {"valid": valid.strftime("%Y-%m-%dT%H:%M:%SZ"), "jobs": results},
+            fh,
+            indent=1,
+        )
+    os.rename(f"{fn}.tmp", fn)
+
+
+def main(argv):
+    """Go Main Go."""
+    schedule = argv[1]
+    if len(argv) == 7:
+        valid = utc(*[int(x) for x in argv[2:7]])
+    else:
+        valid = utc().replace(second=0, microsecond=0)
+    results = run_schedule(SCHEDULES[schedule], valid)
+    write_status(schedule, valid, results)
+    failures = [n for n, r in results.items() if r["status"]]
+    if failures:
+        LOG.warning("%s failed jobs: %s", schedule, failures)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,82 @@
+"""Maintain the store of rasterized storm based warning footprints.
+
+New SBW polygons are rasterized onto the fixed 0.01 degree grid and added
+to the yearly files used by autoplot 90, see iemweb.sbwraster
+
+Called from RUN_10MIN.sh for recent warnings.  Years are only used by
+autoplot 90 once a run has covered them from 1 January, otherwise that app
+rasterizes from the database on demand.  So after deploying, backfill the
+archive (SBW polygons start in 2002) once with
+
+    python rasterize_sbw.py [YYYY] [YYYY2]
+"""
+import datetime
+import sys
+
+from iemweb.sbwraster import (
+    build_store,
+    footprint_event,
+    load_store,
+    mark_complete,
+    save_store,
+    store_events,
+)
+from pyiem.util import get_dbconn, logger, utc
+
+LOG = logger()
+LOOKBACK = datetime.timedelta(days=2)
+
+
+def process_year(cursor, year, sts):
+    """Add any missing footprints for warnings issued since sts."""
+    cursor.execute(
+        f"""
+        SELECT phenomena, significance, wfo, eventid,
+        extract(epoch from issue)::bigint,
+        ST_AsBinary(ST_ForceRHR(ST_Buffer(geom, 0.0005))) from sbw_{year}
+        WHERE status = 'NEW' and ST_IsValid(geom) and issue >= %s
+        ORDER by issue ASC
+        """,
+        (sts,),
+    )
+    new = {}
+    for row in cursor:
+        new.setdefault((row[0], row[1]), []).append(row[2:])
+    for (phenomena, significance), rows in new.items():
+        events = store_events(load_store(year, phenomena, significance))
+        known = {(str(e["wfo"]), int(e["eventid"])) for e in events}
+        added = 0
+        for wfo, eventid, issue, geom in rows:
+            if (wfo, eventid) in known:
+                continue
+            known.add((wfo, eventid))
+            events.append(footprint_event(wfo, eventid, issue, geom))
+            added += 1
+        if added == 0:
+            continue
+        save_store(year, phenomena, significance, build_store(events))
+        LOG.info("%s %s.%s added %s", year, phenomena, significance, added)
+
+
+def main(argv):
+    """Go Main Go."""
+    if len(argv) > 1:
+        sts = None
+        year2 = int(argv[2]) if len(argv) > 2 else int(argv[1])
+        years = list(range(int(argv[1]), year2 + 1))
+    else:
+        sts = utc() - LOOKBACK
+        years = list(range(sts.year, utc().year + 1))
+    pgconn = get_dbconn("postgis")
+    cursor = pgconn.cursor()
+    for year in years:
+        yearsts = utc(year, 1, 1)
+        process_year(cursor, year, yearsts if sts is None else sts)
+        # The year is complete once a run has covered it from 1 January
+        if sts is None or sts <= yearsts:
+            mark_complete(year)
+    pgconn.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -1,20 +1,37 @@
 """NEXRAD max reflectivity summary images.
 
 Run from RUN_0Z.sh, RUN_10_AFTER.sh (6z)
+
+The composite is built from hourly partial maxima, which are cached to disk
+(with their frame count) once an hour is complete, so that overlapping
+windows (1h/3h/6h/24h) and reruns only need to decode frames that have not
+been seen yet.  Cached hours older than PARTIAL_MAXAGE are removed each run.
+
+    python max_reflect.py YYYY MM DD HH [hours]
 """
 import datetime
 import os
 import subprocess
 import sys
+import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import requests
-from osgeo import gdal, gdalconst
+from PIL import Image
 from pyiem.util import get_dbconn, logger, utc
 
 LOG = logger()
 URLBASE = "http://iem.local/GIS/radmap.php?width=1280&height=720&"
+ARCHIVE = "/mesonet/ARCHIVE/data/%Y/%m/%d/GIS/uscomp"
+PARTIAL_DIR = "/mesonet/tmp/max_reflect"
+INTERVAL = datetime.timedelta(minutes=5)
+FRAMES_PER_HOUR = 12
+# Cached hourly maxima are only useful for the longest (24h) window
+PARTIAL_MAXAGE = datetime.timedelta(days=2)
+# Image decoding releases the GIL, so threads are sufficient here
+WORKERS = 8
 
 
 def get_colortable(prod):
@@ -24,7 +41,7 @@ def get_colortable(prod):
       prod (str): product to get the table for
 
     Returns:
-      colortable
+      list of r, g, b values suitable for PIL putpalette
 
     """
     pgconn = get_dbconn("mesosite")
@@ -34,82 +51,167 @@ def get_colortable(prod):
         "(r.id = l.iemraster_id) WHERE r.name = %s ORDER by l.coloridx ASC",
         ("composite_" + prod,),
     )
-    ct = gdal.ColorTable()
-    for i, row in enumerate(cursor):
-        ct.SetColorEntry(i, (row[0], row[1], row[2], 255))
+    palette = []
+    for row in cursor:
+        palette.extend([row[0], row[1], row[2]])
     pgconn.close()
-    return ct
+    return palette
+
+
+def read_frame(fn):
+    """Decode a paletted composite PNG into its raw color indices."""
+    if not os.path.isfile(fn):
+        LOG.warning("missing file: %s", fn)
+        return None
+    with Image.open(fn) as img:
+        return np.asarray(img, dtype=np.uint8)
+
+
+def reduce_max(arrays):
+    """Max reduce an iterable of arrays in place, returns (max, count)."""
+    maxval = None
+    count = 0
+    for arr in arrays:
+        if arr is None:
+            continue
+        count += 1
+        if maxval is None:
+            maxval = arr.copy()
+            continue
+        np.maximum(maxval, arr, out=maxval)
+    return maxval, count
+
+
+def hourly_max(prod, sts, pool):
+    """Compute, or load from cache, the max for the hour starting at sts.
+
+    Args:
+      prod (str): product, either n0r or n0q
+      sts (datetime): start of the hour
+      pool (Executor): pool to decode frames within
+
+    Returns:
+      (np.ndarray or None, frame count)
+    """
+    cachefn = f"{PARTIAL_DIR}/{prod}_{sts:%Y%m%d%H}.npz"
+    if os.path.isfile(cachefn):
+        with np.load(cachefn) as npz:
+            return npz["maxval"], int(npz["count"])
+    fns = [
+        (sts + INTERVAL * i).strftime(f"{ARCHIVE}/{prod}_%Y%m%d%H%M.png")
+        for i in range(FRAMES_PER_HOUR)
+    ]
+    maxval, count = reduce_max(pool.map(read_frame, fns))
+    # Only cache hours that are complete or old enough to not get more data
+    ets = sts + datetime.timedelta(hours=1)
+    if maxval is not None and (
+        count == FRAMES_PER_HOUR or utc() - ets > datetime.timedelta(hours=6)
+    ):
+        os.makedirs(PARTIAL_DIR, exist_ok=True)
+        tmpfn = f"{cachefn}.{os.getpid()}.npz"
+        # Mostly zeros, so compresses very well
+        np.savez_compressed(tmpfn, maxval=maxval, count=count)
+        os.rename(tmpfn, cachefn)
+    return maxval, count
 
 
-def run(prod, sts):
+def cleanup_partials():
+    """Remove cached hourly maxima no longer needed by any window."""
+    if not os.path.isdir(PARTIAL_DIR):
+        return
+    cutoff = time.time() - PARTIAL_MAXAGE.total_seconds()
+    for fn in os.listdir(PARTIAL_DIR):
+        path = f"{PARTIAL_DIR}/{fn}"
+        if os.stat(path).st_mtime < cutoff:
+            os.unlink(path)
+
+
+def composite(prod, sts, ets, pool=None):
+    """Compute the max composite over the given window.
+
+    Args:
+      prod (str): product, either n0r or n0q
+      sts (datetime): start time, rounded down to the hour
+      ets (datetime): end time (exclusive), rounded up to the hour
+      pool (Executor, optional): pool to use for frame decoding
+
+    Returns:
+      (np.ndarray or None, frame count)
+    """
+    sts = sts.replace(minute=0, second=0, microsecond=0)
+    hours = int(np.ceil((ets - sts).total_seconds() / 3600.0))
+    owned = pool is None
+    if owned:
+        pool = ThreadPoolExecutor(WORKERS)
+    maxval = None
+    frames = 0
+    try:
+        for hour in range(hours):
+            now = sts + datetime.timedelta(hours=hour)
+            hmax, count = hourly_max(prod, now, pool)
+            LOG.info("%s %s had %s frames", prod, now, count)
+            frames += count
+            if hmax is None:
+                continue
+            if maxval is None:
+                maxval = hmax.copy()
+            else:
+                np.maximum(maxval, hmax, out=maxval)
+    finally:
+        if owned:
+            pool.shutdown()
+    return maxval, frames
+
+
+def write_png(data, palette, fn):
+    """Write a paletted PNG directly."""
+    png = Image.fromarray(data)
+    png.putpalette(palette)
+    png.save(fn)
+
+
+def run(prod, sts, hours=24):
     """Create a max dbZ plot
 
     Args:
       prod (str): Product to run for, either n0r or n0q
       sts (datetime): date to run for
+      hours (int): window size in hours
     """
     yest = utc() - datetime.timedelta(days=1)
     routes = "ac" if sts.date() == yest.date() else "a"
-    label = f"{sts.hour}z{sts.hour}z"
+    ets = sts + datetime.timedelta(hours=hours)
+    label = f"{sts.hour}z{ets.hour}z"
+    if hours != 24:
+        label = f"{label}_{hours}h"
     LOG.info("Running for %s with routes=%s, label=%s", sts, routes, label)
-    ets = sts + datetime.timedelta(days=1)
-    interval = datetime.timedelta(minutes=5)
 
-    n0rct = get_colortable(prod)
+    maxn0r, frames = composite(prod, sts, ets)
+    if maxn0r is None:
+        LOG.warning("No frames found for %s %s", prod, sts)
+        return
+    LOG.info("%s composite used %s frames", prod, frames)
+    # Unique names, as several windows can run for the same start hour
+    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as fh:
+        pngfn = fh.name
+    write_png(maxn0r, get_colortable(prod), pngfn)
 
-    # Loop over our archived files and do what is necessary
-    maxn0r = None
-    now = sts
-    while now < ets:
-        fn = now.strftime(
-            f"/mesonet/ARCHIVE/data/%Y/%m/%d/GIS/uscomp/{prod}_%Y%m%d%H%M.png"
-        )
-        if not os.path.isfile(fn):
-            LOG.warning("missing file: %s", fn)
-            now += interval
-            continue
-        n0r = gdal.Open(fn, 0)
-        n0rd = n0r.ReadAsArray()
-        LOG.info(
-            "%s %s %s %s", now, n0rd.dtype, np.shape(n0rd), n0r.RasterCount
-        )
-        if maxn0r is None:
-            maxn0r = n0rd
-        maxn0r = np.where(n0rd > maxn0r, n0rd, maxn0r)
-
-        now += interval
-
-    out_driver = gdal.GetDriverByName("gtiff")
-    outdataset = out_driver.Create(
-        f"/tmp/{sts:%Y%m%d%H}.tiff",
-        n0r.RasterXSize,
-        n0r.RasterYSize,
-        n0r.RasterCount,
-        gdalconst.GDT_Byte,
-    )
-    # Set output color table to match input
-    outdataset.GetRasterBand(1).SetRasterColorTable(n0rct)
-    outdataset.GetRasterBand(1).WriteArray(maxn0r)
-    del outdataset
-
-    subprocess.call(
-        f"convert /tmp/{sts:%Y%m%d%H}.tiff /tmp/{sts:%Y%m%d%H}.png",
-        shell=True,
-    )
     # Insert into LDM
     cmd = [
         "pqinsert",
         "-p",
         f"plot a {sts:%Y%m%d%H}00 bogus "
         f"GIS/uscomp/max_{prod}_{label}_{sts:%Y%m%d}.png png",
-        f"/tmp/{sts:%Y%m%d%H}.png",
+        pngfn,
     ]
     LOG.info(" ".join(cmd))
     subprocess.call(cmd)
 
     # Create tmp world file
-    wldfn = f"/tmp/tmpwld{sts:%Y%m%d%H}.wld"
-    with open(wldfn, "w", encoding="utf-8") as fh:
+    with tempfile.NamedTemporaryFile(
+        "w", suffix=".wld", delete=False, encoding="utf-8"
+    ) as fh:
+        wldfn = fh.name
         if prod == "n0r":
             fh.write("0.01\n0.0\n0.0\n-0.01\n-126.0\n50.0")
         else:
@@ -124,9 +226,10 @@ def run(prod, sts):
     subprocess.call(cmd, shell=True)
 
     # cleanup
-    os.remove(f"/tmp/{sts:%Y%m%d%H}.tiff")
-    os.remove(f"/tmp/{sts:%Y%m%d%H}.png")
+    os.remove(pngfn)
     os.remove(wldfn)
+    if hours != 24:
+        return
 
     # 60s was too tight it appears
     LOG.info("sleeping 180s to allow LDM to propogate")
@@ -140,13 +243,13 @@ def run(prod, sts):
         f"{URLBASE}layers[]=uscounties&layers[]={layer}&ts={sts:%Y%m%d%H%M}",
         timeout=120,
     )
-    with open(f"/tmp/{sts:%Y%m%d%H}.png", "wb") as fh:
+    with open(pngfn, "wb") as fh:
         fh.write(png.content)
     cmd = (
         f"pqinsert -p 'plot {routes} {sts:%Y%m%d%H}00 "
         f"summary/max_{prod}_{label}_comprad.png "
         f"comprad/max_{prod}_{label}_{sts:%Y%m%d}.png png' "
-        f"/tmp/{sts:%Y%m%d%H}.png"
+        f"{pngfn}"
     )
     LOG.info(cmd)
     subprocess.call(cmd, shell=True)
@@ -157,26 +260,28 @@ def run(prod, sts):
     if png.status_code != 200:
         LOG.warning("Got status_code %s for %s", png.status_code, url)
     else:
-        with open(f"/tmp/{sts:%Y%m%d%H}.png", "wb") as fh:
+        with open(pngfn, "wb") as fh:
             fh.write(png.content)
         cmd = (
             f"pqinsert -p 'plot {routes} {sts:%Y%m%d%H}00 "
             f"summary/max_{prod}_{label}_usrad.png "
             f"usrad/max_{prod}_{label}_{sts:%Y%m%d}.png png' "
-            f"/tmp/{sts:%Y%m%d%H}.png"
+            f"{pngfn}"
         )
         LOG.info(cmd)
         subprocess.call(cmd, shell=True)
-        os.remove(f"/tmp/{sts:%Y%m%d%H}.png")
+    os.remove(pngfn)
 
 
 def main(argv):
     """Run main()"""
     ts = utc(*[int(i) for i in argv[1:5]])
+    hours = 24 if len(argv) < 6 else int(argv[5])
     for prod in ["n0r", "n0q"]:
         if ts < utc(2010, 11, 13) and prod == "n0q":
             continue
-        run(prod, ts)
+        run(prod, ts, hours)
+    cleanup_partials()
 
 
 if __name__ == "__main__":
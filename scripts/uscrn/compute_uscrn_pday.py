@@ -1,6 +1,6 @@
 """Compute the daily USCRN precipitation total.
 
-Called from `RUN_20_AFTER.sh` for current date.
+Called from `run_jobs.py 20_after` for current date.
 Called from `RUN_12Z.sh` for yesterday and a week ago.
 """
 # pylint: disable=cell-var-from-loop
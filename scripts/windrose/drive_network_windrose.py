@@ -1,20 +1,33 @@
 """Generate a windrose for each site in the specified network..."""
-import subprocess
 import sys
+from multiprocessing import Pool
 
+from make_windrose import render_station
 from pyiem.network import Table as NetworkTable
 from pyiem.util import logger
 
 LOG = logger()
+WORKERS = 4
+
+
+def _render(args):
+    """Pool friendly wrapper, so one station's failure is not fatal."""
+    net, sid, meta = args
+    LOG.info("rendering windroses network: %s sid: %s", net, sid)
+    try:
+        render_station(net, sid, meta)
+    except Exception as exp:
+        LOG.warning("%s %s failed: %s", net, sid, exp)
 
 
 def main(argv):
     """Go Main"""
     net = argv[1]
     nt = NetworkTable(net)
-    for sid in nt.sts:
-        LOG.info("calling make_windrose.py network: %s sid: %s", net, sid)
-        subprocess.call(["python", "make_windrose.py", net, sid])
+    jobs = [(net, sid, nt.sts[sid]) for sid in nt.sts]
+    with Pool(WORKERS) as pool:
+        for _ in pool.imap_unordered(_render, jobs):
+            pass
 
 
 if __name__ == "__main__":
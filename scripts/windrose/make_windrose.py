@@ -5,19 +5,22 @@ import os
 import sys
 from calendar import month_abbr
 
+from iemweb.windrosecounts import (
+    counts_windrose,
+    filter_counts,
+    load_counts,
+    update_counts,
+)
 from pyiem.network import Table as NetworkTable
 from pyiem.plot.use_agg import plt
+from pyiem.util import get_dbconn
 from pyiem.windrose_utils import windrose
 
 CACHE_DIR = "/mesonet/share/windrose"
 
 
-def main():
-    """Go Main"""
-    net = sys.argv[1]
-    nt = NetworkTable(net)
-    sid = sys.argv[2]
-
+def get_database(net):
+    """Figure out which database has this network's data."""
     database = "asos"
     if net in ("KCCI", "KELO", "KIMT"):
         database = "snet"
@@ -27,33 +30,54 @@ def main():
         database = "isuag"
     elif net.find("_DCP") > 0:
         database = "hads"
+    return database
+
+
+def render_station(net, sid, meta):
+    """Generate the yearly and monthly windroses for a station.
 
+    Args:
+      net (str): network identifier
+      sid (str): station identifier
+      meta (dict): station metadata with `name` and `tzname`
+    """
+    database = get_database(net)
     mydir = os.path.join(CACHE_DIR, net, sid)
     if not os.path.isdir(mydir):
         os.makedirs(mydir)
-    fn = f"{mydir}/{sid}_yearly.png"
-    res = windrose(
-        sid,
-        database=database,
-        sname=nt.sts[sid]["name"],
-        tzname=nt.sts[sid]["tzname"],
-    )
-    res.savefig(fn)
-    plt.close()
-    for month in range(1, 13):
-        fn = f"{mydir}/{sid}_{month_abbr[month].lower()}.png"
-        res = windrose(
-            sid,
-            months=[
-                month,
-            ],
-            database=database,
-            sname=nt.sts[sid]["name"],
-            tzname=nt.sts[sid]["tzname"],
-        )
+    kwargs = {"sname": meta["name"], "tzname": meta["tzname"]}
+    counts = None
+    if database == "asos":
+        # Bring the counts up to date and then render all from them
+        with get_dbconn("asos") as pgconn:
+            update_counts(pgconn.cursor(), net, sid, meta["tzname"])
+        counts, _ = load_counts(net, sid)
+
+    def _render(fn, months=None):
+        """Render one windrose."""
+        if counts is not None:
+            res = counts_windrose(
+                sid, filter_counts(counts, months=months), **kwargs
+            )
+        elif months is None:
+            res = windrose(sid, database=database, **kwargs)
+        else:
+            res = windrose(sid, months=months, database=database, **kwargs)
         res.savefig(fn)
         plt.close()
 
+    _render(f"{mydir}/{sid}_yearly.png")
+    for month in range(1, 13):
+        _render(f"{mydir}/{sid}_{month_abbr[month].lower()}.png", [month])
+
+
+def main():
+    """Go Main"""
+    net = sys.argv[1]
+    nt = NetworkTable(net)
+    sid = sys.argv[2]
+    render_station(net, sid, nt.sts[sid])
+
 
 if __name__ == "__main__":
     main()
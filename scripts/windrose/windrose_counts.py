@@ -0,0 +1,41 @@
+"""Maintain precomputed wind direction x speed counts for windroses.
+
+The counts are stored and read by iemweb.windrosecounts, each run recounts
+the recent months of observations for every station in the network, or in
+all of the ASOS networks when none is given.  Called from RUN_2AM.sh
+
+    python windrose_counts.py [network]
+"""
+import sys
+
+from iemweb.windrosecounts import update_counts
+from pyiem.network import Table as NetworkTable
+from pyiem.util import get_dbconn
+
+
+def get_networks():
+    """Return the ASOS networks."""
+    pgconn = get_dbconn("mesosite")
+    cursor = pgconn.cursor()
+    cursor.execute(
+        "SELECT id from networks where id ~* '_ASOS' ORDER by id ASC"
+    )
+    networks = [row[0] for row in cursor]
+    pgconn.close()
+    return networks
+
+
+def main(argv):
+    """Update the counts for a network."""
+    networks = [argv[1]] if len(argv) > 1 else get_networks()
+    pgconn = get_dbconn("asos")
+    cursor = pgconn.cursor()
+    for network in networks:
+        nt = NetworkTable(network, only_online=False)
+        for sid in nt.sts:
+            update_counts(cursor, network, sid, nt.sts[sid]["tzname"])
+    pgconn.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
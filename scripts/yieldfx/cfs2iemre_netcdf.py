@@ -8,9 +8,9 @@ import sys
 
 import numpy as np
 import pygrib
+from iemweb.regrid import nn_regrid
 from pyiem import iemre
 from pyiem.util import logger, ncopen, utc
-from scipy.interpolate import NearestNDInterpolator
 from tqdm import tqdm
 
 LOG = logger()
@@ -51,8 +51,7 @@ def merge(nc, valid, gribname, vname):
         if lats is None:
             lats, lons = grib.latlons()
         vals = grib.values * MULTIPLIER.get(vname, 1)
-        nn = NearestNDInterpolator((lons.flat, lats.flat), vals.flat)
-        vals = nn(xi, yi)
+        vals = nn_regrid(lons, lats, vals, xi, yi)
         tstep = iemre.daily_offset(cst.date())
         current = ncvar[tstep, :, :]
         if current.mask.all():